@@ -138,5 +138,11 @@ for prop in sample_properties:
         success_count += 1
         print(f"✓ 追加: {prop['title']}")
 
+# 集計テーブル・ファセット索引にも反映してから API のキャッシュを無効化
+if success_count:
+    db.refresh_summary_stats([prop["url"] for prop in sample_properties])
+    db.rebuild_facet_index()
+    db.bump_data_version()
+
 print(f"\n完了！ {success_count}/{len(sample_properties)} 件の物件を追加しました。")
 print("\nダッシュボードをリロードして確認してください！")
@@ -1,33 +1,49 @@
 # Advanced Statistics Endpoint
 # Add this after line 222 in server.py
 
+def _live_advanced_stats():
+    """Full-table statistics (fallback when the summary tables are not built)"""
+    # Get all active properties count
+    total_active = sum(1 for _ in db.iter_active_properties(fields=['category']))
+    
+    # Get time-based statistics
+    time_stats = db.get_time_based_statistics()
+    
+    # Get category statistics
+    cat_stats = db.get_category_statistics()
+    
+    # Get price statistics
+    price_stats = db.get_price_statistics()
+    
+    # Get area distribution
+    area_dist = db.get_area_distribution()
+    
+    # Calculate counts by type
+    by_type = {}
+    for cat in cat_stats.values():
+        cat_type = cat['category_type']
+        by_type[cat_type] = by_type.get(cat_type, 0) + cat['count']
+    
+    return total_active, time_stats, cat_stats, price_stats, area_dist, by_type
+
 @app.route('/api/stats/advanced', methods=['GET'])
 def get_advanced_stats():
     """
     Get comprehensive statistics with price analysis, trends, and area distribution
     """
     try:
-        # Get all active properties count
-        all_props = db.get_all_active_properties()
-        total_active = len(all_props)
-        
-        # Get time-based statistics
-        time_stats = db.get_time_based_statistics()
-        
-        # Get category statistics
-        cat_stats = db.get_category_statistics()
-        
-        # Get price statistics
-        price_stats = db.get_price_statistics()
-        
-        # Get area distribution
-        area_dist = db.get_area_distribution()
-        
-        # Calculate counts by type
-        by_type = {}
-        for cat in cat_stats.values():
-            cat_type = cat['category_type']
-            by_type[cat_type] = by_type.get(cat_type, 0) + cat['count']
+        # Precomputed summary tables (a few dozen rows); live statistics
+        # only if they have not been built yet
+        summary = db.get_summary_statistics()
+        if summary:
+            total_active = summary['total_active']
+            time_stats = summary['time']
+            cat_stats = summary['by_category']
+            price_stats = summary['price_stats']
+            area_dist = summary['by_area']
+            by_type = summary['by_type']
+        else:
+            total_active, time_stats, cat_stats, price_stats, area_dist, by_type = _live_advanced_stats()
         
         return jsonify({
             'success': True,
@@ -43,15 +59,20 @@ def get_advanced_stats():
                 'median': f"¥{price_stats['median']}万円",
                 'min': f"¥{price_stats['min']}万円",
                 'max': f"¥{price_stats['max']}万円",
+                'percentile25': f"¥{price_stats['percentile25']}万円",
+                'percentile75': f"¥{price_stats['percentile75']}万円",
                 'count': price_stats['count'],
                 'average_raw': price_stats['average'],
                 'median_raw': price_stats['median'],
                 'min_raw': price_stats['min'],
-                'max_raw': price_stats['max']
+                'max_raw': price_stats['max'],
+                'percentile25_raw': price_stats['percentile25'],
+                'percentile75_raw': price_stats['percentile75']
             },
             'by_category': cat_stats,
             'by_type': by_type,
             'by_area': area_dist,
+            'by_price_band': summary['by_price_band'] if summary else None,
             'database_type': db.db_type
         })
     except Exception as e:
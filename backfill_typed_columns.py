@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Fill price_yen / rent_yen / land_m2 / floor_m2 / layout / built_year for existing rows.
+
+New and re-scraped rows get these at write time; run this once after
+upgrading, and again whenever property_normalize's parsing rules change.
+Supabase requires supabase_typed_columns_migration.sql to be applied first.
+"""
+
+from database import db
+
+
+def main():
+    print(f"Backfilling typed columns ({db.db_type})...")
+    total = db.backfill_typed_columns()
+    print(f"✅ Recomputed typed columns for {total} row(s)")
+    # Price bands (summary tables) and the 間取り / price band facets come from the typed columns
+    db.rebuild_summary_stats()
+    db.rebuild_facet_index()
+    db.bump_data_version()
+
+
+if __name__ == "__main__":
+    main()
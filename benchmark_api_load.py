@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Load test for the API server: concurrent dashboard-style traffic.
+
+Each client thread keeps one HTTP/1.1 connection open and loops over the
+requests a dashboard load makes (stats, advanced stats, today's diff, the
+first page of the property list), as many sales staff opening the
+dashboard at once would. Reports throughput and p50 / p95 / p99 latency
+per path and overall.
+
+    # development server
+    python server.py
+    # production server
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+    python benchmark_api_load.py --url http://127.0.0.1:5000 -c 16 -d 15
+    python benchmark_api_load.py --cold      # unique query per request: bypasses the response cache
+
+Exit code is 1 if any request failed.
+"""
+
+import sys
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+DASHBOARD_PATHS = [
+    "/api/stats",
+    "/api/stats/advanced",
+    "/api/properties/diff?fields=url,title,price,category",
+    "/api/properties/all?limit=100&fields=url,title,price,category,category_type",
+]
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _client(base, paths, deadline, cold, results, errors, lock, client_id):
+    parts = urlsplit(base)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    n = 0
+    while time.perf_counter() < deadline:
+        for path in paths:
+            if cold:
+                path += ("&" if "?" in path else "?") + f"_cold={client_id}-{n}"
+                n += 1
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+            elapsed = time.perf_counter() - start
+            key = path.split("&_cold=")[0].split("?_cold=")[0]
+            with lock:
+                if ok:
+                    results.setdefault(key, []).append(elapsed)
+                else:
+                    errors[key] = errors.get(key, 0) + 1
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=15.0, help="seconds")
+    parser.add_argument("--cold", action="store_true", help="defeat the response cache")
+    parser.add_argument("--path", action="append", help="request path (repeatable; default: dashboard mix)")
+    args = parser.parse_args()
+
+    paths = args.path or DASHBOARD_PATHS
+    results, errors, lock = {}, {}, threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=_client, args=(args.url, paths, deadline, args.cold, results, errors, lock, i))
+               for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    print(f"{args.url}  concurrency={args.concurrency}  duration={wall:.1f}s  "
+          f"{'cold (cache bypassed)' if args.cold else 'warm'}")
+    print(f"{'path':<80} {'req':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    everything = []
+    for path in paths:
+        values = sorted(results.get(path, []))
+        everything.extend(values)
+        print(f"{path:<80} {len(values):6d} {errors.get(path, 0):4d} "
+              + " ".join(f"{_percentile(values, q) * 1000:7.1f}ms" for q in (0.5, 0.95, 0.99, 1.0)))
+    everything.sort()
+    total_errors = sum(errors.values())
+    print(f"{'TOTAL':<80} {len(everything):6d} {total_errors:4d} "
+          + " ".join(f"{_percentile(everything, q) * 1000:7.1f}ms" for q in (0.5, 0.95, 0.99, 1.0)))
+    print(f"throughput: {len(everything) / wall:.1f} req/s")
+    sys.exit(1 if total_errors else 0)
+
+
+if __name__ == "__main__":
+    main()
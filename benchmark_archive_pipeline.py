@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Offline throughput benchmark for the image archiving pipeline
+
+Serves synthetic listing photos from a local HTTP server and archives them
+into LocalStorage in a temp directory, so no Supabase project or
+STORAGE_SUPABASE_URL is needed.
+
+Usage:
+    python benchmark_archive_pipeline.py [num_properties] [photos_per_property]
+
+The second pass re-archives the same properties and should be served entirely
+from the dedupe index (0 downloads, 0 uploads).
+"""
+
+import os
+import sys
+import random
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from PIL import Image
+
+import image_archiver
+
+PHOTO_SIZE = (1600, 1200)
+# Distinct source photos; properties draw from this pool so some photos are
+# shared between listings (agent photos, re-lists), as in production.
+PHOTO_POOL = 120
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_photos(directory: str) -> None:
+    rng = random.Random(0)
+    for i in range(PHOTO_POOL):
+        # Random coarse layout upscaled smoothly: distinct low-frequency
+        # structure per photo (so perceptual hashes differ) plus fine noise
+        # (so the JPEGs are photo-sized).
+        layout = Image.frombytes("RGB", (8, 6), rng.randbytes(8 * 6 * 3)).resize(PHOTO_SIZE, Image.BICUBIC)
+        noise = Image.effect_noise(PHOTO_SIZE, 30).convert("RGB")
+        Image.blend(layout, noise, 0.15).save(os.path.join(directory, f"photo_{i}.jpg"), quality=85)
+
+
+def _verify_objects(storage: image_archiver.LocalStorage, archived) -> int:
+    """Every returned public URL must point at a file that exists."""
+    missing = 0
+    for urls in archived.values():
+        for url in urls:
+            path = url.split(f"/{storage.bucket}/", 1)[1]
+            if not os.path.exists(storage._object_path(path)):
+                missing += 1
+    return missing
+
+
+def main():
+    num_properties = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    photos_per_property = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as workdir:
+        photo_dir = os.path.join(workdir, "photos")
+        os.makedirs(photo_dir)
+        _write_photos(photo_dir)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=photo_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        # The pipeline only archives URLs containing "cdn.e-uchina.net";
+        # carry it in the query string so the production filter still runs.
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        rng = random.Random(1)
+        properties = []
+        for n in range(num_properties):
+            photos = rng.sample(range(PHOTO_POOL), photos_per_property)
+            properties.append({
+                "url": f"https://www.e-uchina.net/bukken/house/h-{n}/detail.html",
+                "category": "house",
+                "images": [f"{base}/photo_{i}.jpg?cdn.e-uchina.net" for i in photos],
+            })
+
+        storage = image_archiver.LocalStorage(root=os.path.join(workdir, "storage"))
+        image_archiver.set_storage(storage)
+        storage.ensure_bucket()
+
+        print("=" * 70)
+        print(f"Archive pipeline benchmark: {num_properties} properties, "
+              f"{photos_per_property} photos each (pool of {PHOTO_POOL})")
+        print(f"IO workers: {image_archiver.ARCHIVE_IO_WORKERS}, "
+              f"CPU workers: {image_archiver.ARCHIVE_CPU_WORKERS}")
+        print("=" * 70)
+
+        for label in ("cold", "warm"):
+            index = image_archiver.ArchiveIndex()
+            try:
+                archived, timings = image_archiver.archive_sold_properties(properties, index=index)
+            finally:
+                index.close()
+            images = timings["images"]
+            rate = images / timings["wall"] if timings["wall"] else 0
+            print(f"{label:>5}: {images} images in {timings['wall']:.2f}s ({rate:.0f} images/s), "
+                  f"{timings['reused']} reused, {_verify_objects(storage, archived)} missing objects")
+
+        objects = sum(len(files) for _, _, files in os.walk(os.path.join(storage.root, storage.bucket)))
+        print(f"\nStored objects: {objects}")
+        print("=" * 70)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
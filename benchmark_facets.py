@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Facet counts and filtered listings from the facet index vs scanning every listing.
+
+Builds a synthetic inventory and, for a few sidebar-style filter
+combinations, times:
+  - scan:  the previous way (the dashboard's featured/pet-friendly and
+           area-stats routes) — read every active row and classify its
+           property_data in Python, then count
+  - index: FacetIndex.counts / FacetIndex.page on the stored index
+and checks that both give the same counts and the same listing ids.
+
+Usage:
+    python benchmark_facets.py [N]
+N is the number of listings (default 50,000; about 80% active).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import tempfile
+
+FILTERS = [
+    {},
+    {"city": ["那覇市"]},
+    {"city": ["那覇市", "浦添市"], "layout": ["3LDK"]},
+    {"category": ["jukyo"], "pet": ["true"], "parking": ["true"]},
+    {"price_band": ["賃貸:5万〜8万円", "賃貸:8万〜12万円"], "city": ["北谷町"], "pet": ["true"]},
+    {"city": ["名護市"], "layout": ["1R", "1K"], "category_type": ["賃貸"], "parking": ["false"]},
+]
+CITIES = ["那覇市", "浦添市", "宜野湾市", "沖縄市", "うるま市", "名護市", "読谷村", "北谷町", "豊見城市", "糸満市"]
+LAYOUTS = ["1R", "1K", "1LDK", "2LDK", "3LDK", "３ＬＤＫ", "4LDK", "2DK"]
+PETS = ["可", "相談", "小型犬のみ可", "不可", "ペット不可", None]
+PARKINGS = ["有", "あり（1台）", "空き無し", "なし", "無料", "近隣 5,000円", None]
+CATEGORIES = [("jukyo", "賃貸", "家賃"), ("jukyo", "賃貸", "家賃"), ("jukyo", "賃貸", "家賃"),
+              ("parking", "賃貸", "家賃"), ("mansion", "売買", "価格"), ("house", "売買", "価格")]
+
+
+def build_db(path: str, n: int) -> None:
+    """Fill the schema created by Database.initialize() with synthetic rows."""
+    from property_normalize import typed_fields
+    rng = random.Random(0)
+    rows = []
+    for i in range(n):
+        category, category_type, price_key = rng.choice(CATEGORIES)
+        price = f"{rng.randint(3, 20)}万円" if category_type == "賃貸" else f"{rng.randint(800, 9000)}万円"
+        data = {price_key: price, "所在地": f"沖縄県{rng.choice(CITIES)}字{rng.randint(1, 9)}", "間取り": rng.choice(LAYOUTS)}
+        for key, choices in (("ペット", PETS), ("駐車場", PARKINGS)):
+            value = rng.choice(choices)
+            if value:
+                data[key] = value
+        typed = typed_fields(category, price, data)
+        rows.append((f"https://example.com/{i}", category, category_type, category_type, rng.random() < 0.8,
+                     json.dumps(data, ensure_ascii=rng.random() < 0.5), typed["price_yen"], typed["rent_yen"],
+                     typed["layout"]))
+    conn = sqlite3.connect(path)
+    conn.executemany("""
+        INSERT INTO properties (url, category, category_type, category_name_ja, genre_name_ja,
+                                is_active, property_data, price_yen, rent_yen, layout)
+        VALUES (?, ?, ?, '物件', ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def scan(db, filters: dict):
+    """Reference: classify every active row in Python; (total, counts, ids newest first)."""
+    from facet_index import FACETS
+    members = [(int(cursor), db._facet_member(row))
+               for cursor, row in db.iter_properties({"is_active": True}, ["category", "category_type", "layout",
+                                                                           "price_yen", "rent_yen", "property_data"])]
+    matches = lambda member, skip=None: all(member[f] in values for f, values in filters.items() if f != skip)
+    counts = {}
+    for facet in FACETS:
+        counts[facet] = {}
+        for _, member in members:
+            if member[facet] is not None and matches(member, facet):
+                counts[facet][member[facet]] = counts[facet].get(member[facet], 0) + 1
+    ids = sorted((row_id for row_id, member in members if matches(member)), reverse=True)
+    return len(ids), counts, ids
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_facets_"), "bench.db")
+    os.environ["DATABASE_TYPE"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = path
+    from database import Database
+    db = Database().initialize()
+    build_db(path, n)
+
+    start = time.perf_counter()
+    indexed = db.rebuild_facet_index()
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index = db.load_facet_index()
+    load_ms = (time.perf_counter() - start) * 1000
+    blob_kb = len(index.to_bytes()) / 1024
+    bitmaps = sum(len(values) for values in index.bitmaps.values())
+    print(f"Facets over {n:,} listings ({indexed:,} active, {path})")
+    print(f"index: {bitmaps} bitmaps, built and stored in {build_s:.2f}s, {blob_kb:.1f} KB compressed, "
+          f"loaded in {load_ms:.1f}ms")
+
+    failures = 0
+    for filters in FILTERS:
+        start = time.perf_counter()
+        expected_total, expected_counts, expected_ids = scan(db, filters)
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        total, counts = index.counts(filters)
+        counts_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        index.page(filters, limit=20)
+        page_ms = (time.perf_counter() - start) * 1000
+
+        ids, after = [], None
+        while True:
+            page, after, _ = index.page(filters, after, limit=100)
+            ids.extend(page)
+            if after is None:
+                break
+        selected = {f: set(values) for f, values in filters.items()}
+        counts = {f: {v: c for v, c in values.items() if c or v not in selected.get(f, ())}
+                  for f, values in counts.items()}
+        identical = total == expected_total and counts == expected_counts and ids == expected_ids
+        failures += not identical
+        label = " ".join(f"{f}={','.join(v)}" for f, v in filters.items()) or "(no filter)"
+        print(f"{label[:56]:<56} hits {total:6,d}   scan {scan_ms:7.1f}ms   counts {counts_ms:5.2f}ms "
+              f"page {page_ms:5.2f}ms  identical={identical}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
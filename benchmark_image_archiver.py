@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: image_archiver compression, full decode vs JPEG draft decode
+
+Usage:
+    python benchmark_image_archiver.py                # synthetic 4000x3000 JPEGs
+    python benchmark_image_archiver.py photo1.jpg ... # real listing photos
+
+Each mode runs in its own process so peak RSS is not polluted by the other.
+Reported per image: CPU time (process_time) and decoded pixel buffer size;
+per run: growth of the worker's peak RSS while compressing.
+"""
+
+import io
+import sys
+import time
+import resource
+import multiprocessing
+
+from PIL import Image
+
+import image_archiver
+
+SYNTHETIC_COUNT = 10
+SYNTHETIC_SIZE = (4000, 3000)
+
+
+def _legacy_compress(raw: bytes) -> bytes:
+    """Pre-draft implementation: full-resolution decode, then resize."""
+    img = Image.open(io.BytesIO(raw))
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    w, h = img.size
+    if max(w, h) > image_archiver.WEBP_MAX_SIZE:
+        ratio = image_archiver.WEBP_MAX_SIZE / max(w, h)
+        img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="WEBP", quality=image_archiver.WEBP_QUALITY)
+    return buf.getvalue()
+
+
+def _decoded_bytes(raw: bytes, draft: bool) -> int:
+    """Size of the pixel buffer the decoder materializes."""
+    img = Image.open(io.BytesIO(raw))
+    if draft and img.format == "JPEG":
+        img.draft("RGB", image_archiver._target_size(*img.size))
+    img.load()
+    return img.size[0] * img.size[1] * len(img.getbands())
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run(mode: str, paths, queue) -> None:
+    # Images are built inside the worker so pickling them across the process
+    # boundary does not inflate the RSS baseline.
+    images = _load_images(paths)
+    compress = _legacy_compress if mode == "full" else image_archiver._compress
+    baseline = _peak_rss_kb()
+    start = time.process_time()
+    out_bytes = 0
+    for raw in images:
+        out_bytes += len(compress(raw) or b"")
+    cpu = time.process_time() - start
+    peak = _peak_rss_kb() - baseline
+    decoded = sum(_decoded_bytes(raw, mode == "draft") for raw in images) / len(images)
+    queue.put((mode, cpu, peak, decoded, out_bytes))
+
+
+def _synthetic_paths(directory: str):
+    import os
+    return [os.path.join(directory, f"synthetic_{i}.jpg") for i in range(SYNTHETIC_COUNT)]
+
+
+def _write_synthetic_images(directory: str) -> None:
+    """Write photo-like JPEGs to disk.
+
+    Runs in its own process: Linux keeps the RSS high-water mark across
+    fork/exec, so generating full-size images in the parent would leak into
+    every worker's baseline and mask the difference being measured.
+    """
+    import random
+    for i, path in enumerate(_synthetic_paths(directory)):
+        # Smooth gradients + noise compress like photos rather than pure noise
+        img = Image.linear_gradient("L").resize(SYNTHETIC_SIZE).convert("RGB")
+        img = Image.blend(img, Image.effect_noise(SYNTHETIC_SIZE, 40 + i).convert("RGB"), 0.1)
+        img.save(path, format="JPEG", quality=random.choice([80, 85, 90]))
+
+
+def _load_images(paths):
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return images
+
+
+def main():
+    import tempfile
+    ctx = multiprocessing.get_context("spawn")
+    tmpdir = None
+    paths = sys.argv[1:]
+    if not paths:
+        tmpdir = tempfile.TemporaryDirectory()
+        proc = ctx.Process(target=_write_synthetic_images, args=(tmpdir.name,))
+        proc.start()
+        proc.join()
+        paths = _synthetic_paths(tmpdir.name)
+    count = len(paths)
+
+    print("=" * 70)
+    print(f"image_archiver compression benchmark ({count} images)")
+    print("=" * 70)
+
+    queue = ctx.Queue()
+    results = {}
+    for mode in ("full", "draft"):
+        proc = ctx.Process(target=_run, args=(mode, paths, queue))
+        proc.start()
+        name, cpu, peak, decoded, out_bytes = queue.get()
+        proc.join()
+        results[name] = (cpu, peak, decoded, out_bytes)
+
+    for mode, (cpu, peak, decoded, out_bytes) in results.items():
+        print(f"{mode:>6}: CPU {cpu / count * 1000:7.1f} ms/image | "
+              f"decoded {decoded / 1024 / 1024:6.1f} MB/image | "
+              f"peak RSS +{peak / 1024:6.1f} MB | output {out_bytes / count / 1024:.1f} KB/image")
+
+    full_cpu, draft_cpu = results["full"][0], results["draft"][0]
+    if draft_cpu > 0:
+        print(f"\nSpeedup: {full_cpu / draft_cpu:.1f}x CPU")
+    print("=" * 70)
+
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Startup cost of the modules CLI tools and the API server import.
+
+Each module is imported in a fresh interpreter (so nothing is cached by an
+earlier import) several times; the median wall time of the import is
+reported together with the slowest imports below it, from
+`python -X importtime`. A second table times `import database` plus the
+first database call, i.e. what a short check / retry run pays before it
+does any work.
+
+Usage:
+    python benchmark_import_time.py [RUNS] [MODULE ...]
+RUNS defaults to 5. Uses the configured DATABASE_TYPE; with SQLite the
+first-call rows run against a throwaway database file.
+"""
+
+import os
+import sys
+import statistics
+import subprocess
+import tempfile
+
+MODULES = [
+    "config",
+    "property_normalize",
+    "database",
+    "image_archiver",
+    "server",
+    "integrated_scraper",
+]
+TOP_IMPORTS = 3
+
+TIMED_IMPORT = """
+import time
+start = time.perf_counter()
+import {module}
+print(f"IMPORT_SECONDS={{time.perf_counter() - start}}")
+"""
+
+TIMED_FIRST_CALL = """
+import time
+start = time.perf_counter()
+from database import db
+imported = time.perf_counter()
+db.get_data_version()
+print(f"IMPORT_SECONDS={imported - start}")
+print(f"CALL_SECONDS={time.perf_counter() - imported}")
+"""
+
+
+def _run(code: str, env: dict, importtime: bool = False):
+    """Run code in a fresh interpreter; returns (values printed as KEY=float, stderr)."""
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(args, capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        last = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+        raise RuntimeError(last)
+    values = {}
+    for line in proc.stdout.splitlines():
+        key, sep, value = line.partition("=")
+        if sep and key.endswith("_SECONDS"):
+            values[key] = float(value)
+    return values, proc.stderr
+
+
+def _slowest_imports(importtime_log: str, exclude: set, n: int):
+    """Top-level packages with the largest cumulative import time (µs), except those in exclude."""
+    totals = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line.split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue   # header line
+        name = name.strip()
+        top = name.split(".")[0]
+        if top not in exclude and name == top:
+            totals[top] = max(totals.get(top, 0), cumulative)
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    modules = sys.argv[2:] or MODULES
+
+    env = dict(os.environ)
+    if env.get("DATABASE_TYPE", "supabase") == "sqlite" and "SQLITE_DB_PATH" not in env:
+        env["SQLITE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_import_"), "bench.db")
+    print(f"Import time, fresh interpreter, median of {runs} (DATABASE_TYPE={env.get('DATABASE_TYPE', 'supabase')})")
+    print(f"{'module':<22} {'import ms':>10}  slowest imports")
+    _, startup_log = _run("pass", env, importtime=True)
+    startup = {name for name, _ in _slowest_imports(startup_log, set(), 1000)}   # site, .pth hooks
+    for module in modules:
+        try:
+            samples = [_run(TIMED_IMPORT.format(module=module), env)[0]["IMPORT_SECONDS"]
+                       for _ in range(runs)]
+            _, log = _run(TIMED_IMPORT.format(module=module), env, importtime=True)
+        except RuntimeError as e:
+            print(f"{module:<22} {'-':>10}  unavailable here: {e}")
+            continue
+        slowest = ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in _slowest_imports(log, startup | {module}, TOP_IMPORTS))
+        print(f"{module:<22} {statistics.median(samples) * 1000:10.1f}  {slowest}")
+
+    print()
+    print(f"{'first database call':<22} {'import ms':>10} {'call ms':>10}")
+    try:
+        samples = [_run(TIMED_FIRST_CALL, env)[0] for _ in range(runs)]
+    except RuntimeError as e:
+        print(f"{'get_data_version':<22} unavailable here: {e}")
+        return
+    print(f"{'get_data_version':<22} {statistics.median(s['IMPORT_SECONDS'] for s in samples) * 1000:10.1f} "
+          f"{statistics.median(s['CALL_SECONDS'] for s in samples) * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
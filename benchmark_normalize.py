@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Benchmark for property_normalize.
+
+Times scalar vs batch parsing of N strings (default 50,000) built from
+realistic e-uchina.net values, plus an all-distinct worst case. The
+conformance corpus lives in tests/test_property_normalize.py.
+
+Usage:
+    python benchmark_normalize.py [N]
+"""
+
+import sys
+import time
+import random
+
+import numpy as np
+
+from property_normalize import parse_price_yen, parse_price_yen_batch
+
+
+def _realistic_prices(n: int, rng: random.Random) -> list:
+    out = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.45:
+            out.append(f"{rng.randint(300, 9800):,}万円")
+        elif r < 0.80:
+            out.append(f"{rng.randint(25, 200) / 10}万円")
+        elif r < 0.85:
+            out.append(f"{rng.randint(1, 5)}億{rng.randint(0, 9) * 1000:,}万円")
+        elif r < 0.90:
+            out.append(f"{rng.randint(3000, 20000):,}円")
+        elif r < 0.95:
+            out.append("お問い合わせ")
+        else:
+            low = rng.randint(1000, 5000)
+            out.append(f"{low:,}万円～{low + 500:,}万円")
+    return out
+
+
+def _bench(label: str, values: list) -> None:
+    start = time.perf_counter()
+    scalar = [parse_price_yen(v) for v in values]
+    scalar_s = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = parse_price_yen_batch(values)
+    batch_s = time.perf_counter() - start
+    expected = np.array([np.nan if v is None else v for v in scalar], dtype=np.float64)
+    same = np.array_equal(expected, batch, equal_nan=True)
+    print(f"{label:<24} scalar {scalar_s * 1000:8.1f}ms   batch {batch_s * 1000:8.1f}ms   "
+          f"({scalar_s / batch_s:4.1f}x)  identical={same}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    rng = random.Random(0)
+    realistic = _realistic_prices(n, rng)
+    distinct = [f"{i:,}万円" for i in range(1, n + 1)]
+    print(f"Parsing {n:,} price strings ({len(set(realistic)):,} distinct in the realistic set)")
+    _bench("realistic", realistic)
+    _bench("all distinct", distinct)
+
+
+if __name__ == "__main__":
+    main()
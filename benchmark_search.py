@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Full-text search (Database.search_properties) vs scanning every listing.
+
+Builds a synthetic archive (active and sold listings) and, for a few
+dashboard-style queries, times:
+  - scan:   the previous way to search — read every row and substring-match
+            title / company / property_data in Python
+  - search: one page (20 rows) from the FTS5 trigram index
+and checks that paging through all search results finds exactly the rows
+the scan finds.
+
+Usage:
+    python benchmark_search.py [N]
+N is the number of listings (default 50,000).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import tempfile
+
+QUERIES = ["北谷 3LDK ペット可", "ペット可", "ｵｰｼｬﾝﾋﾞｭｰ 角部屋", "３ＬＤＫ 美浜", "那覇市 即入居", "北谷", "大城"]
+CITIES = ["那覇市", "浦添市", "宜野湾市", "沖縄市", "うるま市", "名護市", "読谷村", "北谷町"]
+AREAS = ["美浜", "北前", "砂辺", "久茂地", "おもろまち", "真嘉比", "伊佐", "大山"]
+LAYOUTS = ["1K", "1LDK", "2LDK", "3LDK", "３ＬＤＫ", "2DK"]
+FEATURES = ["ペット可", "駐車場あり", "オートロック", "エアコン", "オーシャンビュー", "角部屋", "即入居可"]
+COMPANIES = ["大城不動産", "ＡＢＣ住宅", "比嘉ホーム", "琉球エステート"]
+
+
+def build_db(path: str, n: int) -> None:
+    """Fill the schema created by Database.initialize() with synthetic rows."""
+    rng = random.Random(0)
+    rows = []
+    for i in range(n):
+        city, area, layout = rng.choice(CITIES), rng.choice(AREAS), rng.choice(LAYOUTS)
+        features = rng.sample(FEATURES, 3)
+        data = {"価格": f"{rng.randint(3, 20)}万円", "所在地": f"沖縄県{city}{area}{rng.randint(1, 9)}丁目",
+                "間取り": layout, "設備": features[:2], "備考": f"{features[2]} 詳細はお問い合わせください"}
+        rows.append((f"https://example.com/{i}", rng.random() < 0.6, f"{city}{area} {layout}",
+                     rng.choice(COMPANIES), json.dumps(data, ensure_ascii=rng.random() < 0.5)))
+    conn = sqlite3.connect(path)
+    conn.executemany("""
+        INSERT INTO properties (url, category, category_type, category_name_ja, genre_name_ja,
+                                is_active, title, company_name, property_data)
+        VALUES (?, 'jukyo', '賃貸', '住居', '賃貸', ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def scan(db, query: str) -> set:
+    """Reference: every row through Python, all terms as case-insensitive substrings."""
+    from database import _search_term_variants
+    terms = [[v.lower() for v in _search_term_variants(t)] for t in dict.fromkeys(query.split())]
+    found = set()
+    conn = sqlite3.connect(db.db_path)
+    for url, title, company, category_name, genre_name, data in conn.execute(
+            "SELECT url, title, company_name, category_name_ja, genre_name_ja, property_data FROM properties"):
+        values = [title or "", company or "", category_name or "", genre_name or ""]
+        stack = [json.loads(data)] if data else []
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(value)
+            elif not isinstance(value, bool) and value is not None:
+                values.append(str(value))
+        text = " ".join(values).lower()
+        if all(any(v in text for v in variants) for variants in terms):
+            found.add(url)
+    conn.close()
+    return found
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "bench.db")
+    os.environ["DATABASE_TYPE"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = path
+    from database import Database
+    db = Database().initialize()
+    start = time.perf_counter()
+    build_db(path, n)
+    print(f"Search over {n:,} listings ({path}); indexed while inserting in {time.perf_counter() - start:.1f}s")
+
+    failures = 0
+    for query in QUERIES:
+        start = time.perf_counter()
+        expected = scan(db, query)
+        scan_ms = (time.perf_counter() - start) * 1000
+        db.search_properties(query, limit=20)   # warm-up (statement cache)
+        start = time.perf_counter()
+        db.search_properties(query, limit=20)
+        search_ms = (time.perf_counter() - start) * 1000
+
+        found, after = [], None
+        while True:
+            rows, after = db.search_properties(query, fields=["url"], after=after, limit=100)
+            found.extend(row["url"] for row in rows)
+            if after is None:
+                break
+        identical = set(found) == expected and len(found) == len(expected)
+        failures += not identical
+        print(f"{query:<22} hits {len(expected):7,d}   scan {scan_ms:8.1f}ms   search {search_ms:6.1f}ms "
+              f"({scan_ms / search_ms:5.0f}x)  identical={identical}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Per-call overhead of the SQLite layer: fresh connection vs reused connection.
+
+Runs the same small Database calls twice on a synthetic DB:
+  - legacy: the previous _get_sqlite_connection (sqlite3.connect + PRAGMA
+    busy_timeout + PRAGMA journal_mode on every call, closed afterwards),
+    reproduced below and swapped in on the instance
+  - pooled: the current thread-local long-lived connection
+and prints µs per call for each.
+
+Usage:
+    python benchmark_sqlite_connections.py [N]
+N is the number of calls per read workload (default 5,000; writes use N/5).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import tempfile
+
+ROWS = 20_000
+CATEGORIES = ["jukyo", "tochi", "house", "mansion"]
+
+
+def legacy_get_sqlite_connection(self):
+    conn = sqlite3.connect(self.db_path, timeout=30.0)
+    try:
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.execute("PRAGMA journal_mode = WAL")
+    except sqlite3.Error as e:
+        print(f"⚠️  Failed to apply sqlite pragmas: {e}", flush=True)
+    return conn
+
+
+def build_db(path: str) -> None:
+    """Fill the schema created by Database.initialize() with synthetic rows."""
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    conn.executemany("""
+        INSERT INTO properties (url, category, category_type, category_name_ja, genre_name_ja,
+                                title, price, is_active, images, property_data)
+        VALUES (?, ?, '賃貸', '住居', '賃貸', ?, ?, ?, '[]', ?)
+    """, [(f"https://example.com/{i}", rng.choice(CATEGORIES), f"物件 {i}", f"{rng.randint(3, 20)}万円",
+           rng.random() < 0.9, json.dumps({"価格": "5万円", "所在地": "沖縄県那覇市"}))
+          for i in range(ROWS)])
+    conn.commit()
+    conn.close()
+
+
+def workloads(db, n: int):
+    rng = random.Random(1)
+    urls = [f"https://example.com/{rng.randrange(ROWS)}" for _ in range(n)]
+    categories = [rng.choice(CATEGORIES) for _ in range(n)]
+    return [
+        ("get_property_by_url", n, lambda: [db.get_property_by_url(u) for u in urls]),
+        ("get_data_version", n, lambda: [db.get_data_version() for _ in range(n)]),
+        ("get_properties_page(20)", n, lambda: [
+            db.get_properties_page(where={"is_active": True, "category": c},
+                                   fields=["url", "title", "price"], limit=20)
+            for c in categories]),
+        ("upsert_property", n // 5, lambda: [db.upsert_property({
+            "url": u, "category": "jukyo", "category_type": "賃貸", "category_name_ja": "住居",
+            "genre_name_ja": "賃貸", "title": "更新", "price": "6万円"}) for u in urls[:n // 5]]),
+    ]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    workdir = tempfile.mkdtemp(prefix="bench_sqlite_conn_")
+    path = os.path.join(workdir, "bench.db")
+
+    os.environ["DATABASE_TYPE"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = path
+    from database import Database
+    db = Database().initialize()
+    build_db(path)
+
+    print(f"SQLite per-call overhead ({ROWS:,} rows, {path})")
+    print(f"{'call':<26} {'calls':>6} {'legacy µs':>10} {'pooled µs':>10} {'speedup':>8}")
+    pooled_connection = db._get_sqlite_connection
+    for label, calls, run in workloads(db, n):
+        timings = {}
+        for mode in ("legacy", "pooled"):
+            db._get_sqlite_connection = (legacy_get_sqlite_connection.__get__(db) if mode == "legacy"
+                                         else pooled_connection)
+            run()   # warm-up (page cache, statement cache)
+            start = time.perf_counter()
+            run()
+            timings[mode] = (time.perf_counter() - start) / calls * 1e6
+        print(f"{label:<26} {calls:6d} {timings['legacy']:10.1f} {timings['pooled']:10.1f} "
+              f"{timings['legacy'] / timings['pooled']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
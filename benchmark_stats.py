@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Regression check + benchmark for the SQL-pushed SQLite statistics.
+
+1. Builds a synthetic SQLite DB (N active rows, default 25,000) with the
+   edge cases the JSON column really contains: numeric JSON values, empty
+   strings, "お問い合わせ", 家賃-only rentals, malformed JSON, '{}', NULL,
+   locations without 市町村 and whitespace-only locations, with non-ASCII keys
+   both escaped (json.dumps default, as upsert_property writes) and raw.
+2. get_price_statistics() / get_area_distribution() must return exactly
+   what the previous implementation (json.loads every row in Python,
+   reproduced below as the reference) returns.
+3. Times reference vs current (best of 3 runs).
+
+Usage:
+    python benchmark_stats.py [N]
+Exit code is 1 if any result differs.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import tempfile
+
+N_DEFAULT = 25_000
+
+CITIES = ["那覇市", "浦添市", "宜野湾市", "沖縄市", "うるま市", "名護市", "糸満市", "豊見城市",
+          "読谷村", "北谷町", "嘉手納町", "恩納村", "南風原町", "西原町", "八重瀬町", "宮古島市"]
+
+
+def _property_data(rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.01:
+        return "{not json"
+    if r < 0.02:
+        return "{}"
+    if r < 0.03:
+        return None
+    data = {}
+    p = rng.random()
+    if p < 0.40:
+        data["価格"] = f"{rng.randint(300, 9800):,}万円"
+    elif p < 0.70:
+        data["価格"] = ""
+        data["家賃"] = f"{rng.randint(25, 200) / 10}万円"
+    elif p < 0.75:
+        data["価格"] = rng.randint(500, 5000)           # numeric JSON value
+    elif p < 0.78:
+        data["価格"] = 0
+        data["price"] = f"{rng.randint(3000, 20000):,}円"
+    elif p < 0.85:
+        data["価格"] = "お問い合わせ"
+    elif p < 0.88:
+        data["価格"] = f"{rng.randint(1, 3)}億{rng.randint(0, 9) * 1000:,}万円"
+    l = rng.random()
+    if l < 0.80:
+        data["所在地"] = f"沖縄県{rng.choice(CITIES)}字{rng.randint(1, 300)}番地"
+    elif l < 0.85:
+        data["住所"] = f"{rng.choice(CITIES)} {rng.randint(1, 9)}丁目"
+    elif l < 0.88:
+        data["所在地"] = f"沖縄県 離島{rng.randint(1, 5)} 地区"
+    elif l < 0.90:
+        data["所在地"] = "   "
+    elif l < 0.92:
+        data["area"] = rng.randint(1, 3)
+    # upsert_property writes json.dumps() defaults (escaped non-ASCII keys); other
+    # writers store raw UTF-8, so both encodings occur in real databases
+    return json.dumps(data or {"備考": "x"}, ensure_ascii=rng.random() < 0.7)
+
+
+def build_db(path: str, n: int) -> None:
+    """Fill the schema created by Database.initialize() with synthetic rows."""
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    rows = [(f"https://example.com/{i}", rng.random() < 0.9, _property_data(rng)) for i in range(int(n / 0.9))]
+    conn.executemany("""
+        INSERT INTO properties (url, category, category_type, category_name_ja, genre_name_ja, is_active, property_data)
+        VALUES (?, 'jukyo', '賃貸', '住居', '賃貸', ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+# ---- reference: the previous implementation --------------------------------
+
+def reference_price_statistics(db) -> dict:
+    conn = sqlite3.connect(db.db_path)
+    cursor = conn.execute("""
+        SELECT property_data FROM properties
+        WHERE is_active = 1 AND property_data IS NOT NULL AND property_data != '{}'
+    """)
+    price_strs = []
+    for row in cursor.fetchall():
+        try:
+            price_strs.append(db._price_str_from_dict(json.loads(row[0])))
+        except (TypeError, json.JSONDecodeError):
+            continue
+    conn.close()
+    return db._calculate_stats(db._prices_man(price_strs))
+
+
+def reference_area_distribution(db) -> dict:
+    conn = sqlite3.connect(db.db_path)
+    area_counts = {}
+    for row in conn.execute("SELECT property_data FROM properties WHERE is_active = 1").fetchall():
+        if row[0]:
+            try:
+                data = json.loads(row[0])
+                if not isinstance(data, dict):
+                    continue
+                location = data.get("所在地") or data.get("住所") or data.get("location") or data.get("area")
+                if not location:
+                    continue
+                location = str(location).replace('沖縄県', '').strip()
+                match = re.search(r'([^市]+市|[^町]+町|[^村]+村)', location)
+                city = match.group(1) if match else location.split()[0]
+                if city:
+                    area_counts[city] = area_counts.get(city, 0) + 1
+            except:
+                pass
+    conn.close()
+    return dict(sorted(area_counts.items(), key=lambda x: x[1], reverse=True)[:10])
+
+
+def _timed(fn, *args, repeat: int = 3):
+    """(result, best wall time) — the first call also pays one-off warm-up
+    (pandas / NumPy code paths, SQLite page cache), so take the best of a few."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_DEFAULT
+    workdir = tempfile.mkdtemp(prefix="bench_stats_")
+    path = os.path.join(workdir, "bench.db")
+
+    os.environ["DATABASE_TYPE"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = path
+    from database import Database
+    db = Database().initialize()   # creates the schema incl. the stat expression indexes
+    build_db(path, n)
+
+    failures = 0
+    print(f"Statistics over {n:,} active rows ({path})")
+    for label, reference, current in (
+        ("price_statistics", reference_price_statistics, db.get_price_statistics),
+        ("area_distribution", reference_area_distribution, db.get_area_distribution),
+    ):
+        expected, ref_s = _timed(reference, db)
+        actual, cur_s = _timed(current)
+        same = expected == actual and list(expected) == list(actual)
+        failures += not same
+        print(f"{label:<20} reference {ref_s * 1000:8.1f}ms   sql {cur_s * 1000:8.1f}ms   "
+              f"({ref_s / cur_s:4.1f}x)  identical={same}")
+        if not same:
+            print(f"  expected {expected}\n  actual   {actual}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
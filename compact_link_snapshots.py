@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""One-off: convert legacy JSON link snapshots to compact url_ids.
+
+Safe to re-run; rows that already have url_ids are skipped. New snapshots
+are written compact by save_link_snapshot, so this only shrinks history.
+Supabase requires supabase_link_ids_migration.sql to be applied first.
+"""
+
+from database import db
+
+
+def main():
+    print(f"Compacting link snapshots ({db.db_type})...")
+    converted = db.compact_link_snapshots()
+    print(f"✅ Converted {converted} snapshot(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@
 """
 
 import os
-from typing import Dict
+from typing import Dict, List
 
 
 class Config:
@@ -48,6 +48,15 @@ class Config:
     # churn that occasionally leaks Chromium processes (B-009).
     MAX_BROWSER_USES: int = int(os.getenv("SCRAPER_MAX_BROWSER_USES", "200"))
     
+    # =====================================================
+    # 部分収集ガード設定
+    # =====================================================
+    # 収集件数が検出総件数をこの割合以上下回ったら、売約候補をHTTPで確認してから非アクティブ化
+    COLLECTION_SHORTFALL_TOLERANCE: float = float(os.getenv("SCRAPER_SHORTFALL_TOLERANCE", "0.02"))
+    MAX_GAP_REFETCH_TIME: int = int(os.getenv("SCRAPER_GAP_REFETCH_TIME", "300"))  # 欠落ページ再取得の上限秒数
+    SOLD_VERIFY_WORKERS: int = int(os.getenv("SCRAPER_SOLD_VERIFY_WORKERS", "8"))
+    SOLD_VERIFY_TIMEOUT: int = int(os.getenv("SCRAPER_SOLD_VERIFY_TIMEOUT", "10"))
+    
     # =====================================================
     # カテゴリー設定
     # =====================================================
@@ -94,15 +103,34 @@ class Config:
     # =====================================================
     DATABASE_TYPE: str = os.getenv("DATABASE_TYPE", "supabase")
     SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "output/properties.db")
+    SQLITE_CACHE_SIZE_MB: int = int(os.getenv("SQLITE_CACHE_SIZE_MB", "32"))  # 接続ごとのページキャッシュ
+    SQLITE_MMAP_SIZE_MB: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))  # 読み込みのメモリマップ（プロセス間で共有）
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # WAL では NORMAL でも破損しない
+    SQLITE_IDLE_CONNECTIONS: int = int(os.getenv("SQLITE_IDLE_CONNECTIONS", "2"))  # スレッドごとに保持する接続数
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY", "")
     
+    # =====================================================
+    # エクスポート設定
+    # =====================================================
+    EXPORT_FORMAT: str = os.getenv("EXPORT_FORMAT", "csv")  # csv / parquet / both
+    PARQUET_EXPORT_DIR: str = os.getenv("PARQUET_EXPORT_DIR", os.path.join(OUTPUT_DIR, "parquet"))
+    
     # =====================================================
     # APIサーバー設定
     # =====================================================
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "5000"))
-    API_DEBUG: bool = os.getenv("API_DEBUG", "true").lower() == "true"
+    API_DEBUG: bool = os.getenv("API_DEBUG", "false").lower() == "true"  # 開発時のみ true（0.0.0.0 でデバッガを公開しない）
+    API_WORKERS: int = int(os.getenv("API_WORKERS", str(min(4, (os.cpu_count() or 1) + 1))))  # gunicorn のプロセス数
+    API_THREADS: int = int(os.getenv("API_THREADS", "8"))  # プロセスあたりの要求スレッド数
+    API_QUERY_WORKERS: int = int(os.getenv("API_QUERY_WORKERS", "8"))  # 1 要求内の独立したクエリを並行実行するスレッド数
+    API_CACHE_ENABLED: bool = os.getenv("API_CACHE_ENABLED", "true").lower() == "true"
+    API_CACHE_MAX_BYTES: int = int(os.getenv("API_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))  # 応答本体の合計上限
+    API_CACHE_VERSION_TTL: float = float(os.getenv("API_CACHE_VERSION_TTL", "5"))  # データバージョンを読み直す間隔（秒）
+    API_CACHE_WARM_PATHS: List[str] = [p for p in os.getenv(
+        "API_CACHE_WARM_PATHS", "/api/stats,/api/stats/advanced,/api/properties/diff").split(",") if p]  # 起動時・更新後に作り直す
+    API_CACHE_WARM_HOT_KEYS: int = int(os.getenv("API_CACHE_WARM_HOT_KEYS", "20"))  # 加えて作り直す要求の多いキーの数
     
     # =====================================================
     # ログ設定
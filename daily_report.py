@@ -15,11 +15,11 @@ Disappearance classification:
 """
 from __future__ import annotations
 
-import re
 from datetime import date, datetime
 from typing import Iterable
 
 from notify_failure import send
+from property_normalize import parse_price_yen
 
 # Category metadata: emoji + display order priority (higher = first)
 # Order shown in the per-category breakdown is by activity volume; this
@@ -36,37 +36,6 @@ CATEGORY_META = {
 }
 
 
-def _parse_price_yen(price_str: str | None) -> float | None:
-    """Convert e-uchina.net price strings ("3,200万円", "1億2,000万円") to yen.
-
-    Returns None if the string can't be parsed — those rows fall to the
-    bottom of the sort instead of crashing the report.
-    """
-    if not price_str or not isinstance(price_str, str):
-        return None
-    s = price_str.replace(",", "").replace(" ", "")
-    total = 0.0
-    matched = False
-
-    m = re.search(r"(\d+(?:\.\d+)?)億", s)
-    if m:
-        total += float(m.group(1)) * 100_000_000
-        matched = True
-
-    m = re.search(r"(\d+(?:\.\d+)?)万", s)
-    if m:
-        total += float(m.group(1)) * 10_000
-        matched = True
-
-    if not matched:
-        m = re.search(r"(\d+(?:\.\d+)?)", s)
-        if m:
-            return float(m.group(1))
-        return None
-
-    return total
-
-
 def _format_yen(yen: float | None) -> str:
     if yen is None or yen <= 0:
         return "価格不明"
@@ -250,7 +219,7 @@ def send_daily_report(
                 "title": p.get("title"),
                 "category": cat,
                 "price_raw": p.get("price"),
-                "price_yen": _parse_price_yen(p.get("price")),
+                "price_yen": parse_price_yen(p.get("price")),
             })
         elif klass == "掲載終了":
             total_expired += 1
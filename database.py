@@ -4,35 +4,349 @@ SQLiteとSupabaseの両方に対応したデータベース操作
 """
 
 import os
+import re
+import html
 import json
+import zlib
+import base64
 import sqlite3
-from datetime import datetime, date
-from typing import List, Dict, Optional, Any, Tuple, Union
+import threading
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Any, Tuple, Union, Iterator
+import numpy as np
 from dotenv import load_dotenv
 
+from config import config
+from property_normalize import (
+    TYPED_COLUMNS, TYPED_COLUMN_NAMES, PRICE_BANDS,
+    typed_fields, price_band, parse_price_yen, parse_price_yen_batch,
+)
+from facet_index import FacetIndex
+
 load_dotenv()
 
 DATABASE_TYPE: str = os.getenv("DATABASE_TYPE", "supabase")  # "sqlite" or "supabase"
 SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "output/properties.db")
 
+# updated_at tracks content changes only: the daily last_seen_date touch from
+# reconcile_links (and no-op re-activation) must not move export watermarks.
+PROPERTY_CONTENT_COLUMNS: Tuple[str, ...] = (
+    "url", "category", "category_type", "category_name_ja", "genre_name_ja",
+    "title", "price", "favorites", "update_date", "expiry_date", "images",
+    "company_name", "property_data", "is_active",
+)
+SQLITE_UPDATED_AT_TRIGGER: str = """
+CREATE TRIGGER update_properties_updated_at
+  AFTER UPDATE ON properties
+  FOR EACH ROW
+  WHEN NEW.updated_at IS OLD.updated_at AND ({changed})
+BEGIN
+  UPDATE properties SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+""".format(changed=" OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in PROPERTY_CONTENT_COLUMNS))
+
+# Statistics read these JSON fields with the same "first truthy key" rule as
+# the old Python code (`data.get(a) or data.get(b) or ...`). The expressions
+# are indexed together with is_active (see _upgrade_sqlite_schema), and
+# queries must use the identical text for SQLite to pick the index.
+# upsert_property stores json.dumps() output, i.e. non-ASCII keys as \uXXXX
+# escapes, and SQLite matches JSON path keys against the raw key text, so
+# each key is looked up both as written and escaped.
+def _first_truthy_json_sql(*keys: str) -> str:
+    paths = []
+    for key in keys:
+        escaped = json.dumps(key)[1:-1]
+        paths.extend([key] if escaped == key else [key, escaped])
+    parts = ", ".join(f"NULLIF(NULLIF(json_extract(property_data, '$.\"{k}\"'), ''), 0)" for k in paths)
+    return f"(CASE WHEN json_valid(property_data) THEN COALESCE({parts}) END)"
+
+
+STAT_PRICE_SQL: str = _first_truthy_json_sql("価格", "家賃", "price")
+STAT_LOCATION_SQL: str = _first_truthy_json_sql("所在地", "住所", "location", "area")
+CITY_RE = re.compile(r'([^市]+市|[^町]+町|[^村]+村)')
+
+# get_price_statistics with no priced rows (all backends).
+EMPTY_PRICE_STATS: Dict[str, Any] = {
+    "average": 0, "median": 0, "min": 0, "max": 0, "count": 0, "percentile25": 0, "percentile75": 0,
+}
+
+# Summary tables (stats_members / stats_counts). Each row of `properties`
+# contributes one key per dimension it has; stats_counts holds the number of
+# rows per (dimension, key). new_on / sold_on keys are "YYYY-MM-DD|category"
+# (first_seen_date of active rows / last_seen_date of inactive rows);
+# category_label keys are "category|genre_name_ja|category_type" as stored
+# on the rows, so by_category reports the same names as the live statistics.
+SUMMARY_DIMENSIONS: Tuple[str, ...] = (
+    "category", "category_type", "category_label", "city", "price_band", "price_man", "new_on", "sold_on",
+)
+SUMMARY_SOURCE_FIELDS: List[str] = [
+    "url", "category", "category_type", "genre_name_ja", "is_active", "first_seen_date", "last_seen_date",
+    "price_yen", "rent_yen", "property_data",
+]
+SUMMARY_TABLES_SQL: str = """
+    CREATE TABLE IF NOT EXISTS stats_members (
+        url TEXT PRIMARY KEY,
+        category TEXT,
+        category_type TEXT,
+        category_label TEXT,
+        city TEXT,
+        price_band TEXT,
+        price_man TEXT,
+        new_on TEXT,
+        sold_on TEXT
+    );
+    CREATE TABLE IF NOT EXISTS stats_counts (
+        dimension TEXT NOT NULL,
+        key TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (dimension, key)
+    );
+"""
+
+# Single-row counter bumped after every batch of writes (scrape run, rebuild,
+# backfill, import); the API keys its response cache on it
+DATA_VERSION_SQL: str = """
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        bumped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 1);
+"""
+
+# Facet index (facet_index.FacetIndex) of the active listings, stored as a
+# single blob and rebuilt after each scrape run (Database.rebuild_facet_index)
+FACET_INDEX_SQL: str = """
+    CREATE TABLE IF NOT EXISTS facet_index (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        data BLOB NOT NULL,
+        property_count INTEGER NOT NULL,
+        built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+FACET_SOURCE_FIELDS: List[str] = ["category", "category_type", "layout", "price_yen", "rent_yen", "property_data"]
+# ペット: sales-dashboard の featured/pet-friendly と同じ判定（「可」「相談」「小型」を含み、「不可」ではない）
+PET_OK_RE = re.compile(r"可|相談|小型")
+# 駐車場: 値があって「なし」「無し」「不可」などでなければあり（「無料」はあり）
+PARKING_NONE_RE = re.compile(r"なし|無し|不可|^\s*(無|-|－|ー)?\s*$")
+
+# Full-text search (Database.search_properties) over every listing, sold ones
+# included. The trigram tokenizer indexes each 3-character substring, so
+# Japanese text needs no word segmentation; shorter terms ("北谷", "2K")
+# match no trigram and are filtered with LIKE instead. `details` holds the
+# category names and every scalar value of property_data. The triggers keep
+# the index in step with every write path (upsert, bulk import, deletes);
+# the last_seen_date touch from reconcile_links does not re-index.
+SEARCH_COLUMNS: Tuple[str, ...] = ("title", "company_name", "location", "details")
+SEARCH_BM25_WEIGHTS: Tuple[float, ...] = (10.0, 2.0, 5.0, 1.0)
+SEARCH_MIN_INDEXED_CHARS: int = 3
+
+
+def _search_document_sql(row: str) -> str:
+    """SEARCH_COLUMNS values of one properties row (`row` = "NEW." / "OLD." / "")."""
+    data = f"{row}property_data"
+    details = (f"(CASE WHEN json_valid({data}) THEN (SELECT group_concat(value, ' ') FROM json_tree({data}) "
+               f"WHERE type IN ('text', 'integer', 'real')) END)")
+    return ", ".join((
+        f"{row}title",
+        f"{row}company_name",
+        STAT_LOCATION_SQL.replace("property_data", data),
+        f"trim(COALESCE({row}category_name_ja, '') || ' ' || COALESCE({row}genre_name_ja, '') "
+        f"|| ' ' || COALESCE({details}, ''))",
+    ))
+
+
+SEARCH_FTS_SQL: str = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS properties_fts USING fts5(
+        {columns}, tokenize = 'trigram'
+    );
+    CREATE TRIGGER IF NOT EXISTS properties_fts_insert AFTER INSERT ON properties BEGIN
+        INSERT INTO properties_fts (rowid, {columns}) VALUES (NEW.rowid, {new_document});
+    END;
+    CREATE TRIGGER IF NOT EXISTS properties_fts_update AFTER UPDATE ON properties
+    WHEN NEW.title IS NOT OLD.title OR NEW.company_name IS NOT OLD.company_name
+      OR NEW.property_data IS NOT OLD.property_data OR NEW.category_name_ja IS NOT OLD.category_name_ja
+      OR NEW.genre_name_ja IS NOT OLD.genre_name_ja OR NEW.rowid IS NOT OLD.rowid
+    BEGIN
+        DELETE FROM properties_fts WHERE rowid = OLD.rowid;
+        INSERT INTO properties_fts (rowid, {columns}) VALUES (NEW.rowid, {new_document});
+    END;
+    CREATE TRIGGER IF NOT EXISTS properties_fts_delete AFTER DELETE ON properties BEGIN
+        DELETE FROM properties_fts WHERE rowid = OLD.rowid;
+    END;
+""".format(columns=", ".join(SEARCH_COLUMNS), new_document=_search_document_sql("NEW."))
+SEARCH_FTS_BACKFILL_SQL: str = (f"INSERT INTO properties_fts (rowid, {', '.join(SEARCH_COLUMNS)}) "
+                                f"SELECT rowid, {_search_document_sql('')} FROM properties")
+
+# Snippet highlight placeholders (private-use code points), turned into
+# <mark> after the excerpt is HTML-escaped
+_MARK_OPEN, _MARK_CLOSE = "\ue000", "\ue001"
+_HALF_TO_FULL = str.maketrans({chr(c): chr(c + 0xFEE0) for c in range(0x21, 0x7F)})
+# Full-width katakana (decomposed: ガ = カ + U+3099) -> half-width, the inverse of NFKC
+_FULL_TO_HALF_KANA = {unicodedata.normalize("NFKC", chr(c)): chr(c) for c in range(0xFF61, 0xFFA0)}
+
+
+def _half_width_kana(text: str) -> str:
+    return "".join(
+        "".join(_FULL_TO_HALF_KANA[c] for c in decomposed)
+        if all(c in _FULL_TO_HALF_KANA for c in decomposed) else ch
+        for ch in text for decomposed in [unicodedata.normalize("NFD", ch)]
+    )
+
+
+def _search_term_variants(term: str) -> List[str]:
+    """Spellings a term should match: as typed, NFKC (半角 ASCII, 全角カナ),
+    full-width ASCII and half-width katakana."""
+    nfkc = unicodedata.normalize("NFKC", term)
+    return list(dict.fromkeys((term, nfkc, nfkc.translate(_HALF_TO_FULL), _half_width_kana(nfkc))))
+
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _contains_sql(column: str, term: str) -> Tuple[str, str]:
+    """(SQL, param) for "term occurs in column", evaluated row by row.
+
+    instr() is cheaper than LIKE; LIKE is only needed for its ASCII case
+    folding. The unary + keeps FTS5 from taking the LIKE as an index
+    constraint (the trigram index cannot answer patterns under 3 characters).
+    """
+    if re.search(r"[A-Za-z]", term):
+        return f"+{column} LIKE ? ESCAPE '\\'", _like_pattern(term)
+    return f"instr({column}, ?) > 0", term
+
+
+def _highlight(text: str, terms: List[str]) -> str:
+    if not terms:
+        return text
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    return pattern.sub(lambda m: _MARK_OPEN + m.group(0) + _MARK_CLOSE, text)
+
+
+def _excerpt(texts: List[Optional[str]], terms: List[str], width: int) -> str:
+    """Text around the first hit, from the first of texts that has one."""
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    for text in texts:
+        match = pattern.search(text or "")
+        if match:
+            start, end = max(0, match.start() - width), min(len(text), match.end() + width)
+            return ("…" if start else "") + _highlight(text[start:end], terms) + ("…" if end < len(text) else "")
+    text = next((t for t in texts if t), "")
+    return text[:2 * width] + ("…" if len(text) > 2 * width else "")
+
+
+def _render_snippet(snippet: str) -> str:
+    return html.escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+# Compact snapshot format: 1 version byte + zlib(uint32 LE deltas of sorted ids)
+URL_IDS_FORMAT_VERSION: bytes = b"\x01"
+
+
+class _PooledSQLiteConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its thread's idle list.
+
+    Call sites keep the `conn = self._get_sqlite_connection() ... finally:
+    conn.close()` shape. close() ends the scope the way a real close did
+    (uncommitted changes are rolled back, row_factory is reset) but keeps
+    the connection with its page cache and prepared statements for the next
+    call on the same thread.
+    """
+    _idle: Optional[list] = None
+
+    def close(self):
+        idle = self._idle
+        if idle is None or len(idle) >= config.SQLITE_IDLE_CONNECTIONS:
+            self.close_for_real()
+            return
+        if any(c is self for c in idle):
+            return
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = None
+        except sqlite3.Error:
+            self.close_for_real()
+            return
+        idle.append(self)
+
+    def close_for_real(self):
+        self._idle = None
+        super().close()
+
+
+def sorted_url_ids(ids) -> np.ndarray:
+    """Sorted, de-duplicated int64 array of listing_urls ids."""
+    return np.unique(np.fromiter(ids, dtype=np.int64))
+
+
+def encode_url_ids(ids) -> bytes:
+    """Encode listing_urls ids as a sorted, delta-encoded, zlib-compressed blob.
+
+    Ids handed out by listing_urls are dense, so consecutive deltas are mostly
+    tiny and compress to well under a byte each.
+    """
+    arr = sorted_url_ids(ids)
+    deltas = np.diff(arr, prepend=0).astype("<u4")
+    return URL_IDS_FORMAT_VERSION + zlib.compress(deltas.tobytes(), 9)
+
+
+def decode_url_ids(blob: bytes) -> np.ndarray:
+    """Inverse of encode_url_ids: returns the sorted int64 id array."""
+    blob = bytes(blob)
+    if blob[:1] != URL_IDS_FORMAT_VERSION:
+        raise ValueError(f"Unknown url_ids format: {blob[:1]!r}")
+    deltas = np.frombuffer(zlib.decompress(blob[1:]), dtype="<u4")
+    return np.cumsum(deltas, dtype=np.int64)
+
 
 class Database:
-    """Database abstraction layer"""
+    """Database abstraction layer
+
+    Creating an instance is cheap: the backend (Supabase client / SQLite
+    schema migration) is set up on first use, so scripts that import `db`
+    but exit early (--help, argument errors, nothing to retry) never pay for
+    it, and a missing SUPABASE_URL only fails the code paths that need it.
+    """
     
     def __init__(self):
         self.db_type = DATABASE_TYPE
+        if self.db_type not in ("sqlite", "supabase"):
+            raise ValueError(f"Unknown DATABASE_TYPE: {self.db_type}")
+        self._ready = False
+        self._init_lock = threading.Lock()
         
         if self.db_type == "sqlite":
-            self._init_sqlite()
-        elif self.db_type == "supabase":
-            self._init_supabase()
+            self.db_path = SQLITE_DB_PATH
+            self._sqlite_local = threading.local()
         else:
-            raise ValueError(f"Unknown DATABASE_TYPE: {self.db_type}")
+            self._supabase = None
+            # Cleared on the first upsert that fails because supabase_typed_columns_migration.sql is missing
+            self._supabase_typed_columns = True
+    
+    def initialize(self) -> "Database":
+        """Set up the backend now instead of on first use (idempotent, thread-safe)."""
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    if self.db_type == "sqlite":
+                        self._init_sqlite()
+                    else:
+                        self._init_supabase()
+                    self._ready = True
+        return self
+    
+    @property
+    def supabase(self):
+        """Supabase client, created on first access."""
+        if not self._ready:
+            self.initialize()
+        return self._supabase
     
     def _init_sqlite(self):
         """Initialize SQLite database"""
-        self.db_path = SQLITE_DB_PATH
-        
         # Create database directory if not exists
         os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else ".", exist_ok=True)
         
@@ -40,10 +354,11 @@ class Database:
         if not os.path.exists(self.db_path):
             print(f"Creating SQLite database: {self.db_path}")
             self._run_sqlite_migration()
+        self._upgrade_sqlite_schema()
     
     def _init_supabase(self):
         """Initialize Supabase client"""
-        from supabase import create_client, Client
+        from supabase import create_client
         
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_ANON_KEY")  # Usually acceptable for client ops, but strict RLS might need service role
@@ -51,7 +366,7 @@ class Database:
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in .env")
         
-        self.supabase: Client = create_client(url, key)
+        self._supabase = create_client(url, key)
     
     def _run_sqlite_migration(self):
         """Run SQLite migration script"""
@@ -80,6 +395,12 @@ class Database:
                 is_active INTEGER DEFAULT 1,
                 first_seen_date TEXT,
                 last_seen_date TEXT,
+                price_yen REAL,
+                rent_yen REAL,
+                land_m2 REAL,
+                floor_m2 REAL,
+                layout TEXT,
+                built_year INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
@@ -89,11 +410,17 @@ class Database:
                 snapshot_date TEXT NOT NULL,
                 category TEXT NOT NULL,
                 urls TEXT NOT NULL,
+                url_ids BLOB,
                 url_count INTEGER DEFAULT 0,
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(snapshot_date, category)
             );
 
+            CREATE TABLE IF NOT EXISTS listing_urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE
+            );
+
             CREATE INDEX IF NOT EXISTS idx_properties_url ON properties(url);
             CREATE INDEX IF NOT EXISTS idx_properties_category ON properties(category);
             CREATE INDEX IF NOT EXISTS idx_properties_is_active ON properties(is_active);
@@ -108,27 +435,129 @@ class Database:
         conn.close()
         print("SQLite migration completed")
     
+    def _upgrade_sqlite_schema(self):
+        """Apply additive schema changes to databases created by older versions.
+
+        The migration script only runs for brand-new files, so anything added
+        later (tables, columns) is created here idempotently.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS listing_urls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL UNIQUE
+                )
+            """)
+            snapshot_cols = {row[1] for row in conn.execute("PRAGMA table_info(daily_link_snapshots)")}
+            if snapshot_cols and "url_ids" not in snapshot_cols:
+                conn.execute("ALTER TABLE daily_link_snapshots ADD COLUMN url_ids BLOB")
+            trigger = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'update_properties_updated_at'"
+            ).fetchone()
+            if not trigger or "WHEN" not in trigger[0]:
+                conn.execute("DROP TRIGGER IF EXISTS update_properties_updated_at")
+                conn.execute(SQLITE_UPDATED_AT_TRIGGER)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_properties_updated_at ON properties(updated_at)")
+            property_cols = {row[1] for row in conn.execute("PRAGMA table_info(properties)")}
+            for col, col_type in TYPED_COLUMNS:
+                if col not in property_cols:
+                    conn.execute(f"ALTER TABLE properties ADD COLUMN {col} {col_type}")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_properties_{col} ON properties(category, {col})")
+            for name, expr in (("idx_properties_stat_price", STAT_PRICE_SQL),
+                               ("idx_properties_stat_location", STAT_LOCATION_SQL)):
+                index = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+                if index and "\\u" not in index[0]:
+                    # First version did not look up \uXXXX-escaped keys
+                    conn.execute(f"DROP INDEX {name}")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON properties(is_active, {expr})")
+            conn.executescript(SUMMARY_TABLES_SQL)
+            member_cols = {row[1] for row in conn.execute("PRAGMA table_info(stats_members)")}
+            if "category_label" not in member_cols:
+                # Tables built before category_label: not "built" (SUMMARY_BUILT_KEY) until rebuilt
+                conn.execute("ALTER TABLE stats_members ADD COLUMN category_label TEXT")
+            conn.executescript(DATA_VERSION_SQL)
+            conn.executescript(FACET_INDEX_SQL)
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'properties_fts'"
+            ).fetchone()
+            conn.executescript(SEARCH_FTS_SQL)
+            if not has_fts:
+                # Index the listings written before the search triggers existed
+                conn.execute(SEARCH_FTS_BACKFILL_SQL)
+            conn.commit()
+        finally:
+            conn.close()
+
     def _get_sqlite_connection(self):
-        """Get SQLite connection with a generous lock-wait window.
+        """Get this thread's SQLite connection (long-lived, see _PooledSQLiteConnection).
+
+        A connection is opened and configured once per thread; close() returns
+        it for reuse, so repeated small queries skip connect + PRAGMAs and keep
+        SQLite's page cache and the prepared-statement cache warm. A call made
+        while the thread's connection is checked out (nested use) gets a second
+        one. Connections never cross threads or a fork.
 
         Without busy_timeout, concurrent writers that hit a transient lock get
         an immediate `database is locked` error (B-004). 30s gives room for
         normal workloads to retry inside SQLite itself.
         """
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        if not self._ready:
+            self.initialize()
+        local = self._sqlite_local
+        if getattr(local, "pid", None) != os.getpid():
+            # New thread, or inherited across fork (never reuse a parent's handle)
+            local.idle = []
+            local.pid = os.getpid()
+        if local.idle:
+            return local.idle.pop()
+
+        conn = sqlite3.connect(self.db_path, timeout=30.0, factory=_PooledSQLiteConnection,
+                               cached_statements=256)
         try:
             conn.execute("PRAGMA busy_timeout = 30000")
             conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}")
+            conn.execute(f"PRAGMA cache_size = -{config.SQLITE_CACHE_SIZE_MB * 1024}")
+            conn.execute(f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+            conn.execute("PRAGMA temp_store = MEMORY")
         except sqlite3.Error as e:
             print(f"⚠️  Failed to apply sqlite pragmas: {e}", flush=True)
+        conn._idle = local.idle
         return conn
+
+    @contextmanager
+    def _sqlite_transaction(self):
+        """Explicit write transaction: BEGIN IMMEDIATE ... COMMIT, ROLLBACK on error.
+
+        IMMEDIATE takes the write lock up front, so a read-then-write body
+        waits in busy_timeout instead of failing on a lock upgrade.
+        """
+        conn = self._get_sqlite_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
     
     # ================================================================
     # UPSERT PROPERTY
     # ================================================================
     
+    @staticmethod
+    def _with_typed_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill price_yen / rent_yen / ... when the caller did not (transform_to_db_format does)."""
+        if all(col in data for col in TYPED_COLUMN_NAMES):
+            return data
+        return {**data, **typed_fields(data.get("category"), data.get("price"), data.get("property_data"))}
+
     def upsert_property(self, property_data: Dict[str, Any]) -> bool:
         """Insert or update property"""
+        property_data = self._with_typed_fields(property_data)
         if self.db_type == "sqlite":
             return self._upsert_property_sqlite(property_data)
         else:
@@ -136,48 +565,48 @@ class Database:
     
     def _upsert_property_sqlite(self, data: Dict[str, Any]) -> bool:
         """SQLite implementation of upsert_property"""
-        conn = self._get_sqlite_connection()
-        cursor = conn.cursor()
-        
         try:
             images_json = json.dumps(data.get("images", []))
             property_data_json = json.dumps(data.get("property_data", {}))
             
-            cursor.execute("""
-                INSERT INTO properties (
-                    url, category, category_type, category_name_ja, genre_name_ja,
-                    title, price, favorites, update_date, expiry_date,
-                    images, company_name, property_data,
-                    is_active, first_seen_date, last_seen_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(url) DO UPDATE SET
-                    title = excluded.title,
-                    price = excluded.price,
-                    favorites = excluded.favorites,
-                    update_date = excluded.update_date,
-                    expiry_date = excluded.expiry_date,
-                    images = excluded.images,
-                    company_name = excluded.company_name,
-                    property_data = excluded.property_data,
-                    last_seen_date = excluded.last_seen_date,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (
-                data["url"], data["category"], data["category_type"],
-                data["category_name_ja"], data["genre_name_ja"],
-                data.get("title"), data.get("price"), data.get("favorites", 0),
-                data.get("update_date"), data.get("expiry_date"),
-                images_json, data.get("company_name"), property_data_json,
-                1, date.today().isoformat(), date.today().isoformat()
-            ))
-            
-            conn.commit()
+            with self._sqlite_transaction() as conn:
+                conn.execute("""
+                    INSERT INTO properties (
+                        url, category, category_type, category_name_ja, genre_name_ja,
+                        title, price, favorites, update_date, expiry_date,
+                        images, company_name, property_data,
+                        is_active, first_seen_date, last_seen_date,
+                        price_yen, rent_yen, land_m2, floor_m2, layout, built_year
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        title = excluded.title,
+                        price = excluded.price,
+                        favorites = excluded.favorites,
+                        update_date = excluded.update_date,
+                        expiry_date = excluded.expiry_date,
+                        images = excluded.images,
+                        company_name = excluded.company_name,
+                        property_data = excluded.property_data,
+                        last_seen_date = excluded.last_seen_date,
+                        price_yen = excluded.price_yen,
+                        rent_yen = excluded.rent_yen,
+                        land_m2 = excluded.land_m2,
+                        floor_m2 = excluded.floor_m2,
+                        layout = excluded.layout,
+                        built_year = excluded.built_year
+                """, (
+                    data["url"], data["category"], data["category_type"],
+                    data["category_name_ja"], data["genre_name_ja"],
+                    data.get("title"), data.get("price"), data.get("favorites", 0),
+                    data.get("update_date"), data.get("expiry_date"),
+                    images_json, data.get("company_name"), property_data_json,
+                    1, date.today().isoformat(), date.today().isoformat(),
+                    *(data.get(col) for col in TYPED_COLUMN_NAMES)
+                ))
             return True
         except Exception as e:
             print(f"Error upserting property: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
     
     def _upsert_property_supabase(self, data: Dict[str, Any]) -> bool:
         """Supabase implementation of upsert_property"""
@@ -230,16 +659,108 @@ class Database:
                 if "first_seen_date" not in payload:
                     payload["first_seen_date"] = date.today().isoformat()
             
-            self.supabase.table("properties").upsert(payload, on_conflict="url").execute()
+            if not self._supabase_typed_columns:
+                payload = {k: v for k, v in payload.items() if k not in TYPED_COLUMN_NAMES}
+            try:
+                self.supabase.table("properties").upsert(payload, on_conflict="url").execute()
+            except Exception as e:
+                if not self._supabase_typed_columns or not any(col in str(e) for col in TYPED_COLUMN_NAMES):
+                    raise
+                # supabase_typed_columns_migration.sql not applied yet: write without typed columns
+                print(f"⚠️  Typed columns unavailable, upserting without them: {e}")
+                self._supabase_typed_columns = False
+                payload = {k: v for k, v in payload.items() if k not in TYPED_COLUMN_NAMES}
+                self.supabase.table("properties").upsert(payload, on_conflict="url").execute()
             return True
         except Exception as e:
             print(f"Error upserting property to Supabase: {e}")
             return False
     
+    # ================================================================
+    # TYPED COLUMNS
+    # ================================================================
+    #
+    # price_yen / rent_yen / land_m2 / floor_m2 / layout / built_year are
+    # derived from price + property_data (property_normalize.typed_fields) at
+    # write time. They are not content columns: rewriting them leaves
+    # updated_at alone, so a backfill does not show up in Parquet deltas.
+
+    TYPED_BACKFILL_BATCH_SIZE: int = 1000
+
+    def backfill_typed_columns(self, batch_size: Optional[int] = None) -> int:
+        """Recompute typed columns for every row (active and inactive). Returns rows processed."""
+        batch_size = batch_size or self.TYPED_BACKFILL_BATCH_SIZE
+        if self.db_type == "sqlite":
+            return self._backfill_typed_columns_sqlite(batch_size)
+        else:
+            return self._backfill_typed_columns_supabase(batch_size)
+
+    def _backfill_typed_columns_sqlite(self, batch_size: int) -> int:
+        conn = self._get_sqlite_connection()
+        total = 0
+        last_rowid = 0
+        set_clause = ", ".join(f"{col} = ?" for col in TYPED_COLUMN_NAMES)
+        try:
+            while True:
+                rows = conn.execute("""
+                    SELECT rowid, category, price, property_data FROM properties
+                    WHERE rowid > ? ORDER BY rowid LIMIT ?
+                """, (last_rowid, batch_size)).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for rowid, category, price, property_data in rows:
+                    try:
+                        data = json.loads(property_data) if property_data else {}
+                    except json.JSONDecodeError:
+                        data = {}
+                    typed = typed_fields(category, price, data)
+                    updates.append((*(typed[col] for col in TYPED_COLUMN_NAMES), rowid))
+                conn.executemany(f"UPDATE properties SET {set_clause} WHERE rowid = ?", updates)
+                conn.commit()
+                total += len(rows)
+                last_rowid = rows[-1][0]
+                print(f"  Backfilled {total} rows...", flush=True)
+            return total
+        finally:
+            conn.close()
+
+    def _backfill_typed_columns_supabase(self, batch_size: int) -> int:
+        # upsert on url with only url/category + typed columns: PostgREST
+        # merges the given columns into existing rows and leaves the rest as is
+        total = 0
+        last_id = None
+        while True:
+            query = self.supabase.table("properties").select("id, url, category, price, property_data")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(batch_size).execute().data or []
+            if not rows:
+                break
+            payload = [
+                {"url": row["url"], "category": row["category"],
+                 **typed_fields(row["category"], row.get("price"), row.get("property_data"))}
+                for row in rows
+            ]
+            self.supabase.table("properties").upsert(payload, on_conflict="url").execute()
+            total += len(rows)
+            last_id = rows[-1]["id"]
+            print(f"  Backfilled {total} rows...", flush=True)
+            if len(rows) < batch_size:
+                break
+        return total
+
     # ================================================================
     # LINK SNAPSHOTS
     # ================================================================
-    
+    #
+    # Snapshots are stored as compressed arrays of listing_urls ids (see
+    # encode_url_ids) rather than a JSON array of URLs. `urls` is kept for
+    # schema compatibility and written as '[]' for compact rows; rows saved
+    # before the change still carry their JSON list and are read as before.
+
+    SNAPSHOT_INTERN_BATCH_SIZE: int = 5000
+
     def save_link_snapshot(self, category: str, urls: List[str]) -> bool:
         """Save daily link snapshot"""
         if self.db_type == "sqlite":
@@ -247,6 +768,44 @@ class Database:
         else:
             return self._save_link_snapshot_supabase(category, urls)
     
+    def _intern_urls_sqlite(self, conn, urls: List[str]) -> Dict[str, int]:
+        """Assign stable ids to URLs in listing_urls and return {url: id}."""
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT OR IGNORE INTO listing_urls (url) VALUES (?)",
+            ((u,) for u in urls),
+        )
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS intern_urls (url TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM intern_urls")
+        cursor.executemany(
+            "INSERT OR IGNORE INTO intern_urls (url) VALUES (?)",
+            ((u,) for u in urls),
+        )
+        cursor.execute("""
+            SELECT l.url, l.id FROM listing_urls l
+            JOIN intern_urls i ON i.url = l.url
+        """)
+        mapping = dict(cursor.fetchall())
+        cursor.execute("DROP TABLE IF EXISTS temp.intern_urls")
+        return mapping
+
+    def _resolve_url_ids_sqlite(self, conn, ids) -> Dict[int, str]:
+        """Reverse lookup {id: url} for the given listing_urls ids."""
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS resolve_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM resolve_ids")
+        cursor.executemany(
+            "INSERT OR IGNORE INTO resolve_ids (id) VALUES (?)",
+            ((int(i),) for i in ids),
+        )
+        cursor.execute("""
+            SELECT l.id, l.url FROM listing_urls l
+            JOIN resolve_ids r ON r.id = l.id
+        """)
+        mapping = dict(cursor.fetchall())
+        cursor.execute("DROP TABLE IF EXISTS temp.resolve_ids")
+        return mapping
+
     def _save_link_snapshot_sqlite(self, category: str, urls: List[str]) -> bool:
         """SQLite implementation"""
         conn = self._get_sqlite_connection()
@@ -254,16 +813,18 @@ class Database:
         
         try:
             today = date.today().isoformat()
-            urls_json = json.dumps(urls)
+            ids = self._intern_urls_sqlite(conn, urls)
+            url_ids = encode_url_ids(ids.values())
             
             cursor.execute("""
-                INSERT INTO daily_link_snapshots (snapshot_date, category, urls, url_count)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO daily_link_snapshots (snapshot_date, category, urls, url_ids, url_count)
+                VALUES (?, ?, '[]', ?, ?)
                 ON CONFLICT(snapshot_date, category) DO UPDATE SET
                     urls = excluded.urls,
+                    url_ids = excluded.url_ids,
                     url_count = excluded.url_count,
                     scraped_at = CURRENT_TIMESTAMP
-            """, (today, category, urls_json, len(urls)))
+            """, (today, category, sqlite3.Binary(url_ids), len(ids)))
             
             conn.commit()
             return True
@@ -274,17 +835,49 @@ class Database:
         finally:
             conn.close()
     
+    def _intern_urls_supabase(self, urls: List[str]) -> Dict[str, int]:
+        """Assign stable ids via the intern_listing_urls RPC and return {url: id}."""
+        mapping = {}
+        unique_urls = list(dict.fromkeys(urls))
+        for i in range(0, len(unique_urls), self.SNAPSHOT_INTERN_BATCH_SIZE):
+            batch_urls = unique_urls[i:i + self.SNAPSHOT_INTERN_BATCH_SIZE]
+            result = self.supabase.rpc("intern_listing_urls", {"p_urls": batch_urls}).execute()
+            for row in result.data or []:
+                mapping[row["url"]] = row["id"]
+        return mapping
+
+    def _resolve_url_ids_supabase(self, ids) -> Dict[int, str]:
+        """Reverse lookup {id: url} in chunks of LOOKUP_BATCH_SIZE."""
+        ids = [int(i) for i in ids]
+        mapping = {}
+        for i in range(0, len(ids), self.LOOKUP_BATCH_SIZE):
+            result = self.supabase.table("listing_urls")\
+                .select("id, url")\
+                .in_("id", ids[i:i + self.LOOKUP_BATCH_SIZE])\
+                .execute()
+            for row in result.data or []:
+                mapping[row["id"]] = row["url"]
+        return mapping
+
     def _save_link_snapshot_supabase(self, category: str, urls: List[str]) -> bool:
         """Supabase implementation"""
+        data = {
+            "snapshot_date": date.today().isoformat(),
+            "category": category,
+            "urls": urls,
+            "url_count": len(urls)
+        }
+        try:
+            ids = self._intern_urls_supabase(urls)
+            data.update({
+                "urls": [],
+                "url_ids": base64.b64encode(encode_url_ids(ids.values())).decode("ascii"),
+                "url_count": len(ids),
+            })
+        except Exception as e:
+            # supabase_link_ids_migration.sql not applied yet: keep the JSON list
+            print(f"⚠️  URL interning unavailable, saving snapshot as JSON: {e}")
         try:
-            data = {
-                "snapshot_date": date.today().isoformat(),
-                "category": category,
-                "urls": urls,
-                "url_count": len(urls)
-            }
-            # urls needs to be a JSON array if the column is JSON/JSONB.
-            # supabase-py should handle list -> json automatically.
             self.supabase.table("daily_link_snapshots").upsert(data, on_conflict="snapshot_date,category").execute()
             return True
         except Exception as e:
@@ -304,6 +897,9 @@ class Database:
         On the very first run for a category the table has zero or one row;
         OFFSET 1 returns nothing and we fall back to "no previous snapshot"
         which the caller treats as "everything is new".
+
+        Compact rows are expanded back to URLs. Diff detection no longer
+        reads snapshots (see reconcile_links).
         """
         if self.db_type == "sqlite":
             return self._get_previous_snapshot_links_sqlite(category)
@@ -316,45 +912,248 @@ class Database:
         and was historically misleading (B-NEW3)."""
         return self.get_previous_snapshot_links(category)
 
+    def _fetch_previous_snapshot_sqlite(self, cursor, category: str) -> Optional[Tuple]:
+        """(urls, url_ids, snapshot_date) of the second-most-recent snapshot."""
+        cursor.execute("""
+            SELECT urls, url_ids, snapshot_date FROM daily_link_snapshots
+            WHERE category = ?
+            ORDER BY snapshot_date DESC, scraped_at DESC
+            LIMIT 1 OFFSET 1
+        """, (category,))
+        result = cursor.fetchone()
+        if result:
+            print(f"[{category}] Using snapshot from {result[2]} for diff detection")
+        else:
+            print(f"[{category}] No previous snapshot found - treating all as new")
+        return result
+
     def _get_previous_snapshot_links_sqlite(self, category: str) -> List[str]:
         """SQLite: pick the row with the second-most-recent (date, scraped_at)."""
         conn = self._get_sqlite_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute("""
-                SELECT urls, snapshot_date FROM daily_link_snapshots
-                WHERE category = ?
-                ORDER BY snapshot_date DESC, scraped_at DESC
-                LIMIT 1 OFFSET 1
-            """, (category,))
-
-            result = cursor.fetchone()
-            if result:
-                print(f"[{category}] Using snapshot from {result[1]} for diff detection")
+            result = self._fetch_previous_snapshot_sqlite(cursor, category)
+            if not result:
+                return []
+            if result[1] is None:
                 return json.loads(result[0])
-
-            print(f"[{category}] No previous snapshot found - treating all as new")
-            return []
+            ids = decode_url_ids(result[1])
+            id_to_url = self._resolve_url_ids_sqlite(conn, ids)
+            return [id_to_url[i] for i in ids.tolist() if i in id_to_url]
         finally:
             conn.close()
 
+    def _fetch_previous_snapshot_supabase(self, category: str) -> Optional[Dict]:
+        """Supabase: same selection as the SQLite helper via .range(1, 1)."""
+        try:
+            result = self.supabase.table("daily_link_snapshots")\
+                .select("urls, url_ids, snapshot_date")\
+                .eq("category", category)\
+                .order("snapshot_date", desc=True)\
+                .order("scraped_at", desc=True)\
+                .range(1, 1)\
+                .execute()
+        except Exception:
+            # url_ids column not migrated yet
+            result = self.supabase.table("daily_link_snapshots")\
+                .select("urls, snapshot_date")\
+                .eq("category", category)\
+                .order("snapshot_date", desc=True)\
+                .order("scraped_at", desc=True)\
+                .range(1, 1)\
+                .execute()
+
+        if result.data:
+            print(f"[{category}] Using snapshot from {result.data[0]['snapshot_date']} for diff detection")
+            return result.data[0]
+
+        print(f"[{category}] No previous snapshot found - treating all as new")
+        return None
+
     def _get_previous_snapshot_links_supabase(self, category: str) -> List[str]:
         """Supabase: same logic via .range(1, 1)."""
+        row = self._fetch_previous_snapshot_supabase(category)
+        if not row:
+            return []
+        if not row.get("url_ids"):
+            return row["urls"]
+        ids = decode_url_ids(base64.b64decode(row["url_ids"]))
+        id_to_url = self._resolve_url_ids_supabase(ids)
+        return [id_to_url[i] for i in ids.tolist() if i in id_to_url]
+
+    def compact_link_snapshots(self) -> int:
+        """Re-encode legacy JSON snapshots as url_ids. Returns rows converted."""
+        if self.db_type == "sqlite":
+            return self._compact_link_snapshots_sqlite()
+        else:
+            return self._compact_link_snapshots_supabase()
+
+    def _compact_link_snapshots_sqlite(self) -> int:
+        conn = self._get_sqlite_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id FROM daily_link_snapshots WHERE url_ids IS NULL ORDER BY snapshot_date")
+            row_ids = [row[0] for row in cursor.fetchall()]
+            for row_id in row_ids:
+                cursor.execute("SELECT urls FROM daily_link_snapshots WHERE id = ?", (row_id,))
+                ids = self._intern_urls_sqlite(conn, json.loads(cursor.fetchone()[0]))
+                cursor.execute(
+                    "UPDATE daily_link_snapshots SET urls = '[]', url_ids = ?, url_count = ? WHERE id = ?",
+                    (sqlite3.Binary(encode_url_ids(ids.values())), len(ids), row_id),
+                )
+                conn.commit()
+            if row_ids:
+                conn.execute("VACUUM")
+            return len(row_ids)
+        finally:
+            conn.close()
+
+    def _compact_link_snapshots_supabase(self) -> int:
         result = self.supabase.table("daily_link_snapshots")\
-            .select("urls, snapshot_date")\
-            .eq("category", category)\
-            .order("snapshot_date", desc=True)\
-            .order("scraped_at", desc=True)\
-            .range(1, 1)\
+            .select("id")\
+            .is_("url_ids", "null")\
+            .order("snapshot_date")\
             .execute()
+        converted = 0
+        for row in result.data or []:
+            snapshot = self.supabase.table("daily_link_snapshots")\
+                .select("urls")\
+                .eq("id", row["id"])\
+                .execute()
+            ids = self._intern_urls_supabase(snapshot.data[0]["urls"])
+            self.supabase.table("daily_link_snapshots").update({
+                "urls": [],
+                "url_ids": base64.b64encode(encode_url_ids(ids.values())).decode("ascii"),
+                "url_count": len(ids),
+            }).eq("id", row["id"]).execute()
+            converted += 1
+        return converted
 
-        if result.data:
-            print(f"[{category}] Using snapshot from {result.data[0]['snapshot_date']} for diff detection")
-            return result.data[0]["urls"]
+    # ================================================================
+    # RECONCILIATION
+    # ================================================================
+
+    def reconcile_links(self, category: str, current_urls: List[str]) -> Dict[str, Any]:
+        """Reconcile today's URL set for a category against `properties`.
+
+        Returns {"new": [...], "sold": [...], "reactivated": [...], "touched": int}:
+          new         -- URLs with no properties row yet (to be scraped)
+          sold        -- active rows in this category whose URL is gone
+          reactivated -- inactive rows that are listed again (re-activated here)
+          touched     -- still-present rows whose last_seen_date was set to today
+
+        Sold rows are only reported, not deactivated, so the caller can
+        archive/verify them first and then call mark_properties_inactive.
+        """
+        if self.db_type == "sqlite":
+            return self._reconcile_links_sqlite(category, current_urls)
+        else:
+            return self._reconcile_links_supabase(category, current_urls)
+
+    def _reconcile_links_sqlite(self, category: str, current_urls: List[str]) -> Dict[str, Any]:
+        """SQLite: stage URLs in a temp table, then three set-based statements,
+        all in one IMMEDIATE transaction (no other writer between the SELECTs
+        and the UPDATE)."""
+        with self._sqlite_transaction() as conn:
+            cursor = conn.cursor()
+            today = date.today().isoformat()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS current_links (url TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM current_links")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO current_links (url) VALUES (?)",
+                ((u,) for u in current_urls),
+            )
+            cursor.execute("""
+                SELECT c.url FROM current_links c
+                LEFT JOIN properties p ON p.url = c.url
+                WHERE p.url IS NULL
+            """)
+            new_urls = [row[0] for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT p.url FROM properties p
+                WHERE p.category = ? AND p.is_active = 1
+                  AND NOT EXISTS (SELECT 1 FROM current_links c WHERE c.url = p.url)
+            """, (category,))
+            sold_urls = [row[0] for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT p.url FROM properties p
+                JOIN current_links c ON c.url = p.url
+                WHERE p.is_active != 1
+            """)
+            reactivated_urls = [row[0] for row in cursor.fetchall()]
+            cursor.execute("""
+                UPDATE properties
+                SET last_seen_date = ?, is_active = 1
+                WHERE url IN (SELECT url FROM current_links)
+                  AND (last_seen_date IS NOT ? OR is_active != 1)
+            """, (today, today))
+            touched = cursor.rowcount
+            cursor.execute("DROP TABLE IF EXISTS temp.current_links")
+        return {"new": new_urls, "sold": sold_urls, "reactivated": reactivated_urls, "touched": touched}
+
+    def _reconcile_links_supabase(self, category: str, current_urls: List[str]) -> Dict[str, Any]:
+        """Supabase: one `reconcile_links` RPC; client-side fallback if it is missing."""
+        try:
+            result = self.supabase.rpc("reconcile_links", {
+                "p_category": category,
+                "p_urls": list(dict.fromkeys(current_urls)),
+            }).execute()
+            row = result.data[0] if isinstance(result.data, list) else result.data
+            return {
+                "new": row.get("new_urls") or [],
+                "sold": row.get("sold_urls") or [],
+                # Absent from RPCs created before reactivated_urls was added
+                "reactivated": row.get("reactivated_urls") or [],
+                "touched": row.get("touched") or 0,
+            }
+        except Exception as e:
+            print(f"⚠️  reconcile_links RPC unavailable, reconciling client-side: {e}")
+
+        current_set = set(current_urls)
+        known = {}
+        page_size = 1000
+        from_idx = 0
+        while True:
+            result = self.supabase.table("properties")\
+                .select("url, is_active, last_seen_date")\
+                .eq("category", category)\
+                .range(from_idx, from_idx + page_size - 1)\
+                .execute()
+            if not result.data:
+                break
+            for row in result.data:
+                known[row["url"]] = row
+            if len(result.data) < page_size:
+                break
+            from_idx += page_size
+
+        today = date.today().isoformat()
+        # Rows can exist under another category; only a miss in `properties` is new
+        unknown = [u for u in dict.fromkeys(current_urls) if u not in known]
+        existing_elsewhere = self.get_properties_by_urls(unknown, fields=["url"]) if unknown else {}
+        new_urls = [u for u in unknown if u not in existing_elsewhere]
+        sold_urls = [u for u, row in known.items() if row.get("is_active") and u not in current_set]
+        stale = [u for u, row in known.items()
+                 if u in current_set and (row.get("last_seen_date") != today or not row.get("is_active"))]
+        reactivated_urls = [u for u in stale if not known[u].get("is_active")]
+        # Rows found under another category were not fetched with is_active;
+        # listing them is harmless (summary refresh is idempotent per URL)
+        reactivated_urls.extend(existing_elsewhere)
+        stale.extend(existing_elsewhere)
+
+        touched = 0
+        for i in range(0, len(stale), self.LOOKUP_BATCH_SIZE):
+            batch_urls = stale[i:i + self.LOOKUP_BATCH_SIZE]
+            try:
+                result = self.supabase.table("properties")\
+                    .update({"is_active": True, "last_seen_date": today})\
+                    .in_("url", batch_urls)\
+                    .execute()
+                touched += len(result.data) if result.data else 0
+            except Exception as e:
+                print(f"Error touching last_seen_date (batch {i//self.LOOKUP_BATCH_SIZE + 1}): {e}")
+        return {"new": new_urls, "sold": sold_urls, "reactivated": reactivated_urls, "touched": touched}
 
-        print(f"[{category}] No previous snapshot found - treating all as new")
-        return []
-    
     # ================================================================
     # MARK PROPERTIES AS INACTIVE
     # ================================================================
@@ -415,6 +1214,110 @@ class Database:
                 print(f"Error getting property by url: {e}")
                 return None
 
+    # Default projection for get_properties_by_urls — same columns as
+    # get_property_by_url so the two are interchangeable for callers.
+    PROPERTY_LOOKUP_FIELDS: Tuple[str, ...] = (
+        "url", "category", "images", "title", "price", "genre_name_ja",
+        "expiry_date", "last_seen_date",
+    )
+    LOOKUP_BATCH_SIZE: int = 100
+
+    def get_properties_by_urls(self, urls: List[str],
+                               fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Bulk version of get_property_by_url.
+
+        Returns {url: row} for every URL that exists; missing URLs are simply
+        absent from the dict. Supabase is queried with `.in_()` in chunks of
+        LOOKUP_BATCH_SIZE, SQLite joins against a temp table in a single
+        statement — either way a few round trips instead of one per URL.
+        """
+        if not urls:
+            return {}
+        columns = list(fields) if fields else list(self.PROPERTY_LOOKUP_FIELDS)
+        if "url" not in columns:
+            columns.insert(0, "url")
+        for col in columns:
+            if not col.replace("_", "").isalnum():
+                raise ValueError(f"Invalid column name: {col}")
+
+        if self.db_type == "sqlite":
+            return self._get_properties_by_urls_sqlite(urls, columns)
+        else:
+            return self._get_properties_by_urls_supabase(urls, columns)
+
+    def _get_properties_by_urls_sqlite(self, urls: List[str], columns: List[str]) -> Dict[str, Dict]:
+        """SQLite: load URLs into a temp table and join once (no variable limit)."""
+        conn = self._get_sqlite_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_urls (url TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM lookup_urls")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO lookup_urls (url) VALUES (?)",
+                ((u,) for u in urls),
+            )
+            select_cols = ", ".join(f"p.{c}" for c in columns)
+            cursor.execute(f"""
+                SELECT {select_cols} FROM properties p
+                JOIN lookup_urls l ON l.url = p.url
+            """)
+            results = {}
+            for row in cursor.fetchall():
+                data = self._decode_property_row(dict(zip(columns, row)))
+                results[data["url"]] = data
+            cursor.execute("DROP TABLE IF EXISTS temp.lookup_urls")
+            return results
+        finally:
+            conn.close()
+
+    def _get_properties_by_urls_supabase(self, urls: List[str], columns: List[str]) -> Dict[str, Dict]:
+        """Supabase: chunked `url IN (...)` queries."""
+        results = {}
+        select_cols = ", ".join(columns)
+        for i in range(0, len(urls), self.LOOKUP_BATCH_SIZE):
+            batch_urls = urls[i:i + self.LOOKUP_BATCH_SIZE]
+            try:
+                result = self.supabase.table("properties")\
+                    .select(select_cols)\
+                    .in_("url", batch_urls)\
+                    .execute()
+                for row in result.data or []:
+                    results[row["url"]] = row
+            except Exception as e:
+                print(f"Error getting properties by url (batch {i//self.LOOKUP_BATCH_SIZE + 1}): {e}")
+                continue
+        return results
+
+    def get_properties_by_ids(self, ids: List[int], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Rows for page cursor ids (SQLite rowid / Supabase id, as in the facet index), in the order given.
+
+        Ids that no longer exist are skipped. Raises ValueError for unknown columns.
+        """
+        for col in fields or []:
+            if col not in self.PROPERTY_COLUMNS:
+                raise ValueError(f"Invalid column name: {col}")
+        rows: Dict[int, Dict] = {}
+        for i in range(0, len(ids), self.LOOKUP_BATCH_SIZE):
+            batch = [int(x) for x in ids[i:i + self.LOOKUP_BATCH_SIZE]]
+            if self.db_type == "sqlite":
+                conn = self._get_sqlite_connection()
+                try:
+                    cursor = conn.execute(
+                        f"SELECT rowid, {', '.join(fields) if fields else '*'} FROM properties "
+                        f"WHERE rowid IN ({', '.join('?' for _ in batch)})", batch)
+                    names = [d[0] for d in cursor.description][1:]
+                    for row in cursor.fetchall():
+                        rows[row[0]] = self._decode_property_row(dict(zip(names, row[1:])))
+                finally:
+                    conn.close()
+            else:
+                strip_id = bool(fields) and "id" not in fields
+                select_cols = ", ".join(list(fields) + ["id"] if strip_id else fields) if fields else "*"
+                result = self.supabase.table("properties").select(select_cols).in_("id", batch).execute()
+                for row in result.data or []:
+                    rows[row["id"] if not strip_id else row.pop("id")] = row
+        return [rows[int(x)] for x in ids if int(x) in rows]
+
     def update_archived_images(self, url: str, archived_urls: List[str]) -> bool:
         """Save archived image URLs to the property record"""
         archived_json = json.dumps(archived_urls)
@@ -449,23 +1352,30 @@ class Database:
             return self._mark_properties_inactive_supabase(urls)
     
     def _mark_properties_inactive_sqlite(self, urls: List[str]) -> int:
-        """SQLite implementation"""
+        """SQLite implementation.
+
+        URLs go through a temp table rather than one `IN (?,?,...)` list, which
+        failed once a category had more sold URLs than SQLite's host-parameter
+        limit (999 on older builds).
+        """
         if not urls:
             return 0
-        conn = self._get_sqlite_connection()
-        cursor = conn.cursor()
-        try:
-            placeholders = ','.join('?' * len(urls))
-            cursor.execute(f"""
+        with self._sqlite_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS inactive_urls (url TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM inactive_urls")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO inactive_urls (url) VALUES (?)",
+                ((u,) for u in urls),
+            )
+            cursor.execute("""
                 UPDATE properties
                 SET is_active = 0, last_seen_date = date('now')
-                WHERE url IN ({placeholders})
-            """, urls)
+                WHERE url IN (SELECT url FROM inactive_urls)
+            """)
             affected = cursor.rowcount
-            conn.commit()
-            return affected
-        finally:
-            conn.close()
+            cursor.execute("DROP TABLE IF EXISTS temp.inactive_urls")
+        return affected
     
     def _mark_properties_inactive_supabase(self, urls: List[str]) -> int:
         """Supabase implementation"""
@@ -486,53 +1396,483 @@ class Database:
                 print(f"Error marking properties inactive (batch {i//BATCH_SIZE + 1}): {e}")
                 continue
         return total_marked
-    
+
+    def delete_properties(self, urls: List[str]) -> int:
+        """Delete rows by URL (sample / test data); returns the number deleted.
+
+        Callers refresh the summary tables for the same URLs afterwards
+        (refresh_summary_stats subtracts rows that no longer exist).
+        """
+        if not urls:
+            return 0
+        if self.db_type == "sqlite":
+            with self._sqlite_transaction() as conn:
+                return sum(conn.execute("DELETE FROM properties WHERE url = ?", (url,)).rowcount for url in urls)
+        deleted = 0
+        for i in range(0, len(urls), self.LOOKUP_BATCH_SIZE):
+            result = self.supabase.table("properties").delete().in_("url", urls[i:i + self.LOOKUP_BATCH_SIZE]).execute()
+            deleted += len(result.data or [])
+        return deleted
+
     # ================================================================
     # QUERY METHODS
     # ================================================================
     
+    @staticmethod
+    def _decode_property_row(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Decode SQLite TEXT JSON columns / INTEGER booleans in place."""
+        for key in ("images", "property_data"):
+            if key in data and (data[key] is None or isinstance(data[key], str)):
+                try:
+                    data[key] = json.loads(data[key]) if data[key] else ([] if key == "images" else {})
+                except json.JSONDecodeError:
+                    data[key] = [] if key == "images" else {}
+        if "is_active" in data:
+            data["is_active"] = bool(data["is_active"])
+        return data
+
+    # Columns a caller may filter on or project (?fields=) in get_properties_page
+    PROPERTY_COLUMNS = frozenset((
+        "id", "url", "category", "category_type", "category_name_ja", "genre_name_ja",
+        "title", "price", "favorites", "update_date", "expiry_date", "images",
+        "company_name", "property_data", "is_active", "first_seen_date", "last_seen_date",
+        *TYPED_COLUMN_NAMES, "created_at", "updated_at",
+    ))
+
+    # Sort orders for get_properties_page: (column, descending) pairs, id last
+    # as the tie-breaker. SQLite keys on rowid (insertion order; the migration
+    # schema's id is a random hex string), Supabase on its BIGSERIAL id.
+    PROPERTY_PAGE_ORDERS: Dict[str, Tuple[Tuple[str, bool], ...]] = {
+        "id": (("id", False),),
+        "-id": (("id", True),),
+        "-last_seen_date": (("last_seen_date", True), ("id", True)),
+    }
+
+    def get_properties_page(self, where: Optional[Dict[str, Any]] = None,
+                            fields: Optional[List[str]] = None,
+                            order: str = "id",
+                            after: Optional[str] = None,
+                            limit: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+        """One keyset page of properties.
+
+        where  -- {column: value} equality filters, {"column__gte": value} for >=
+        fields -- columns to return (default: all)
+        order  -- a key of PROPERTY_PAGE_ORDERS
+        after  -- the next_cursor of the previous page
+        limit  -- page size; None returns every matching row
+
+        Filters, order and limit all run in the database, so the cost is
+        proportional to the page, not the table. Returns (rows, next_cursor);
+        next_cursor is None on the last page. Raises ValueError for unknown
+        columns, orders or malformed cursors.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+        rows: List[Dict] = []
+        last_cursor = None
+        for cursor, row in self.iter_properties(where, fields, order, after,
+                                                None if limit is None else limit + 1):
+            if limit is not None and len(rows) == limit:
+                return rows, last_cursor
+            rows.append(row)
+            last_cursor = cursor
+        return rows, None
+
+    def iter_properties(self, where: Optional[Dict[str, Any]] = None,
+                        fields: Optional[List[str]] = None,
+                        order: str = "id",
+                        after: Optional[str] = None,
+                        limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        """Stream (cursor, row) pairs for get_properties_page's arguments.
+
+        `cursor` resumes right after its row (pass it as `after`). SQLite
+        reads one cursor with fetchmany, Supabase 1,000-row keyset batches,
+        so memory stays flat for full dumps. Arguments are validated here,
+        before the first row is read.
+        """
+        if order not in self.PROPERTY_PAGE_ORDERS:
+            raise ValueError(f"Invalid order: {order}")
+        for col in list(fields or []) + [k.replace("__gte", "") for k in (where or {})]:
+            if col not in self.PROPERTY_COLUMNS:
+                raise ValueError(f"Invalid column name: {col}")
+        keys = self.PROPERTY_PAGE_ORDERS[order]
+        cursor_values = self._decode_page_cursor(after, keys) if after else None
+        source = (self._iter_properties_keyset_sqlite if self.db_type == "sqlite"
+                  else self._iter_properties_keyset_supabase)
+        return (("|".join(str(v) for v in key), row)
+                for key, row in source(where or {}, fields, keys, cursor_values, limit))
+
+    @staticmethod
+    def _decode_page_cursor(after: str, keys) -> List[Any]:
+        values = after.split("|")
+        if len(values) != len(keys):
+            raise ValueError(f"Invalid cursor: {after}")
+        return [int(v) if col == "id" else v for v, (col, _) in zip(values, keys)]
+
+    def _iter_properties_keyset_sqlite(self, where: Dict[str, Any], fields: Optional[List[str]], keys,
+                                       cursor_values: Optional[List[Any]], limit: Optional[int]):
+        key_cols = ["rowid" if col == "id" else col for col, _ in keys]
+        descending = keys[0][1]
+        sql = f"SELECT {', '.join(key_cols)}, {', '.join(fields) if fields else '*'} FROM properties WHERE 1 = 1"
+        params: List[Any] = []
+        for col, value in where.items():
+            op = ">=" if col.endswith("__gte") else "="
+            sql += f" AND {col.replace('__gte', '')} {op} ?"
+            params.append(int(value) if isinstance(value, bool) else value)
+        if cursor_values is not None:
+            marks = ", ".join("?" for _ in key_cols)
+            sql += f" AND ({', '.join(key_cols)}) {'<' if descending else '>'} ({marks})"
+            params.extend(cursor_values)
+        sql += " ORDER BY " + ", ".join(f"{c} {'DESC' if descending else 'ASC'}" for c in key_cols)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        conn = self._get_sqlite_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            names = [d[0] for d in cursor.description][len(key_cols):]
+            while True:
+                batch = cursor.fetchmany(1000)
+                if not batch:
+                    break
+                for row in batch:
+                    yield row[:len(key_cols)], self._decode_property_row(dict(zip(names, row[len(key_cols):])))
+        finally:
+            conn.close()
+
+    def _iter_properties_keyset_supabase(self, where: Dict[str, Any], fields: Optional[List[str]], keys,
+                                         cursor_values: Optional[List[Any]], limit: Optional[int]):
+        key_cols = [col for col, _ in keys]
+        descending = keys[0][1]
+        extra = [c for c in key_cols if fields and c not in fields]
+        select_cols = ", ".join(list(fields) + extra) if fields else "*"
+        batch_size = 1000
+        remaining = limit
+        while remaining is None or remaining > 0:
+            query = self.supabase.table("properties").select(select_cols)
+            for col, value in where.items():
+                query = query.gte(col[:-5], value) if col.endswith("__gte") else query.eq(col, value)
+            if cursor_values is not None:
+                op = "lt" if descending else "gt"
+                if len(key_cols) == 1:
+                    query = getattr(query, op)(key_cols[0], cursor_values[0])
+                else:
+                    (c1, c2), (v1, v2) = key_cols, cursor_values
+                    query = query.or_(f"{c1}.{op}.{v1},and({c1}.eq.{v1},{c2}.{op}.{v2})")
+            for col in key_cols:
+                query = query.order(col, desc=descending)
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            rows = query.limit(size).execute().data or []
+            for row in rows:
+                key = tuple(row[c] for c in key_cols)
+                for c in extra:
+                    del row[c]
+                yield key, row
+                cursor_values = list(key)
+            if len(rows) < size:
+                break
+            if remaining is not None:
+                remaining -= len(rows)
+
+    # ================================================================
+    # SEARCH
+    # ================================================================
+
+    SEARCH_MAX_TERMS = 8
+    SEARCH_MAX_LIMIT = 100
+    SEARCH_SNIPPET_CHARS = 24      # context on each side of the first hit
+
+    def search_properties(self, query: str,
+                          where: Optional[Dict[str, Any]] = None,
+                          fields: Optional[List[str]] = None,
+                          after: Optional[str] = None,
+                          limit: int = 20) -> Tuple[List[Dict], Optional[str]]:
+        """Full-text search over title, company, 所在地 and property_data values.
+
+        query  -- whitespace-separated terms (半角 / 全角 space); a listing
+                  matches when it contains every term. Half-width and
+                  full-width spellings of a term match each other.
+        where  -- {column: value} equality filters, e.g. {"is_active": True}
+                  (default: every listing, sold ones included)
+        fields -- columns to return (default: all)
+        after  -- the next_cursor of the previous page
+        limit  -- page size, 1..SEARCH_MAX_LIMIT
+
+        Rows are ranked best first and carry `score` (higher is better) and
+        `snippet`, an HTML-escaped excerpt with the hits in <mark>. SQLite
+        ranks with bm25 over the FTS5 trigram index; terms of 1-2 characters
+        are not indexed and only filter the rows the other terms matched (a
+        query of short terms only scans the index table and ranks by where the
+        terms occur: title > 所在地 > company > details, as on Supabase).
+        Returns (rows, next_cursor); raises ValueError for an empty query,
+        unknown columns, a bad limit or a malformed cursor.
+        """
+        terms = [_search_term_variants(t) for t in dict.fromkeys(query.split())]
+        if not terms:
+            raise ValueError("Empty search query")
+        if len(terms) > self.SEARCH_MAX_TERMS:
+            raise ValueError(f"Too many search terms (max {self.SEARCH_MAX_TERMS})")
+        if not 1 <= limit <= self.SEARCH_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {self.SEARCH_MAX_LIMIT}")
+        for col in list(fields or []) + list(where or {}):
+            if col not in self.PROPERTY_COLUMNS:
+                raise ValueError(f"Invalid column name: {col}")
+        if after is not None and not after.isdigit():
+            raise ValueError(f"Invalid cursor: {after}")
+        offset = int(after or 0)
+
+        if self.db_type == "sqlite":
+            rows = self._search_properties_sqlite(terms, where or {}, fields, limit + 1, offset)
+        else:
+            rows = self._search_properties_supabase(terms, where or {}, fields, limit + 1, offset)
+        if len(rows) > limit:
+            return rows[:limit], str(offset + limit)
+        return rows, None
+
+    def _search_properties_sqlite(self, terms: List[List[str]], where: Dict[str, Any],
+                                  fields: Optional[List[str]], limit: int, offset: int) -> List[Dict]:
+        indexed = [t for t in terms if min(map(len, t)) >= SEARCH_MIN_INDEXED_CHARS]
+        short = [t for t in terms if t not in indexed]
+        short_variants = [v for t in short for v in t]
+        match = " AND ".join("(" + " OR ".join('"' + v.replace('"', '""') + '"' for v in variants) + ")"
+                             for variants in indexed)
+
+        def contains(variants, columns):
+            """SQL + params: any of variants occurs in any of columns (not via the index)."""
+            parts, params = [], []
+            for v in variants:
+                for col in columns:
+                    sql, param = _contains_sql(f"properties_fts.{col}", v)
+                    parts.append(sql)
+                    params.append(param)
+            return "(" + " OR ".join(parts) + ")", params
+
+        # 1) rank: only rowid and score, so sorting every hit stays cheap
+        score_params: List[Any] = []
+        if indexed:
+            score = f"-bm25(properties_fts, {', '.join(str(w) for w in SEARCH_BM25_WEIGHTS)})"
+        else:
+            # Same weighting as the Supabase RPC: per term, where it occurs
+            hits = []
+            for variants in short:
+                for col, weight in zip(SEARCH_COLUMNS, SEARCH_BM25_WEIGHTS):
+                    sql, params = contains(variants, [col])
+                    hits.append(f"{weight} * IFNULL({sql}, 0)")   # NULL column: no hit
+                    score_params.extend(params)
+            score = " + ".join(hits)
+        sql = f"SELECT properties_fts.rowid, {score} AS score FROM properties_fts"
+        if where:
+            sql += " JOIN properties p ON p.rowid = properties_fts.rowid"
+        sql += " WHERE 1 = 1"
+        params: List[Any] = list(score_params)
+        if indexed:
+            sql += " AND properties_fts MATCH ?"
+            params.append(match)
+        for variants in short:
+            condition, condition_params = contains(variants, SEARCH_COLUMNS)
+            sql += f" AND {condition}"
+            params.extend(condition_params)
+        for col, value in where.items():
+            sql += f" AND p.{col} = ?"
+            params.append(int(value) if isinstance(value, bool) else value)
+        sql += f" ORDER BY score DESC, properties_fts.rowid DESC LIMIT {int(limit)} OFFSET {int(offset)}"
+
+        conn = self._get_sqlite_connection()
+        try:
+            ranked = conn.execute(sql, params).fetchall()
+            if not ranked:
+                return []
+
+            # 2) the page: columns and snippets for the ranked rowids only
+            snippet = (f"snippet(properties_fts, -1, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', "
+                       f"{self.SEARCH_SNIPPET_CHARS})" if indexed else "NULL")
+            text_cols = ", ".join(f"properties_fts.{c} AS _search_{c}" for c in SEARCH_COLUMNS)
+            sql = (f"SELECT properties_fts.rowid AS _search_rowid, {snippet} AS _search_snippet, {text_cols}, "
+                   f"{', '.join('p.' + f for f in fields) if fields else 'p.*'} "
+                   f"FROM properties_fts JOIN properties p ON p.rowid = properties_fts.rowid "
+                   f"WHERE properties_fts.rowid IN ({', '.join('?' for _ in ranked)})")
+            params = [rowid for rowid, _ in ranked]
+            if indexed:
+                sql += " AND properties_fts MATCH ?"
+                params.append(match)
+            cursor = conn.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            page = {}
+            for values in cursor.fetchall():
+                row = dict(zip(names, values))
+                rowid = row.pop("_search_rowid")
+                texts = [row.pop(f"_search_{c}") for c in SEARCH_COLUMNS]
+                snippet_text = row.pop("_search_snippet")
+                if snippet_text is None:
+                    snippet_text = _excerpt(texts, short_variants, self.SEARCH_SNIPPET_CHARS)
+                else:
+                    snippet_text = _highlight(snippet_text, short_variants)
+                row = self._decode_property_row(row)
+                row["snippet"] = _render_snippet(snippet_text)
+                page[rowid] = row
+        finally:
+            conn.close()
+
+        results = []
+        for rowid, row_score in ranked:
+            row = page[rowid]
+            row["score"] = row_score
+            results.append(row)
+        return results
+
+    def _search_properties_supabase(self, terms: List[List[str]], where: Dict[str, Any],
+                                    fields: Optional[List[str]], limit: int, offset: int) -> List[Dict]:
+        """search_properties RPC (supabase_search_migration.sql): pg_trgm index, ILIKE per term."""
+        result = self.supabase.rpc("search_properties", {
+            "p_patterns": [[_like_pattern(v) for v in variants] for variants in terms],
+            "p_filters": where,
+            "p_limit": limit,
+            "p_offset": offset,
+        }).execute()
+        variants = [v for t in terms for v in t]
+        results = []
+        for hit in result.data or []:
+            row = hit["row"]
+            if fields:
+                row = {f: row.get(f) for f in fields}
+            texts = [hit.get(c) for c in SEARCH_COLUMNS]
+            row["score"] = hit["score"]
+            row["snippet"] = _render_snippet(_excerpt(texts, variants, self.SEARCH_SNIPPET_CHARS))
+            results.append(row)
+        return results
+
     def get_all_active_properties(self) -> List[Dict]:
+        """All active rows as a list. Prefer iter_active_properties for large scans."""
+        return list(self.iter_active_properties())
+
+    def iter_active_properties(self, batch_size: int = 1000,
+                               fields: Optional[List[str]] = None,
+                               category: Optional[str] = None) -> Iterator[Dict]:
+        """Yield active properties one at a time, batch_size rows per fetch.
+
+        SQLite streams from a single cursor with fetchmany; Supabase pages
+        with keyset pagination on id (`id > last_id ORDER BY id`), which
+        stays cheap at any depth unlike offset-based `.range()`. Only
+        `fields` are selected when given, so callers that need two columns
+        do not pay for decoding property_data.
+        """
+        columns = list(fields) if fields else None
+        for col in columns or []:
+            if not col.replace("_", "").isalnum():
+                raise ValueError(f"Invalid column name: {col}")
+
         if self.db_type == "sqlite":
-            return self._get_all_active_properties_sqlite()
+            return self._iter_active_properties_sqlite(batch_size, columns, category)
         else:
-            return self._get_all_active_properties_supabase()
-    
-    def _get_all_active_properties_sqlite(self) -> List[Dict]:
+            return self._iter_active_properties_supabase(batch_size, columns, category)
+
+    def _iter_active_properties_sqlite(self, batch_size: int, columns: Optional[List[str]],
+                                       category: Optional[str]) -> Iterator[Dict]:
         conn = self._get_sqlite_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
         try:
-            cursor.execute("SELECT * FROM properties WHERE is_active = 1")
-            rows = cursor.fetchall()
-            results = []
-            for row in rows:
-                data = dict(row)
-                data["images"] = json.loads(data["images"]) if data["images"] else []
-                data["property_data"] = json.loads(data["property_data"]) if data["property_data"] else {}
-                data["is_active"] = bool(data["is_active"])
-                results.append(data)
-            return results
+            cursor = conn.cursor()
+            select_cols = ", ".join(columns) if columns else "*"
+            sql = f"SELECT {select_cols} FROM properties WHERE is_active = 1"
+            params: List[Any] = []
+            if category:
+                sql += " AND category = ?"
+                params.append(category)
+            cursor.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._decode_property_row(dict(zip(names, row)))
         finally:
             conn.close()
-    
-    def _get_all_active_properties_supabase(self) -> List[Dict]:
-        # Might need pagination if count is large
-        all_data = []
-        page_size = 1000
-        from_idx = 0
+
+    def _iter_active_properties_supabase(self, batch_size: int, columns: Optional[List[str]],
+                                         category: Optional[str]) -> Iterator[Dict]:
+        strip_id = bool(columns) and "id" not in columns
+        select_cols = ", ".join(columns + ["id"] if strip_id else columns) if columns else "*"
+        last_id = None
         while True:
-            result = self.supabase.table("properties")\
-                .select("*")\
-                .eq("is_active", True)\
-                .range(from_idx, from_idx + page_size - 1)\
-                .execute()
-            if not result.data:
+            query = self.supabase.table("properties")\
+                .select(select_cols)\
+                .eq("is_active", True)
+            if category:
+                query = query.eq("category", category)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = query.order("id").limit(batch_size).execute()
+            rows = result.data or []
+            for row in rows:
+                last_id = row["id"]
+                if strip_id:
+                    del row["id"]
+                yield row
+            if len(rows) < batch_size:
                 break
-            all_data.extend(result.data)
-            if len(result.data) < page_size:
+
+    def iter_properties_updated_since(self, updated_after: Optional[str] = None,
+                                      updated_before: Optional[str] = None,
+                                      category: Optional[str] = None,
+                                      batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield rows (active and inactive) with updated_after < updated_at < updated_before.
+
+        updated_at only moves on content changes (see SQLITE_UPDATED_AT_TRIGGER),
+        so this is the incremental feed for exports. None leaves a bound open.
+        """
+        if self.db_type == "sqlite":
+            return self._iter_properties_updated_since_sqlite(updated_after, updated_before, category, batch_size)
+        else:
+            return self._iter_properties_updated_since_supabase(updated_after, updated_before, category, batch_size)
+
+    def _iter_properties_updated_since_sqlite(self, updated_after: Optional[str], updated_before: Optional[str],
+                                              category: Optional[str], batch_size: int) -> Iterator[Dict]:
+        conn = self._get_sqlite_connection()
+        try:
+            cursor = conn.cursor()
+            sql = "SELECT * FROM properties WHERE 1 = 1"
+            params: List[Any] = []
+            if updated_after:
+                sql += " AND updated_at > ?"
+                params.append(updated_after)
+            if updated_before:
+                sql += " AND updated_at < ?"
+                params.append(updated_before)
+            if category:
+                sql += " AND category = ?"
+                params.append(category)
+            cursor.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._decode_property_row(dict(zip(names, row)))
+        finally:
+            conn.close()
+
+    def _iter_properties_updated_since_supabase(self, updated_after: Optional[str], updated_before: Optional[str],
+                                                category: Optional[str], batch_size: int) -> Iterator[Dict]:
+        last_id = None
+        while True:
+            query = self.supabase.table("properties").select("*")
+            if updated_after:
+                query = query.gt("updated_at", updated_after)
+            if updated_before:
+                query = query.lt("updated_at", updated_before)
+            if category:
+                query = query.eq("category", category)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = query.order("id").limit(batch_size).execute()
+            rows = result.data or []
+            for row in rows:
+                last_id = row["id"]
+                yield row
+            if len(rows) < batch_size:
                 break
-            from_idx += page_size
-        return all_data
 
     # ================================================================
     # STATISTICS METHODS
@@ -545,25 +1885,89 @@ class Database:
             return self._get_price_statistics_supabase()
 
     def _get_price_statistics_sqlite(self) -> Dict[str, Any]:
-        # (Same as your original code for SQLite)
+        """価格統計を SQLite 側で集計する。
+
+        1. 生の価格文字列ごとの件数をカバリングインデックス
+           idx_properties_stat_price から GROUP BY で取得（property_data の全件デコードなし）
+        2. 異なり値だけを property_normalize で一度ずつ解析し、TEMP テーブル
+           stat_prices(man, n) に格納
+        3. 平均・中央値・最小・最大・四分位点を SQL で計算。中央値は件数の累積和
+           （ウィンドウ関数）で (n+1)/2 番目と (n+2)/2 番目を引き当てるので、
+           _calculate_stats と同じ値になる。四分位点も同じ方法で p*(n-1) 番目の前後の
+           2 値を引き、補間だけ _interpolate で行う
+        """
         conn = self._get_sqlite_connection()
         cursor = conn.cursor()
         try:
+            cursor.execute(f"""
+                SELECT {STAT_PRICE_SQL}, COUNT(*) FROM properties
+                WHERE is_active = 1 AND {STAT_PRICE_SQL} IS NOT NULL
+                GROUP BY 1
+            """)
+            groups = cursor.fetchall()
+            man = parse_price_yen_batch([str(raw) for raw, _ in groups]) / 10_000
+
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS stat_prices (man REAL NOT NULL, n INTEGER NOT NULL)")
+            cursor.execute("DELETE FROM stat_prices")
+            cursor.executemany(
+                "INSERT INTO stat_prices (man, n) VALUES (?, ?)",
+                ((float(value), n) for (_, n), value in zip(groups, man) if value > 0),
+            )
             cursor.execute("""
-                SELECT property_data FROM properties 
-                WHERE is_active = 1 AND property_data IS NOT NULL AND property_data != '{}'
+                WITH ranked AS (
+                    SELECT man, n,
+                           SUM(n) OVER (ORDER BY man ROWS UNBOUNDED PRECEDING) AS upto,
+                           SUM(n) OVER () AS total
+                    FROM stat_prices
+                )
+                SELECT SUM(man * n), MIN(man), MAX(man), MAX(total),
+                       (SUM(CASE WHEN (total + 1) / 2 BETWEEN upto - n + 1 AND upto THEN man END)
+                        + SUM(CASE WHEN (total + 2) / 2 BETWEEN upto - n + 1 AND upto THEN man END)) / 2,
+                       SUM(CASE WHEN CAST(0.25 * (total - 1) AS INTEGER) BETWEEN upto - n AND upto - 1 THEN man END),
+                       SUM(CASE WHEN MIN(CAST(0.25 * (total - 1) AS INTEGER) + 1, total - 1)
+                                     BETWEEN upto - n AND upto - 1 THEN man END),
+                       SUM(CASE WHEN CAST(0.75 * (total - 1) AS INTEGER) BETWEEN upto - n AND upto - 1 THEN man END),
+                       SUM(CASE WHEN MIN(CAST(0.75 * (total - 1) AS INTEGER) + 1, total - 1)
+                                     BETWEEN upto - n AND upto - 1 THEN man END)
+                FROM ranked
             """)
-            prices = self._extract_prices_from_cursor(cursor)
-            return self._calculate_stats(prices)
+            total, low, high, count, median, p25_low, p25_high, p75_low, p75_high = cursor.fetchone()
+            cursor.execute("DROP TABLE IF EXISTS temp.stat_prices")
+            if not count:
+                return dict(EMPTY_PRICE_STATS)
+            return {
+                "average": round(total / count, 1),
+                "median": round(median, 1),
+                "min": round(low, 1),
+                "max": round(high, 1),
+                "count": count,
+                "percentile25": round(self._interpolate(p25_low, p25_high, 0.25 * (count - 1)), 1),
+                "percentile75": round(self._interpolate(p75_low, p75_high, 0.75 * (count - 1)), 1),
+            }
         finally:
             conn.close()
 
+    def _stats_rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict]]:
+        """Call an aggregate RPC from supabase_stats_migration.sql; None if it is not applied (or fails)."""
+        try:
+            result = self.supabase.rpc(name, params or {}).execute()
+            return result.data or []
+        except Exception as e:
+            print(f"⚠️  {name} RPC unavailable, aggregating client-side: {e}")
+            return None
+
     def _get_price_statistics_supabase(self) -> Dict[str, Any]:
-        # Supabase implementation
-        # Fetch only necessary column to save bandwidth
-        # Need to iterate because parsing logic is in Python
-        # RPC would be better, but doing client-side for now for compatibility
-        prices = []
+        # stats_price_groups: (raw price string, count) per distinct value;
+        # parsing stays in property_normalize so both backends agree.
+        groups = self._stats_rpc("stats_price_groups")
+        if groups is not None:
+            man = parse_price_yen_batch([row["raw"] for row in groups]) / 10_000
+            counts = np.array([row["n"] for row in groups], dtype=np.int64)
+            keep = man > 0
+            return self._calculate_stats(np.repeat(man[keep], counts[keep]).tolist())
+
+        # Fallback: page through property_data and aggregate client-side
+        price_strs = []
         page_size = 1000
         from_idx = 0
         while True:
@@ -577,69 +1981,58 @@ class Database:
                 break
                 
             for row in result.data:
-                price = self._parse_price_from_dict(row.get("property_data", {}))
-                if price:
-                    prices.append(price)
+                price_strs.append(self._price_str_from_dict(row.get("property_data", {})))
             
             if len(result.data) < page_size:
                 break
             from_idx += page_size
             
-        return self._calculate_stats(prices)
+        return self._calculate_stats(self._prices_man(price_strs))
 
-    def _parse_price_from_dict(self, data: Dict) -> Optional[float]:
-        try:
-            if not isinstance(data, dict): return None
-            price_str = data.get("価格") or data.get("家賃") or data.get("price")
-            if not price_str: return None
-            
-            import re
-            price_str = str(price_str).replace(',', '')
-            
-            if '億' in price_str:
-                match = re.search(r'(\d+)億(\d+)万', price_str)
-                if match:
-                    return float(match.group(1)) * 10000 + float(match.group(2))
-                match = re.search(r'(\d+)億', price_str)
-                if match:
-                    return float(match.group(1)) * 10000
-            elif '万' in price_str:
-                match = re.search(r'([0-9.]+)万', price_str)
-                if match:
-                    return float(match.group(1))
-            else:
-                match = re.search(r'([0-9.]+)', price_str)
-                if match:
-                    return float(match.group(1))
-        except:
+    @staticmethod
+    def _price_str_from_dict(data: Dict) -> Optional[str]:
+        if not isinstance(data, dict):
             return None
-        return None
+        price_str = data.get("価格") or data.get("家賃") or data.get("price")
+        return str(price_str) if price_str else None
 
-    def _extract_prices_from_cursor(self, cursor) -> List[float]:
-        prices = []
-        for row in cursor.fetchall():
-            try:
-                data = json.loads(row[0])
-                p = self._parse_price_from_dict(data)
-                if p: prices.append(p)
-            except:
-                continue
-        return prices
+    @staticmethod
+    def _prices_man(price_strs: List[Optional[str]]) -> List[float]:
+        """価格文字列のリスト → 正の価格（万円、統計 API の単位）のリスト。
+
+        解析は property_normalize.parse_price_yen_batch に一本化（日次レポート・
+        型付きカラム・ダッシュボードの price.ts と同じ規則）。
+        """
+        yen = parse_price_yen_batch(price_strs)
+        yen = yen[yen > 0]
+        return (yen / 10_000).tolist()
+
+    @staticmethod
+    def _interpolate(low: float, high: float, index: float) -> float:
+        """p*(n-1) 番目（0 始まり）の値を前後の 2 値から線形補間する
+        （sales-dashboard/src/lib/price.ts の percentile と同じ規則）"""
+        return low + (high - low) * (index - int(index))
 
     def _calculate_stats(self, prices: List[float]) -> Dict[str, Any]:
         if not prices:
-            return {"average": 0, "median": 0, "min": 0, "max": 0, "count": 0}
+            return dict(EMPTY_PRICE_STATS)
         
         prices.sort()
         count = len(prices)
         median = prices[count // 2] if count % 2 == 1 else (prices[count // 2 - 1] + prices[count // 2]) / 2
+
+        def percentile(p: float) -> float:
+            index = p * (count - 1)
+            return self._interpolate(prices[int(index)], prices[min(int(index) + 1, count - 1)], index)
         
         return {
             "average": round(sum(prices) / count, 1),
             "median": round(median, 1),
             "min": round(min(prices), 1),
             "max": round(max(prices), 1),
-            "count": count
+            "count": count,
+            "percentile25": round(percentile(0.25), 1),
+            "percentile75": round(percentile(0.75), 1),
         }
 
     def get_category_statistics(self) -> Dict[str, Dict[str, Any]]:
@@ -677,14 +2070,22 @@ class Database:
             conn.close()
 
     def _get_category_statistics_supabase(self) -> Dict[str, Dict[str, Any]]:
-        # This requires aggregation which Supabase JS/Py client doesn't do natively easily without RPC
-        # Basic approach: Fetch all 'category, genre_name_ja, category_type, first_seen_date' columns for active=true
-        # Then aggregate in Python.
-        
+        today_str = date.today().isoformat()
+        rows = self._stats_rpc("stats_category_counts", {"p_today": today_str})
+        if rows is not None:
+            return {row["category"]: {
+                "category": row["category"],
+                "genre_name_ja": row.get("genre_name_ja"),
+                "category_type": row.get("category_type"),
+                "count": row["count"],
+                "new_today": row["new_today"]
+            } for row in rows if row.get("category")}
+
+        # Fallback: fetch 'category, genre_name_ja, category_type, first_seen_date' for active=true
+        # and aggregate in Python.
         all_rows = []
         page_size = 1000
         from_idx = 0
-        today_str = date.today().isoformat()
         
         while True:
             result = self.supabase.table("properties")\
@@ -727,24 +2128,37 @@ class Database:
             return self._get_area_distribution_supabase()
             
     def _get_area_distribution_sqlite(self) -> Dict[str, int]:
-        # (Existing SQLite logic)
+        """Count per raw location in SQL (covering index idx_properties_stat_location),
+        then map each distinct location to its city once.
+
+        Groups are visited in order of their first row, so cities keep the
+        first-seen order that breaks ties in the top-10 sort, as before.
+        """
         conn = self._get_sqlite_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT property_data FROM properties WHERE is_active = 1")
+            cursor.execute(f"""
+                SELECT {STAT_LOCATION_SQL} AS location, COUNT(*), MIN(rowid) AS first_row
+                FROM properties
+                WHERE is_active = 1 AND {STAT_LOCATION_SQL} IS NOT NULL
+                GROUP BY location
+                ORDER BY first_row
+            """)
             area_counts = {}
-            for row in cursor.fetchall():
-                if row[0]:
-                    try:
-                        data = json.loads(row[0])
-                        self._count_area(data, area_counts)
-                    except: pass
+            for location, count, _ in cursor.fetchall():
+                city = self._city_from_location(location)
+                if city:
+                    area_counts[city] = area_counts.get(city, 0) + count
             return dict(sorted(area_counts.items(), key=lambda x: x[1], reverse=True)[:10])
         finally:
             conn.close()
 
     def _get_area_distribution_supabase(self) -> Dict[str, int]:
-        # Supabase logic
+        rows = self._stats_rpc("stats_area_distribution", {"p_limit": 10})
+        if rows is not None:
+            return {row["city"]: row["count"] for row in rows}
+
+        # Fallback: page through property_data and count client-side
         area_counts = {}
         page_size = 1000
         from_idx = 0
@@ -765,13 +2179,20 @@ class Database:
         if not isinstance(data, dict): return
         location = data.get("所在地") or data.get("住所") or data.get("location") or data.get("area")
         if not location: return
-        import re
-        location = str(location).replace('沖縄県', '').strip()
-        match = re.search(r'([^市]+市|[^町]+町|[^村]+村)', location)
-        city = match.group(1) if match else location.split()[0]
+        city = self._city_from_location(location)
         if city:
             counts[city] = counts.get(city, 0) + 1
 
+    @staticmethod
+    def _city_from_location(location: Any) -> Optional[str]:
+        """"沖縄県那覇市首里..." → "那覇市"（市町村が見つからなければ先頭の語）"""
+        location = str(location).replace('沖縄県', '').strip()
+        match = CITY_RE.search(location)
+        if match:
+            return match.group(1)
+        parts = location.split()
+        return parts[0] if parts else None
+
     def get_time_based_statistics(self) -> Dict[str, Any]:
         if self.db_type == "sqlite":
             return self._get_time_based_statistics_sqlite()
@@ -807,8 +2228,14 @@ class Database:
             conn.close()
 
     def _get_time_based_statistics_supabase(self) -> Dict[str, Any]:
-        # Supabase Implementation
         today = date.today()
+        # p_today is the client's date, like the fallback below (the DB runs in UTC)
+        rows = self._stats_rpc("stats_time_windows", {"p_today": today.isoformat()})
+        if rows:
+            return {key: rows[0][key] or 0 for key in (
+                "new_today", "new_week", "new_month", "sold_today", "sold_week", "sold_month")}
+
+        # Fallback: six count="exact" head requests
         import datetime
         week_ago = (today - datetime.timedelta(days=7)).isoformat()
         month_ago = (today - datetime.timedelta(days=30)).isoformat()
@@ -840,4 +2267,433 @@ class Database:
             "sold_month": get_count("properties", {"is_active": False, "last_seen_date__gte": month_ago})
         }
 
+    # ================================================================
+    # SUMMARY TABLES
+    # ================================================================
+
+    SUMMARY_META_DIMENSION: str = "_meta"
+    # Bumped when SUMMARY_DIMENSIONS change: older tables count as not built,
+    # so the stats fall back to live queries and the next refresh rebuilds
+    SUMMARY_BUILT_KEY: str = "built:2"
+
+    @classmethod
+    def _summary_member(cls, row: Optional[Dict]) -> Optional[Dict[str, Optional[str]]]:
+        """properties の 1 行 → 集計テーブルでのキー（行がなければ None）"""
+        if not row:
+            return None
+        category = row.get("category")
+        member = dict.fromkeys(SUMMARY_DIMENSIONS)
+        if row.get("is_active"):
+            data = row.get("property_data")
+            if isinstance(data, str):
+                try:
+                    data = json.loads(data)
+                except json.JSONDecodeError:
+                    data = {}
+            data = data if isinstance(data, dict) else {}
+            location = data.get("所在地") or data.get("住所") or data.get("location") or data.get("area")
+            yen = parse_price_yen(cls._price_str_from_dict(data))
+            member.update({
+                "category": category,
+                "category_type": row.get("category_type"),
+                "category_label": f"{category}|{row.get('genre_name_ja') or ''}|{row.get('category_type') or ''}",
+                "city": cls._city_from_location(location) if location else None,
+                "price_band": price_band(category, row.get("price_yen"), row.get("rent_yen")),
+                # Same value get_price_statistics uses (万円, > 0); repr() round-trips exactly
+                "price_man": repr(yen / 10_000) if yen and yen > 0 else None,
+                "new_on": f"{str(row['first_seen_date'])[:10]}|{category}" if row.get("first_seen_date") else None,
+            })
+        elif row.get("last_seen_date"):
+            member["sold_on"] = f"{str(row['last_seen_date'])[:10]}|{category}"
+        return member
+
+    @staticmethod
+    def _summary_keys(member: Optional[Dict[str, Optional[str]]]) -> List[Tuple[str, str]]:
+        if not member:
+            return []
+        return [(dim, member[dim]) for dim in SUMMARY_DIMENSIONS if member.get(dim)]
+
+    def refresh_summary_stats(self, urls: List[str]) -> int:
+        """Apply the current state of `urls` to the summary tables.
+
+        Called at the end of a scrape with the day's new, sold, re-activated
+        and re-scraped URLs. Each URL's previous contribution (stats_members)
+        is subtracted and its current one added, so the cost depends on the
+        number of changed rows, not on the inventory, and re-applying the same
+        URL is a no-op. If the tables were never built, rebuilds them instead.
+        Returns the number of URLs whose contribution changed.
+        """
+        if not self._summary_built():
+            print("Summary tables not built yet - rebuilding from properties")
+            self.rebuild_summary_stats()
+            return 0
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return 0
+        rows = self.get_properties_by_urls(urls, fields=SUMMARY_SOURCE_FIELDS)
+        after = {url: self._summary_member(rows.get(url)) for url in urls}
+        before = self._load_summary_members(urls)
+
+        deltas: Dict[Tuple[str, str], int] = {}
+        changed = {}
+        for url in urls:
+            if before.get(url) == after[url]:
+                continue
+            changed[url] = after[url]
+            for key in self._summary_keys(before.get(url)):
+                deltas[key] = deltas.get(key, 0) - 1
+            for key in self._summary_keys(after[url]):
+                deltas[key] = deltas.get(key, 0) + 1
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if changed:
+            self._apply_summary_changes(changed, deltas)
+        return len(changed)
+
+    def rebuild_summary_stats(self) -> int:
+        """Recompute stats_members / stats_counts from every row of `properties`.
+
+        Repair command (rebuild_summary_stats.py); also runs automatically the
+        first time refresh_summary_stats finds the tables empty.
+        Returns the number of rows scanned.
+        """
+        members: Dict[str, Dict[str, Optional[str]]] = {}
+        counts: Dict[Tuple[str, str], int] = {}
+        for row in self.iter_properties_updated_since():
+            member = self._summary_member(row)
+            members[row["url"]] = member
+            for key in self._summary_keys(member):
+                counts[key] = counts.get(key, 0) + 1
+        counts[(self.SUMMARY_META_DIMENSION, self.SUMMARY_BUILT_KEY)] = 1
+
+        if self.db_type == "sqlite":
+            self._rebuild_summary_stats_sqlite(members, counts)
+        else:
+            self._rebuild_summary_stats_supabase(members, counts)
+        return len(members)
+
+    def get_summary_counts(self, dimension: str, key_from: Optional[str] = None) -> Dict[str, int]:
+        """{key: count} for one dimension (keys >= key_from when given)."""
+        if self.db_type == "sqlite":
+            conn = self._get_sqlite_connection()
+            try:
+                sql = "SELECT key, count FROM stats_counts WHERE dimension = ?"
+                params: List[Any] = [dimension]
+                if key_from is not None:
+                    sql += " AND key >= ?"
+                    params.append(key_from)
+                return dict(conn.execute(sql, params).fetchall())
+            finally:
+                conn.close()
+        else:
+            query = self.supabase.table("stats_counts").select("key, count").eq("dimension", dimension)
+            if key_from is not None:
+                query = query.gte("key", key_from)
+            return {row["key"]: row["count"] for row in query.execute().data or []}
+
+    def get_summary_statistics(self) -> Optional[Dict[str, Any]]:
+        """Dashboard statistics from the summary tables (a few dozen rows).
+
+        Same shapes as get_category_statistics / get_time_based_statistics /
+        get_price_statistics / get_area_distribution, plus totals, by_type and
+        by_price_band. None if the tables have not been built (or cannot be
+        read), so callers can fall back to the live statistics.
+        """
+        try:
+            if not self._summary_built():
+                return None
+            today = date.today()
+            day = lambda days: (today - timedelta(days=days)).isoformat()
+            new_on = self.get_summary_counts("new_on", day(30))
+            sold_on = self.get_summary_counts("sold_on", day(30))
+
+            def window(counts: Dict[str, int], days: int, category: Optional[str] = None) -> int:
+                start = day(days)
+                return sum(n for key, n in counts.items()
+                           if key.split("|", 1)[0] >= start and (category is None or key.endswith(f"|{category}")))
+
+            # Names as stored on the rows (the most common pair per category)
+            labels: Dict[str, Tuple[int, str, str]] = {}
+            for key, count in self.get_summary_counts("category_label").items():
+                cat, genre, cat_type = key.split("|", 2)
+                if cat not in labels or (count, genre, cat_type) > labels[cat]:
+                    labels[cat] = (count, genre, cat_type)
+
+            by_category = {}
+            for cat, count in sorted(self.get_summary_counts("category").items()):
+                _, genre, cat_type = labels.get(cat, (0, "", ""))
+                by_category[cat] = {
+                    "category": cat,
+                    "genre_name_ja": genre or None,
+                    "category_type": cat_type or None,
+                    "count": count,
+                    "new_today": window(new_on, 0, cat),
+                }
+            bands = self.get_summary_counts("price_band")
+            areas = sorted(self.get_summary_counts("city").items(), key=lambda x: (-x[1], x[0]))
+            prices = self.get_summary_counts("price_man")
+            values = np.array([float(key) for key in prices], dtype=np.float64)
+            counts = np.array(list(prices.values()), dtype=np.int64)
+            return {
+                "total_active": sum(c["count"] for c in by_category.values()),
+                "time": {
+                    "new_today": window(new_on, 0), "new_week": window(new_on, 7), "new_month": window(new_on, 30),
+                    "sold_today": window(sold_on, 0), "sold_week": window(sold_on, 7), "sold_month": window(sold_on, 30),
+                },
+                "by_category": by_category,
+                "by_type": self.get_summary_counts("category_type"),
+                "by_area": dict(areas[:10]),
+                "by_price_band": {band: bands[band] for band in PRICE_BANDS if band in bands},
+                "price_stats": self._calculate_stats(np.repeat(values, counts).tolist()),
+            }
+        except Exception as e:
+            print(f"⚠️  Summary tables unavailable: {e}")
+            return None
+
+    def _summary_built(self) -> bool:
+        return self.SUMMARY_BUILT_KEY in self.get_summary_counts(self.SUMMARY_META_DIMENSION)
+
+    def _load_summary_members(self, urls: List[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        columns = ["url", *SUMMARY_DIMENSIONS]
+        if self.db_type == "sqlite":
+            conn = self._get_sqlite_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("CREATE TEMP TABLE IF NOT EXISTS summary_urls (url TEXT PRIMARY KEY)")
+                cursor.execute("DELETE FROM summary_urls")
+                cursor.executemany("INSERT OR IGNORE INTO summary_urls (url) VALUES (?)", ((u,) for u in urls))
+                cursor.execute(f"""
+                    SELECT {", ".join("m." + c for c in columns)} FROM stats_members m
+                    JOIN summary_urls s ON s.url = m.url
+                """)
+                members = {row[0]: dict(zip(SUMMARY_DIMENSIONS, row[1:])) for row in cursor.fetchall()}
+                cursor.execute("DROP TABLE IF EXISTS temp.summary_urls")
+                return members
+            finally:
+                conn.close()
+
+        members = {}
+        for i in range(0, len(urls), self.LOOKUP_BATCH_SIZE):
+            result = self.supabase.table("stats_members")\
+                .select(", ".join(columns))\
+                .in_("url", urls[i:i + self.LOOKUP_BATCH_SIZE])\
+                .execute()
+            for row in result.data or []:
+                members[row["url"]] = {dim: row.get(dim) for dim in SUMMARY_DIMENSIONS}
+        return members
+
+    def _apply_summary_changes(self, changed: Dict[str, Optional[Dict[str, Optional[str]]]],
+                               deltas: Dict[Tuple[str, str], int]) -> None:
+        upserts = [{"url": url, **member} for url, member in changed.items() if member]
+        removed = [url for url, member in changed.items() if not member]
+        if self.db_type == "sqlite":
+            conn = self._get_sqlite_connection()
+            cursor = conn.cursor()
+            try:
+                placeholders = ", ".join("?" for _ in range(len(SUMMARY_DIMENSIONS) + 1))
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO stats_members (url, {', '.join(SUMMARY_DIMENSIONS)}) VALUES ({placeholders})",
+                    ([row["url"], *(row[dim] for dim in SUMMARY_DIMENSIONS)] for row in upserts),
+                )
+                cursor.executemany("DELETE FROM stats_members WHERE url = ?", ((url,) for url in removed))
+                cursor.executemany("""
+                    INSERT INTO stats_counts (dimension, key, count) VALUES (?, ?, ?)
+                    ON CONFLICT(dimension, key) DO UPDATE SET count = count + excluded.count
+                """, ((dim, key, delta) for (dim, key), delta in deltas.items()))
+                cursor.execute("DELETE FROM stats_counts WHERE count = 0")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            return
+
+        for i in range(0, len(upserts), self.LOOKUP_BATCH_SIZE):
+            self.supabase.table("stats_members").upsert(upserts[i:i + self.LOOKUP_BATCH_SIZE], on_conflict="url").execute()
+        for i in range(0, len(removed), self.LOOKUP_BATCH_SIZE):
+            self.supabase.table("stats_members").delete().in_("url", removed[i:i + self.LOOKUP_BATCH_SIZE]).execute()
+        if deltas:
+            self.supabase.rpc("apply_stats_deltas", {"p_deltas": [
+                {"dimension": dim, "key": key, "delta": delta} for (dim, key), delta in deltas.items()
+            ]}).execute()
+
+    def _rebuild_summary_stats_sqlite(self, members: Dict[str, Optional[Dict[str, Optional[str]]]],
+                                      counts: Dict[Tuple[str, str], int]) -> None:
+        conn = self._get_sqlite_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM stats_members")
+            cursor.execute("DELETE FROM stats_counts")
+            placeholders = ", ".join("?" for _ in range(len(SUMMARY_DIMENSIONS) + 1))
+            cursor.executemany(
+                f"INSERT INTO stats_members (url, {', '.join(SUMMARY_DIMENSIONS)}) VALUES ({placeholders})",
+                ([url, *(member[dim] for dim in SUMMARY_DIMENSIONS)] for url, member in members.items()),
+            )
+            cursor.executemany(
+                "INSERT INTO stats_counts (dimension, key, count) VALUES (?, ?, ?)",
+                ((dim, key, count) for (dim, key), count in counts.items()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _rebuild_summary_stats_supabase(self, members: Dict[str, Optional[Dict[str, Optional[str]]]],
+                                        counts: Dict[Tuple[str, str], int]) -> None:
+        # PostgREST refuses an unfiltered DELETE; these filters match every row
+        self.supabase.table("stats_counts").delete().neq("dimension", "").execute()
+        self.supabase.table("stats_members").delete().neq("url", "").execute()
+        rows = [{"url": url, **member} for url, member in members.items()]
+        for i in range(0, len(rows), 500):
+            self.supabase.table("stats_members").insert(rows[i:i + 500]).execute()
+        count_rows = [{"dimension": dim, "key": key, "count": count} for (dim, key), count in counts.items()]
+        for i in range(0, len(count_rows), 500):
+            self.supabase.table("stats_counts").insert(count_rows[i:i + 500]).execute()
+
+    # ================================================================
+    # FACET INDEX
+    # ================================================================
+
+    @classmethod
+    def _facet_member(cls, row: Dict) -> Dict[str, Optional[str]]:
+        """有効な物件の 1 行 → ファセットの値（facet_index.FACETS。値がなければ None）"""
+        data = row.get("property_data")
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                data = {}
+        data = data if isinstance(data, dict) else {}
+        location = data.get("所在地") or data.get("住所") or data.get("location") or data.get("area")
+        pet = str(data.get("ペット") or data.get("ペット飼育") or "")
+        parking = data.get("駐車場")
+        category = row.get("category")
+        return {
+            "category": category,
+            "category_type": row.get("category_type"),
+            "city": cls._city_from_location(location) if location else None,
+            "layout": row.get("layout"),
+            "price_band": price_band(category, row.get("price_yen"), row.get("rent_yen")),
+            "pet": "true" if PET_OK_RE.search(pet.replace("不可", "")) else "false",
+            # 駐車場カテゴリの物件は駐車場そのもの
+            "parking": "true" if category == "parking" or (parking and not PARKING_NONE_RE.search(str(parking)))
+                       else "false",
+        }
+
+    def build_facet_index(self) -> FacetIndex:
+        """Facet index of the active listings, read with one streamed scan."""
+        built_at = datetime.now().isoformat(timespec="seconds")
+        rows = self.iter_properties({"is_active": True}, FACET_SOURCE_FIELDS)
+        return FacetIndex.build(((int(cursor), self._facet_member(row)) for cursor, row in rows), built_at)
+
+    def rebuild_facet_index(self) -> int:
+        """Build the facet index and store it for the API servers; returns the listings indexed.
+
+        Run by the scraper after each run (before bump_data_version, which
+        makes the servers reload it) and by rebuild_facet_index.py.
+        Supabase requires supabase_facet_index_migration.sql.
+        """
+        index = self.build_facet_index()
+        blob = index.to_bytes()
+        # Microseconds, so two rebuilds within a second still differ (get_facet_index_built_at)
+        built_at = datetime.now().isoformat()
+        if self.db_type == "sqlite":
+            with self._sqlite_transaction() as conn:
+                conn.execute("""
+                    INSERT INTO facet_index (id, data, property_count, built_at) VALUES (1, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        data = excluded.data,
+                        property_count = excluded.property_count,
+                        built_at = excluded.built_at
+                """, (sqlite3.Binary(blob), len(index), built_at))
+        else:
+            self.supabase.table("facet_index").upsert({
+                "id": 1,
+                "data": base64.b64encode(blob).decode("ascii"),
+                "property_count": len(index),
+                "built_at": built_at,
+            }, on_conflict="id").execute()
+        return len(index)
+
+    def load_facet_index(self) -> Optional[FacetIndex]:
+        """The stored facet index, or None if it has not been built (or cannot be read)."""
+        try:
+            if self.db_type == "sqlite":
+                conn = self._get_sqlite_connection()
+                try:
+                    row = conn.execute("SELECT data FROM facet_index WHERE id = 1").fetchone()
+                finally:
+                    conn.close()
+                blob = row[0] if row else None
+            else:
+                result = self.supabase.table("facet_index").select("data").eq("id", 1).execute()
+                blob = base64.b64decode(result.data[0]["data"]) if result.data else None
+            return FacetIndex.from_bytes(blob) if blob else None
+        except Exception as e:
+            print(f"⚠️  Facet index unavailable: {e}")
+            return None
+
+    def get_facet_index_built_at(self) -> Optional[str]:
+        """built_at of the stored facet index (one small row; the servers use it
+        to notice a rebuild when there is no data version), or None."""
+        try:
+            if self.db_type == "sqlite":
+                conn = self._get_sqlite_connection()
+                try:
+                    row = conn.execute("SELECT built_at FROM facet_index WHERE id = 1").fetchone()
+                finally:
+                    conn.close()
+                return str(row[0]) if row and row[0] is not None else None
+            result = self.supabase.table("facet_index").select("built_at").eq("id", 1).execute()
+            return str(result.data[0]["built_at"]) if result.data else None
+        except Exception:
+            return None
+
+    # ================================================================
+    # DATA VERSION
+    # ================================================================
+
+    def get_data_version(self) -> Optional[int]:
+        """Current data version, or None if it cannot be read (the API then
+        serves uncached responses rather than risk stale ones)."""
+        try:
+            if self.db_type == "sqlite":
+                conn = self._get_sqlite_connection()
+                try:
+                    row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+                finally:
+                    conn.close()
+                return row[0] if row else None
+            else:
+                result = self.supabase.table("data_version").select("version").eq("id", 1).execute()
+                return result.data[0]["version"] if result.data else None
+        except Exception as e:
+            print(f"⚠️  Could not read data version: {e}")
+            return None
+
+    def bump_data_version(self) -> Optional[int]:
+        """Increment the data version after a batch of writes; returns the new version.
+
+        Call once per committed batch (end of a scrape run, rebuild, backfill,
+        import) rather than per row. Supabase requires
+        supabase_data_version_migration.sql.
+        """
+        try:
+            if self.db_type == "sqlite":
+                with self._sqlite_transaction() as conn:
+                    conn.execute("""
+                        UPDATE data_version SET version = version + 1, bumped_at = CURRENT_TIMESTAMP
+                        WHERE id = 1
+                    """)
+                    row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+                return row[0] if row else None
+            else:
+                return self.supabase.rpc("bump_data_version", {}).execute().data
+        except Exception as e:
+            print(f"⚠️  Could not bump data version: {e}")
+            return None
+
+# Backend setup is deferred to first use (see Database.initialize)
 db = Database()
@@ -3,7 +3,6 @@
 """
 
 from database import db
-import sqlite3
 
 print("サンプルデータを削除中...")
 
@@ -17,23 +16,14 @@ sample_urls = [
     "https://www.e-uchina.net/bukken/jigyo/sample-006/detail.html"
 ]
 
-if db.db_type == "sqlite":
-    conn = sqlite3.connect(db.db_path)
-    cursor = conn.cursor()
-    
-    deleted_count = 0
-    for url in sample_urls:
-        cursor.execute("DELETE FROM properties WHERE url = ?", (url,))
-        deleted_count += cursor.rowcount
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"✓ {deleted_count}件のサンプルデータを削除しました")
-else:
-    # Supabase
-    for url in sample_urls:
-        db.supabase.table("properties").delete().eq("url", url).execute()
-    print(f"✓ サンプルデータを削除しました")
+deleted_count = db.delete_properties(sample_urls)
+
+# 集計テーブル・ファセット索引からも外してから API のキャッシュを無効化
+if deleted_count:
+    db.refresh_summary_stats(sample_urls)
+    db.rebuild_facet_index()
+    db.bump_data_version()
+
+print(f"✓ {deleted_count}件のサンプルデータを削除しました")
 
 print("\n完了！ダッシュボードをリロードしてください。")
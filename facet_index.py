@@ -0,0 +1,177 @@
+"""
+Facet index for faceted navigation (/api/facets, /api/properties/filter).
+
+The active listings are numbered 0..n-1 in id order (SQLite rowid /
+Supabase id), and every (facet, value) pair — city=那覇市, layout=3LDK,
+pet=true, ... — gets a bitmap with one bit per listing, packed 8 per byte.
+A filter is OR within a facet and AND across facets, i.e. a few bitwise
+ORs / ANDs over n/8 bytes, and a count is a popcount of the result, so the
+cost does not depend on how many rows a filter matches or on the JSON in
+property_data. Counts are disjunctive: the values of a facet are counted
+with the filters on all *other* facets, which is what a filter sidebar
+shows next to each checkbox.
+
+Database.build_facet_index() fills it from the active rows (the facet
+values of a row are Database._facet_member); the scraper rebuilds and
+stores it after each run, and the API server reloads it when the data
+version changes. The stored form (to_bytes) is zlib-compressed: bitmaps of
+rare values are mostly zero bytes and shrink to almost nothing.
+"""
+
+import json
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FACET_INDEX_FORMAT_VERSION: bytes = b"\x01"
+
+# Facets in the order the API returns them. Boolean facets have the values
+# "true" / "false"; a row without a value for a facet is in none of its bitmaps.
+FACETS: Tuple[str, ...] = ("category", "category_type", "city", "layout", "price_band", "pet", "parking")
+BOOLEAN_FACETS: Tuple[str, ...] = ("pet", "parking")
+
+# Set bits per byte value (numpy 1.26 has no bitwise_count)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class FacetIndex:
+    """Bitmaps per facet value over the sorted ids of the active listings."""
+
+    def __init__(self, ids: np.ndarray, bitmaps: Dict[str, Dict[str, np.ndarray]],
+                 built_at: Optional[str] = None):
+        self.ids = ids
+        self.bitmaps = bitmaps
+        self.built_at = built_at
+        self._all = np.packbits(np.ones(len(ids), dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, members: Iterable[Tuple[int, Dict[str, Optional[str]]]],
+              built_at: Optional[str] = None) -> "FacetIndex":
+        """Index (id, {facet: value}) pairs; ids must be unique."""
+        ids: List[int] = []
+        positions: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for i, (row_id, member) in enumerate(members):
+            ids.append(row_id)
+            for facet in FACETS:
+                value = member.get(facet)
+                if value is not None:
+                    positions[facet].setdefault(value, []).append(i)
+
+        ids_arr = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids_arr, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))     # insertion position -> position in id order
+        bitmaps = {}
+        for facet in FACETS:
+            bitmaps[facet] = {}
+            for value, pos in sorted(positions[facet].items()):
+                mask = np.zeros(len(ids), dtype=bool)
+                mask[rank[np.asarray(pos, dtype=np.int64)]] = True
+                bitmaps[facet][value] = np.packbits(mask)
+        return cls(ids_arr[order], bitmaps, built_at)
+
+    # ---- queries ---------------------------------------------------------
+
+    def validate(self, filters: Dict[str, List[str]]) -> None:
+        for facet in filters:
+            if facet not in FACETS:
+                raise ValueError(f"Invalid facet: {facet}")
+
+    def match(self, filters: Dict[str, List[str]], skip: Optional[str] = None) -> np.ndarray:
+        """Packed bitmap of the listings matching filters (ignoring the facet `skip`)."""
+        self.validate(filters)
+        bits = self._all
+        for facet, values in filters.items():
+            if facet == skip or not values:
+                continue
+            bitmaps = self.bitmaps.get(facet, {})
+            selected = np.zeros_like(self._all)
+            for value in values:
+                if value in bitmaps:
+                    selected |= bitmaps[value]
+            bits = bits & selected
+        return bits
+
+    @staticmethod
+    def count(bits: np.ndarray) -> int:
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    def counts(self, filters: Dict[str, List[str]]) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """(matching listings, {facet: {value: count}}) for a filter combination.
+
+        Each facet is counted under the filters of the other facets; values
+        with no matching listing are left out unless they are selected.
+        """
+        matched = self.match(filters)
+        total = self.count(matched)
+        facets: Dict[str, Dict[str, int]] = {}
+        for facet in FACETS:
+            base = self.match(filters, skip=facet) if filters.get(facet) else matched
+            counts = {value: self.count(base & bitmap) for value, bitmap in self.bitmaps.get(facet, {}).items()}
+            selected = filters.get(facet, [])
+            facets[facet] = dict(sorted(
+                ((value, n) for value, n in {**dict.fromkeys(selected, 0), **counts}.items()
+                 if n or value in selected),
+                key=lambda kv: (-kv[1], kv[0]),
+            ))
+        return total, facets
+
+    def page(self, filters: Dict[str, List[str]], after: Optional[str] = None,
+             limit: int = 20) -> Tuple[List[int], Optional[str], int]:
+        """(ids newest first, next_cursor, total matches) for one page of a filter.
+
+        `after` is the next_cursor of the previous page (the last id it
+        returned); next_cursor is None on the last page.
+        """
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        try:
+            after_id = int(after) if after else None
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {after}")
+        bits = self.match(filters)
+        ids = self.ids[np.flatnonzero(np.unpackbits(bits, count=len(self.ids)))][::-1]
+        total = len(ids)
+        if after_id is not None:
+            ids = ids[np.searchsorted(-ids, -after_id, side="right"):]
+        page = ids[:limit].tolist()
+        next_cursor = str(page[-1]) if len(ids) > limit else None
+        return page, next_cursor, total
+
+    # ---- storage ---------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Version byte + zlib(header length, JSON header, id deltas, bitmaps)."""
+        values = {facet: list(self.bitmaps.get(facet, {})) for facet in FACETS}
+        header = json.dumps({"count": len(self.ids), "built_at": self.built_at, "values": values},
+                            ensure_ascii=False).encode("utf-8")
+        deltas = np.diff(self.ids, prepend=0).astype("<u4")
+        parts = [struct.pack("<I", len(header)), header, deltas.tobytes()]
+        parts.extend(self.bitmaps[facet][value].tobytes() for facet in FACETS for value in values[facet])
+        return FACET_INDEX_FORMAT_VERSION + zlib.compress(b"".join(parts), 6)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "FacetIndex":
+        blob = bytes(blob)
+        if blob[:1] != FACET_INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unknown facet index format: {blob[:1]!r}")
+        payload = zlib.decompress(blob[1:])
+        (header_len,) = struct.unpack_from("<I", payload)
+        header = json.loads(payload[4:4 + header_len].decode("utf-8"))
+        n = header["count"]
+        offset = 4 + header_len
+        ids = np.cumsum(np.frombuffer(payload, dtype="<u4", count=n, offset=offset), dtype=np.int64)
+        offset += 4 * n
+        size = (n + 7) // 8
+        bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        for facet in FACETS:
+            bitmaps[facet] = {}
+            for value in header["values"].get(facet, []):
+                bitmaps[facet][value] = np.frombuffer(payload, dtype=np.uint8, count=size, offset=offset)
+                offset += size
+        return cls(ids, bitmaps, header.get("built_at"))
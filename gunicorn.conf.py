@@ -0,0 +1,40 @@
+"""
+gunicorn settings for the API (gunicorn -c gunicorn.conf.py wsgi:app).
+
+Preforked workers with threads (gthread): requests are served in parallel
+across API_WORKERS processes × API_THREADS threads instead of serializing on
+the development server's single process. Each worker imports the app itself
+(no preload), so it owns its database handles, response cache and cache
+refresher thread — nothing opened before the fork is shared.
+"""
+
+# Imported under another name: gunicorn reads every module-level name here as
+# a setting, and `config` is one of its own
+from config import config as app_config
+
+bind = f"{app_config.API_HOST}:{app_config.API_PORT}"
+workers = app_config.API_WORKERS
+worker_class = "gthread"
+threads = app_config.API_THREADS
+preload_app = False
+
+# Full dumps of /api/properties/all stream for a few seconds; stats
+# computations without summary tables take well under this
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# No max_requests: recycling a worker empties its response cache and drops
+# its keep-alive connections mid-burst
+
+accesslog = "-"
+errorlog = "-"
+loglevel = app_config.LOG_LEVEL.lower()
+
+
+def post_worker_init(worker):
+    """Warm the response cache in every worker and keep it warm (threads do not survive fork)."""
+    from wsgi import response_cache, app
+    from database import db
+    db.initialize()   # backend setup is lazy; do it before the worker takes requests
+    response_cache.start_refresher(app, app_config.API_CACHE_WARM_PATHS, app_config.API_CACHE_WARM_HOT_KEYS)
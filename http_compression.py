@@ -0,0 +1,82 @@
+"""
+gzip / brotli content negotiation for the Flask API (server.py).
+
+- negotiate(): picks br or gzip from the request's Accept-Encoding
+- compress(): one-shot, used for cached bodies (compressed once per data
+  version, see response_cache.py) and for small uncached JSON responses
+- compress_stream(): incremental, flushed after every chunk so a streaming
+  client can decode the first rows before the dump is complete
+
+brotli is optional (pip install brotli); without it only gzip is offered.
+"""
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5            # 11 is several times slower for a few % smaller bodies
+MIN_COMPRESS_BYTES = 1024     # below this the headers cost more than they save
+
+
+def available_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding) -> Optional[str]:
+    """Best encoding the client accepts (werkzeug MIMEAccept-like object), or None."""
+    for encoding in available_encodings():
+        if accept_encoding[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)   # 31: gzip container
+        return compressor.compress(body) + compressor.flush()
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Encode a chunked body on the fly; every input chunk is flushed."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    elif encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    for chunk in chunks:
+        out = process(chunk) + flush()
+        if out:
+            yield out
+    yield finish()
+
+
+def compress_response(response, accept_encoding):
+    """after_request hook body: compress a plain (non-streamed) JSON response in place."""
+    if (response.is_streamed or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype != "application/json"):
+        return response
+    body = response.get_data()
+    encoding = negotiate(accept_encoding)
+    response.vary.add("Accept-Encoding")
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -2,30 +2,96 @@
 売約済み物件の画像アーカイブモジュール
 
 売約検出時に物件写真をDL → WebP 400px圧縮 → Supabase Storageにアップロード
+（ARCHIVE_STORAGE_BACKEND=local でローカルディレクトリに保存）
 - cdn.e-uchina.net の画像のみ（YouTube等の案内画像を除外）
 - 1物件あたり最大3枚（先頭・中間・末尾）
 - WebP 400px で約1.5KB/枚 → 月13.5MB → 1GBで6年持つ
+
+パイプライン構成（archive_sold_properties）:
+- DL / アップロード: 共有 requests.Session（コネクションプール）+ スレッドプール
+- デコード / リサイズ / WebP エンコード: プロセスプール（CPUバウンド）
+- 各ステージの所要時間を集計して表示
+
+重複排除（ArchiveIndex）:
+- Storage パスは画像の知覚ハッシュ（dHash）で決まる content-addressed 形式
+- ローカル索引（SQLite）に「元画像URL → 保存先」「知覚ハッシュ → 保存先」を記録
+- 既知のURL・同じキーの画像はDL/圧縮/アップロードせず既存オブジェクトを参照
+- 近似一致（Hamming 距離）は ARCHIVE_HASH_DISTANCE を設定したときだけ、
+  同じ物件の画像の間に限って使う
+- 索引は実行環境のローカルファイル。GitHub Actions ではワークフローの
+  actions/cache で実行をまたいで引き継ぐ（キャッシュが消えた回は索引が空から
+  始まり、同じ画像も再アップロードされる）
 """
 
 import os
 import io
 import json
+import time
+import sqlite3
 import hashlib
+import threading
+import multiprocessing
 import requests
-from PIL import Image
-from datetime import datetime
-from typing import List, Optional
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from PIL import Image   # imported lazily at runtime (see _compress_and_hash)
+
 load_dotenv()
 
 # NextCodeプロジェクトのStorageを使用（.envから読み込み）
 SUPABASE_URL = os.getenv("STORAGE_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("STORAGE_SUPABASE_KEY")
 STORAGE_BUCKET = "sold-property-images"
+# "supabase" (default) or "local". local writes objects under
+# ARCHIVE_LOCAL_DIR/{bucket}/{path} — same layout as Supabase Storage — so the
+# pipeline can be benchmarked and tested offline.
+ARCHIVE_STORAGE_BACKEND = os.getenv("ARCHIVE_STORAGE_BACKEND", "supabase")
+ARCHIVE_LOCAL_DIR = os.getenv("ARCHIVE_LOCAL_DIR", os.path.join("output", "storage"))
+ARCHIVE_LOCAL_PUBLIC_URL = os.getenv("ARCHIVE_LOCAL_PUBLIC_URL", "")
 WEBP_MAX_SIZE = 400  # px (long side)
 WEBP_QUALITY = 60
 MAX_IMAGES_PER_PROPERTY = 3
+# Listing photos are a few MB at most; anything bigger is not a photo we want
+# and is dropped before it is fully buffered.
+MAX_DOWNLOAD_BYTES = int(os.getenv("ARCHIVE_MAX_DOWNLOAD_BYTES", str(20 * 1024 * 1024)))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Pipeline sizing. IO workers share one pooled Session for DL + upload;
+# CPU workers are processes (0 = compress inline in a thread, e.g. when
+# multiprocessing is unavailable).
+ARCHIVE_IO_WORKERS = int(os.getenv("ARCHIVE_IO_WORKERS", "8"))
+ARCHIVE_CPU_WORKERS = int(os.getenv("ARCHIVE_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Local dedupe index. Identical keys are shared across all listings. A
+# Hamming distance <= ARCHIVE_HASH_DISTANCE (out of 64 bits) also counts as
+# "the same photo", but only among the images of the same listing: floor
+# plans, maps and agent placeholders of different listings often land within
+# a few bits of each other. 0 (default) = exact keys only.
+# Empty = use the storage backend's default (the index must not mix public
+# URLs from different backends).
+ARCHIVE_INDEX_PATH = os.getenv("ARCHIVE_INDEX_PATH", "")
+ARCHIVE_HASH_DISTANCE = int(os.getenv("ARCHIVE_HASH_DISTANCE", "0"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Shared keep-alive Session — one TLS handshake per host, not per image."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(ARCHIVE_IO_WORKERS, 1))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
 
 
 def _filter_property_images(image_urls: List[str]) -> List[str]:
@@ -50,138 +116,524 @@ def _pick_representative_images(urls: List[str], max_count: int = MAX_IMAGES_PER
     return result[:max_count]
 
 
-def _download_and_compress(url: str) -> Optional[bytes]:
-    """画像をDLしてWebP 400pxに圧縮"""
+def _parse_image_list(images_json: Any) -> List[str]:
+    """JSON配列文字列 or list を画像URLのlistに正規化"""
+    if isinstance(images_json, str):
+        try:
+            image_urls = json.loads(images_json)
+        except (ValueError, TypeError):
+            return []
+    elif isinstance(images_json, list):
+        image_urls = images_json
+    else:
+        return []
+    return image_urls if isinstance(image_urls, list) else []
+
+
+def _select_images(images_json: Any) -> List[str]:
+    """アーカイブ対象の画像URLを選択（フィルタ + 代表画像）"""
+    return _pick_representative_images(_filter_property_images(_parse_image_list(images_json)))
+
+
+# Prefix for keys that are a byte digest rather than a perceptual hash
+CONTENT_KEY_PREFIX = "c"
+
+
+def _image_key(data: bytes, dhash: str) -> str:
+    """重複排除キー: 通常は知覚ハッシュ、情報量の少ない画像はバイト列のダイジェスト
+
+    単色・ノイズ状の画像は 9x8 に縮めると平坦になり dHash がほぼ全 0 / 全 1 に
+    潰れる。こうした画像を「見た目が同じ」と扱わないよう、立っているビット数が
+    偏ったハッシュは完全一致（SHA-256）でのみ重複判定する。
+    """
+    bits = int(dhash, 16).bit_count()
+    if 8 <= bits <= 56:
+        return dhash
+    return CONTENT_KEY_PREFIX + hashlib.sha256(data).hexdigest()[:16]
+
+
+def _archive_path(category: str, image_key: str) -> str:
+    """画像キーからStorageパスを生成（content-addressed）"""
+    return f"{category}/{image_key[:2]}/{image_key}.webp"
+
+
+class ArchiveIndex:
+    """アーカイブ済み画像のローカル索引（元URL / 知覚ハッシュ → 保存先）"""
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or ARCHIVE_INDEX_PATH or get_storage().index_path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30.0)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS archived_images (
+                source_url TEXT PRIMARY KEY,
+                image_hash TEXT NOT NULL,
+                storage_path TEXT NOT NULL,
+                public_url TEXT NOT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_archived_images_hash ON archived_images(image_hash);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(archived_images)")}
+        if "property_url" not in columns:
+            # Indexes written before near-duplicate matching was scoped per listing
+            self.conn.execute("ALTER TABLE archived_images ADD COLUMN property_url TEXT")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archived_images_property ON archived_images(property_url)")
+        self.conn.commit()
+
+    def lookup_url(self, source_url: str) -> Optional[Tuple[str, str]]:
+        """元画像URL → (storage_path, public_url)"""
+        row = self.conn.execute(
+            "SELECT storage_path, public_url FROM archived_images WHERE source_url = ?", (source_url,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def lookup_hash(self, image_hash: str, property_url: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """完全一致（全物件）→ 同じ物件の Hamming距離 ARCHIVE_HASH_DISTANCE 以内の順に検索"""
+        row = self.conn.execute(
+            "SELECT storage_path, public_url FROM archived_images WHERE image_hash = ? LIMIT 1",
+            (image_hash,),
+        ).fetchone()
+        if row:
+            return row[0], row[1]
+        if ARCHIVE_HASH_DISTANCE <= 0 or not property_url or image_hash.startswith(CONTENT_KEY_PREFIX):
+            return None
+        value = int(image_hash, 16)
+        best = None
+        best_distance = ARCHIVE_HASH_DISTANCE + 1
+        for known, storage_path, public_url in self.conn.execute(
+                "SELECT image_hash, storage_path, public_url FROM archived_images WHERE property_url = ?",
+                (property_url,)):
+            if known.startswith(CONTENT_KEY_PREFIX):
+                continue
+            distance = (int(known, 16) ^ value).bit_count()
+            if distance < best_distance:
+                best, best_distance = (storage_path, public_url), distance
+        return best
+
+    def record(self, source_url: str, image_hash: str, storage_path: str, public_url: str,
+               property_url: Optional[str] = None) -> None:
+        self.conn.execute("""
+            INSERT INTO archived_images (source_url, image_hash, storage_path, public_url, property_url)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source_url) DO UPDATE SET
+                image_hash = excluded.image_hash,
+                storage_path = excluded.storage_path,
+                public_url = excluded.public_url,
+                property_url = excluded.property_url
+        """, (source_url, image_hash, storage_path, public_url, property_url))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _download(url: str) -> Optional[bytes]:
+    """画像をDL（共有Session使用、MAX_DOWNLOAD_BYTES を超えたら中断）"""
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
+        with _get_session().get(url, timeout=10, stream=True) as resp:
+            resp.raise_for_status()
+            declared = resp.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > MAX_DOWNLOAD_BYTES:
+                print(f"  Image too large ({declared} bytes), skipped: {url}")
+                return None
+            buf = bytearray()
+            for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                buf.extend(chunk)
+                if len(buf) > MAX_DOWNLOAD_BYTES:
+                    print(f"  Image exceeded {MAX_DOWNLOAD_BYTES} bytes, skipped: {url}")
+                    return None
+            return bytes(buf)
+    except Exception as e:
+        print(f"  Image download failed: {url} - {e}")
+        return None
 
-        img = Image.open(io.BytesIO(resp.content))
 
-        # RGBA → RGB (WebP with transparency is larger)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
+def _target_size(w: int, h: int) -> Tuple[int, int]:
+    """長辺を WEBP_MAX_SIZE に合わせた出力サイズ（縦横比維持）"""
+    if max(w, h) <= WEBP_MAX_SIZE:
+        return w, h
+    ratio = WEBP_MAX_SIZE / max(w, h)
+    return int(w * ratio), int(h * ratio)
+
+
+def _dhash(img: "Image.Image") -> str:
+    """64bit の差分ハッシュ（dHash）を16進文字列で返す
+
+    9x8 グレースケールに縮小して横方向の輝度差を符号化する。再圧縮・
+    リサイズ程度の差では数ビットしか変わらない。
+    """
+    from PIL import Image
+
+    small = img.convert("L").resize((9, 8), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return f"{value:016x}"
 
-        # Resize (long side to WEBP_MAX_SIZE, keep aspect ratio)
+
+def _compress(raw: bytes) -> Optional[bytes]:
+    """画像バイト列をWebP 400pxに圧縮"""
+    result = _compress_and_hash(raw)
+    return result[0] if result else None
+
+
+def _compress_and_hash(raw: bytes) -> Optional[Tuple[bytes, str]]:
+    """画像バイト列をWebP 400pxに圧縮し、知覚ハッシュも返す（プロセスプールから呼ばれる）
+
+    JPEG は draft() で DCT スケーリングを使い、400px 近くまで縮小した状態で
+    デコードする（1/2, 1/4, 1/8）。数メガピクセルの写真でも全画素を展開しない。
+    PIL はここで読み込む（スクレイパー本体や売約のない実行では不要）。
+    """
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(raw))
         w, h = img.size
-        if max(w, h) > WEBP_MAX_SIZE:
-            ratio = WEBP_MAX_SIZE / max(w, h)
-            img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
+        target = _target_size(w, h)
+
+        # Already a small WebP: nothing to gain from re-encoding
+        if img.format == "WEBP" and target == (w, h):
+            return raw, _dhash(img)
+
+        if img.format == "JPEG" and target != (w, h):
+            # draft() never goes below the requested size, so the LANCZOS
+            # pass below still does the final (high quality) downscale.
+            img.draft("RGB", target)
+
+        # RGBA → RGB (WebP with transparency is larger); RGB/L are encoded as-is
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        # Resize (long side to WEBP_MAX_SIZE, keep aspect ratio). reducing_gap
+        # lets non-JPEG sources shrink by integer reduce() before LANCZOS.
+        if img.size != target:
+            img = img.resize(target, Image.LANCZOS, reducing_gap=3.0)
 
         # Compress to WebP
         buf = io.BytesIO()
         img.save(buf, format="WEBP", quality=WEBP_QUALITY)
-        return buf.getvalue()
+        return buf.getvalue(), _dhash(img)
     except Exception as e:
-        print(f"  Image download/compress failed: {url} - {e}")
+        print(f"  Image compress failed: {e}")
         return None
 
 
-def _upload_to_supabase(data: bytes, path: str) -> Optional[str]:
-    """Supabase Storageにアップロード（既存ファイルは上書き）"""
-    try:
-        upload_url = f"{SUPABASE_URL}/storage/v1/object/{STORAGE_BUCKET}/{path}"
-        headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Content-Type": "image/webp",
-            "x-upsert": "true",
+def _download_and_compress(url: str) -> Optional[bytes]:
+    """画像をDLしてWebP 400pxに圧縮"""
+    raw = _download(url)
+    if raw is None:
+        return None
+    return _compress(raw)
+
+
+def _timed_download(url: str) -> Tuple[Optional[bytes], float]:
+    start = time.perf_counter()
+    return _download(url), time.perf_counter() - start
+
+
+def _timed_compress(raw: bytes) -> Tuple[Optional[Tuple[bytes, str]], float]:
+    # Top-level so it pickles into the process pool; time is measured in the
+    # worker so queueing delay is not counted as compress time.
+    start = time.perf_counter()
+    return _compress_and_hash(raw), time.perf_counter() - start
+
+
+def _timed_upload(data: bytes, path: str) -> Tuple[Optional[str], float]:
+    start = time.perf_counter()
+    return get_storage().upload(data, path), time.perf_counter() - start
+
+
+def _make_cpu_pool(task_count: int) -> Executor:
+    """WebP圧縮用のプロセスプールを作成（使えない環境ではスレッドにフォールバック）"""
+    workers = min(ARCHIVE_CPU_WORKERS, task_count)
+    if workers > 0:
+        try:
+            # spawn: the scraper process holds Playwright threads, and forking
+            # a multithreaded process can deadlock the child.
+            return ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context("spawn"))
+        except (OSError, NotImplementedError, ValueError) as e:
+            print(f"  Process pool unavailable ({e}); compressing in threads.")
+    return ThreadPoolExecutor(max_workers=1)
+
+
+class SupabaseStorage:
+    """Supabase Storage REST API バックエンド"""
+
+    name = "supabase"
+    index_path = os.path.join("output", "image_archive_index.db")
+
+    def __init__(self, url: Optional[str] = SUPABASE_URL, key: Optional[str] = SUPABASE_KEY,
+                 bucket: str = STORAGE_BUCKET):
+        self.url = url
+        self.key = key
+        self.bucket = bucket
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
         }
-        resp = requests.post(upload_url, headers=headers, data=data, timeout=15)
 
-        if resp.status_code in (200, 201):
-            public_url = f"{SUPABASE_URL}/storage/v1/object/public/{STORAGE_BUCKET}/{path}"
-            return public_url
-        else:
-            print(f"  Upload failed ({resp.status_code}): {resp.text[:100]}")
+    def public_url(self, path: str) -> str:
+        return f"{self.url}/storage/v1/object/public/{self.bucket}/{path}"
+
+    def upload(self, data: bytes, path: str, content_type: str = "image/webp") -> Optional[str]:
+        """アップロード（既存ファイルは上書き）してパブリックURLを返す"""
+        try:
+            upload_url = f"{self.url}/storage/v1/object/{self.bucket}/{path}"
+            headers = {**self._headers(), "Content-Type": content_type, "x-upsert": "true"}
+            resp = _get_session().post(upload_url, headers=headers, data=data, timeout=15)
+
+            if resp.status_code in (200, 201):
+                return self.public_url(path)
+            else:
+                print(f"  Upload failed ({resp.status_code}): {resp.text[:100]}")
+                return None
+        except Exception as e:
+            print(f"  Upload error: {e}")
             return None
-    except Exception as e:
-        print(f"  Upload error: {e}")
-        return None
 
+    def ensure_bucket(self) -> bool:
+        """バケットが存在することを確認、なければ作成"""
+        try:
+            session = _get_session()
+            # Check if bucket exists
+            check_url = f"{self.url}/storage/v1/bucket/{self.bucket}"
+            resp = session.get(check_url, headers=self._headers(), timeout=10)
+
+            if resp.status_code == 200:
+                print(f"Storage bucket '{self.bucket}' exists.")
+                return True
+
+            # Create bucket
+            create_url = f"{self.url}/storage/v1/bucket"
+            payload = {
+                "id": self.bucket,
+                "name": self.bucket,
+                "public": True,
+            }
+            resp = session.post(create_url, headers=self._headers(), json=payload, timeout=10)
+
+            if resp.status_code in (200, 201):
+                print(f"Created storage bucket '{self.bucket}'.")
+                return True
+            else:
+                print(f"Failed to create bucket ({resp.status_code}): {resp.text[:100]}")
+                return False
+        except Exception as e:
+            print(f"Bucket check/create error: {e}")
+            return False
 
-def archive_sold_property_images(url: str, images_json: str, category: str) -> List[str]:
-    """
-    売約済み物件の画像をアーカイブ
 
-    Args:
-        url: 物件URL
-        images_json: JSON配列文字列 or list の画像URL
-        category: カテゴリ名
+class LocalStorage:
+    """ローカルディレクトリ バックエンド（Supabase Storage と同じパス構成）
 
-    Returns:
-        アーカイブされた画像のパブリックURL一覧
+    オブジェクトは {root}/{bucket}/{path} に保存。パブリックURLは
+    ARCHIVE_LOCAL_PUBLIC_URL があれば {base}/{bucket}/{path}、なければ file:// URI。
     """
-    # Parse images
-    if isinstance(images_json, str):
+
+    name = "local"
+
+    def __init__(self, root: str = ARCHIVE_LOCAL_DIR, bucket: str = STORAGE_BUCKET,
+                 public_base_url: str = ARCHIVE_LOCAL_PUBLIC_URL):
+        self.root = os.path.abspath(root)
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip("/")
+        self.index_path = os.path.join(self.root, "image_archive_index.db")
+
+    def _object_path(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, self.bucket, path))
+        if not full.startswith(os.path.join(self.root, self.bucket) + os.sep):
+            raise ValueError(f"Invalid storage path: {path}")
+        return full
+
+    def public_url(self, path: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self.bucket}/{path}"
+        return Path(self._object_path(path)).as_uri()
+
+    def upload(self, data: bytes, path: str, content_type: str = "image/webp") -> Optional[str]:
+        """書き込み（既存ファイルは上書き）してパブリックURLを返す"""
         try:
-            image_urls = json.loads(images_json)
-        except:
-            return []
-    elif isinstance(images_json, list):
-        image_urls = images_json
-    else:
-        return []
+            full = self._object_path(path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            # Atomic replace, like an x-upsert upload: readers never see a
+            # half-written object
+            tmp = f"{full}.tmp.{threading.get_ident()}"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, full)
+            return self.public_url(path)
+        except Exception as e:
+            print(f"  Upload error: {e}")
+            return None
 
-    if not image_urls:
-        return []
+    def ensure_bucket(self) -> bool:
+        os.makedirs(os.path.join(self.root, self.bucket), exist_ok=True)
+        print(f"Local storage bucket '{self.bucket}' at {self.root}.")
+        return True
 
-    # Filter & pick
-    property_images = _filter_property_images(image_urls)
-    selected = _pick_representative_images(property_images)
 
-    if not selected:
-        return []
+_storage = None
+_storage_lock = threading.Lock()
+
 
-    # Generate storage path from property URL
-    url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
-    today = datetime.now().strftime("%Y%m%d")
+def get_storage():
+    """ARCHIVE_STORAGE_BACKEND に応じたストレージを返す（プロセス内で共有）"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if ARCHIVE_STORAGE_BACKEND == "local":
+                _storage = LocalStorage()
+            elif ARCHIVE_STORAGE_BACKEND == "supabase":
+                _storage = SupabaseStorage()
+            else:
+                raise ValueError(f"Unknown ARCHIVE_STORAGE_BACKEND: {ARCHIVE_STORAGE_BACKEND}")
+        return _storage
 
-    archived_urls = []
-    for i, img_url in enumerate(selected):
-        data = _download_and_compress(img_url)
-        if data is None:
-            continue
 
-        path = f"{category}/{today}/{url_hash}_{i}.webp"
-        public_url = _upload_to_supabase(data, path)
+def set_storage(storage) -> None:
+    """ストレージを差し替える（ベンチマーク・オフライン検証用）"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
 
-        if public_url:
-            archived_urls.append(public_url)
 
-    return archived_urls
+def archive_sold_properties(properties: List[Dict[str, Any]],
+                            index: Optional[ArchiveIndex] = None) -> Tuple[Dict[str, List[str]], Dict[str, float]]:
+    """
+    複数の売約済み物件の画像をパイプラインでアーカイブ
 
+    DL・圧縮・アップロードの各ステージを並行に流す。1枚のDLが終わった時点で
+    その画像の圧縮がプロセスプールに投入され、圧縮が終わればアップロードが
+    始まる（ステージ間でバッチを待たない）。
+
+    索引に元URLがあればDLせず既存オブジェクトを参照、圧縮後の知覚ハッシュが
+    既存画像と一致（ARCHIVE_HASH_DISTANCE 設定時は同じ物件の画像と近似）すれば
+    アップロードせず既存オブジェクトを参照する。
+
+    Args:
+        properties: {"url", "images", "category"} を持つdictのリスト
+        index: 重複排除に使う索引（省略時はストレージ既定の索引を開く）
+
+    Returns:
+        (物件URL → アーカイブ済みパブリックURL一覧, ステージ別所要時間[秒])
+        所要時間の download/compress/upload は各画像の合計、wall は全体の実時間
+    """
+    timings = {"download": 0.0, "compress": 0.0, "upload": 0.0, "wall": 0.0,
+               "images": 0, "reused": 0}
+    tasks: List[Tuple[str, int, str, str]] = []  # (property url, index, image url, category)
+    for prop in properties:
+        for i, img_url in enumerate(_select_images(prop.get("images"))):
+            tasks.append((prop["url"], i, img_url, prop["category"]))
+
+    if not tasks:
+        return {}, timings
+
+    own_index = index is None
+    if own_index:
+        index = ArchiveIndex()
+
+    started = time.perf_counter()
+    archived_items: Dict[str, List[Tuple[int, str]]] = {}
+
+    # The same source image can appear under several listings in one batch;
+    # only the first task per URL goes through the pipeline.
+    followers: Dict[str, List[Tuple[str, int, str, str]]] = {}
+
+    def _done(task, public_url, reused):
+        for i, same in enumerate([task] + followers.get(task[2], [])):
+            archived_items.setdefault(same[0], []).append((same[1], public_url))
+            timings["images"] += 1
+            if reused or i > 0:
+                timings["reused"] += 1
 
-def ensure_bucket_exists():
-    """Supabase Storageにバケットが存在することを確認、なければ作成"""
     try:
-        # Check if bucket exists
-        check_url = f"{SUPABASE_URL}/storage/v1/bucket/{STORAGE_BUCKET}"
-        headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-        }
-        resp = requests.get(check_url, headers=headers, timeout=10)
-
-        if resp.status_code == 200:
-            print(f"Storage bucket '{STORAGE_BUCKET}' exists.")
-            return True
-
-        # Create bucket
-        create_url = f"{SUPABASE_URL}/storage/v1/bucket"
-        payload = {
-            "id": STORAGE_BUCKET,
-            "name": STORAGE_BUCKET,
-            "public": True,
-        }
-        resp = requests.post(create_url, headers=headers, json=payload, timeout=10)
+        leaders = []
+        for task in tasks:
+            if task[2] in followers:
+                followers[task[2]].append(task)
+            else:
+                followers[task[2]] = []
+                leaders.append(task)
+
+        fresh_tasks = []
+        for task in leaders:
+            known = index.lookup_url(task[2])
+            if known:
+                _done(task, known[1], True)
+            else:
+                fresh_tasks.append(task)
+
+        with ThreadPoolExecutor(max_workers=max(ARCHIVE_IO_WORKERS, 1)) as io_pool, \
+                _make_cpu_pool(len(fresh_tasks)) as cpu_pool:
+            pending = {io_pool.submit(_timed_download, task[2]): ("download", task, None)
+                       for task in fresh_tasks}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, task, image_hash = pending.pop(future)
+                    try:
+                        result, elapsed = future.result()
+                    except Exception as e:
+                        print(f"  Archive {stage} error: {task[2]} - {e}")
+                        continue
+                    timings[stage] += elapsed
+                    if result is None:
+                        continue
+                    if stage == "download":
+                        pending[cpu_pool.submit(_timed_compress, result)] = ("compress", task, None)
+                    elif stage == "compress":
+                        data, dhash = result
+                        image_hash = _image_key(data, dhash)
+                        known = index.lookup_hash(image_hash, task[0])
+                        if known:
+                            # Same photo already stored (other listing / re-list)
+                            index.record(task[2], image_hash, known[0], known[1], task[0])
+                            _done(task, known[1], True)
+                            continue
+                        path = _archive_path(task[3], image_hash)
+                        pending[io_pool.submit(_timed_upload, data, path)] = ("upload", task, image_hash)
+                    else:
+                        index.record(task[2], image_hash, _archive_path(task[3], image_hash), result, task[0])
+                        _done(task, result, False)
+    finally:
+        if own_index:
+            index.close()
+
+    timings["wall"] = time.perf_counter() - started
+    print(f"  Archive pipeline: {timings['images']}/{len(tasks)} images in {timings['wall']:.1f}s, "
+          f"{timings['reused']} reused "
+          f"(download {timings['download']:.1f}s, compress {timings['compress']:.1f}s, "
+          f"upload {timings['upload']:.1f}s summed)")
+
+    archived = {url: [public_url for _, public_url in sorted(items)] for url, items in archived_items.items()}
+    return archived, timings
 
-        if resp.status_code in (200, 201):
-            print(f"Created storage bucket '{STORAGE_BUCKET}'.")
-            return True
-        else:
-            print(f"Failed to create bucket ({resp.status_code}): {resp.text[:100]}")
-            return False
-    except Exception as e:
-        print(f"Bucket check/create error: {e}")
-        return False
+
+def archive_sold_property_images(url: str, images_json: str, category: str) -> List[str]:
+    """
+    売約済み物件の画像をアーカイブ
+
+    Args:
+        url: 物件URL
+        images_json: JSON配列文字列 or list の画像URL
+        category: カテゴリ名
+
+    Returns:
+        アーカイブされた画像のパブリックURL一覧
+    """
+    archived, _ = archive_sold_properties([{"url": url, "images": images_json, "category": category}])
+    return archived.get(url, [])
+
+
+def ensure_bucket_exists():
+    """ストレージにバケットが存在することを確認、なければ作成"""
+    return get_storage().ensure_bucket()
@@ -93,8 +93,8 @@ def transform_csv_to_db_format(row, category):
     
     return db_record
 
-def import_csv_to_database(csv_file):
-    """CSVファイルをデータベースにインポート"""
+def import_csv_to_database(csv_file, imported_urls=None):
+    """CSVファイルをデータベースにインポート（保存できた URL を imported_urls に追加）"""
     # カテゴリー特定
     category = get_category_from_filename(csv_file)
     if not category:
@@ -129,6 +129,8 @@ def import_csv_to_database(csv_file):
             # データベースに保存
             if db.upsert_property(db_record):
                 success_count += 1
+                if imported_urls is not None:
+                    imported_urls.append(db_record["url"])
             else:
                 error_count += 1
                 
@@ -169,9 +171,10 @@ def main():
     
     total_success = 0
     total_error = 0
+    imported_urls = []
     
     for csv_file in csv_files:
-        success, error = import_csv_to_database(csv_file)
+        success, error = import_csv_to_database(csv_file, imported_urls)
         total_success += success
         total_error += error
     
@@ -180,6 +183,11 @@ def main():
     print(f"{'='*70}")
     print(f"総成功: {total_success} 件")
     print(f"総エラー: {total_error} 件")
+    if total_success:
+        # 集計テーブル・ファセット索引にも反映してから API のキャッシュを無効化
+        db.refresh_summary_stats(imported_urls)
+        db.rebuild_facet_index()
+        db.bump_data_version()
     print(f"{'='*70}\n")
     
     print("ダッシュボードをリロードして確認してください！")
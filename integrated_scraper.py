@@ -4,15 +4,18 @@ import time
 import random
 import json
 import argparse
-import pandas as pd
+import requests
 from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, TimeoutError as PlaywrightTimeoutError
-from fake_useragent import UserAgent
 from typing import List, Dict, Set, Tuple, Optional, Any, Callable
 from database import db  # Database abstraction layer
 from config import config  # 設定ファイルをインポート
-from image_archiver import archive_sold_property_images, ensure_bucket_exists
+from image_archiver import archive_sold_properties, ensure_bucket_exists
+from link_progress import LinkProgress
+from property_normalize import typed_fields
+from sold_check import listing_is_gone
 
 # --- 設定読み込み ---
 BASE_URL: str = config.BASE_URL
@@ -29,6 +32,10 @@ MAX_REQUESTS_PER_SECOND: int = config.MAX_REQUESTS_PER_SECOND
 BURST_SIZE: int = config.BURST_SIZE
 BURST_WINDOW: int = config.BURST_WINDOW
 MAX_BROWSER_USES: int = config.MAX_BROWSER_USES
+COLLECTION_SHORTFALL_TOLERANCE: float = config.COLLECTION_SHORTFALL_TOLERANCE
+MAX_GAP_REFETCH_TIME: int = config.MAX_GAP_REFETCH_TIME
+SOLD_VERIFY_WORKERS: int = config.SOLD_VERIFY_WORKERS
+SOLD_VERIFY_TIMEOUT: int = config.SOLD_VERIFY_TIMEOUT
 
 # --- Japanese Name Mappings ---
 CATEGORY_NAMES: Dict[str, str] = config.CATEGORY_NAMES
@@ -38,13 +45,31 @@ GENRE_NAMES: Dict[str, str] = config.GENRE_NAMES
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
+FALLBACK_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+@lru_cache(maxsize=None)
+def _user_agent_pool() -> Optional[Any]:
+    """fake_useragent.UserAgent をプロセスで1つだけ作る（失敗時は None）
+
+    UserAgent() はブラウザ一覧のデータを読み込むため、コンテキストごとに
+    作ると毎回その分遅くなる。.random は作成済みの一覧からの抽選なので安い。
+    """
+    try:
+        from fake_useragent import UserAgent
+        return UserAgent()
+    except Exception as e:
+        print(f"⚠️  fake_useragent unavailable, using a fixed User-Agent: {e}")
+        return None
+
 def get_random_user_agent() -> str:
     """ランダムなUser-Agentを取得"""
+    pool = _user_agent_pool()
+    if pool is None:
+        return FALLBACK_USER_AGENT
     try:
-        ua = UserAgent()
-        return ua.random
-    except:
-        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        return pool.random
+    except Exception:
+        return FALLBACK_USER_AGENT
 
 def get_random_referer() -> str:
     """Get random referer URL to avoid blocking"""
@@ -112,6 +137,11 @@ _browsers_lock = threading.Lock()
 # Serialize checkpoint writes — JSON file corruption otherwise (B-001)
 _checkpoint_lock = threading.Lock()
 
+# Per-category result of the last link collection: total_items / max_pages as
+# detected on page 1, collected count and pages that never yielded links.
+# Persisted in links.json metadata so --skip-refresh runs keep the guard.
+_collection_stats: Dict[str, Dict[str, Any]] = {}
+
 # Thread-local storage
 _thread_local = threading.local()
 
@@ -478,6 +508,7 @@ def load_links_with_metadata(links_file):
         
         # Handle both old format (direct dict) and new format (with metadata)
         if "metadata" in data and "data" in data:
+            _collection_stats.update(data["metadata"].get("collection", {}))
             return data["data"]
         else:
             # Old format - return as is
@@ -487,19 +518,27 @@ def load_links_with_metadata(links_file):
         return {}
 
 def save_links_with_metadata(links_file, all_links):
-    """Save links to file with metadata"""
+    """Save links to file with metadata.
+
+    Per-page progress lives in LinkProgress; this file is the end-of-category
+    export read by --skip-refresh, so it is written compactly and atomically
+    (tmp file + rename) instead of re-indenting every URL each time.
+    """
     total_links = sum(len(links) for links in all_links.values())
     
     data = {
         "metadata": {
             "last_updated": datetime.now().isoformat(),
-            "total_links": total_links
+            "total_links": total_links,
+            "collection": {cat: _collection_stats[cat] for cat in all_links if cat in _collection_stats}
         },
         "data": all_links
     }
     
-    with open(links_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    tmp_file = f"{links_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_file, links_file)
     
     print(f"Saved {total_links} links with metadata to {links_file}")
 
@@ -579,16 +618,103 @@ def load_checkpoint(checkpoint_file, category):
 
 
 # --- Phase 1: Collect Links ---
-def collect_links(category_name, base_url, browser: Browser):
+def _extract_page_links(page: Page) -> List[str]:
+    """Detail-page links on the listing page currently loaded in `page`."""
+    selectors = ["a.button.detail-button", "a.detail-button"]
+    page_links = []
+    
+    for selector in selectors:
+        try:
+            page.wait_for_selector(selector, timeout=10000)
+            elements = page.query_selector_all(selector)
+            for elem in elements:
+                link = elem.get_attribute("href")
+                if link:
+                    page_links.append(link)
+            
+            if page_links:
+                break
+        except PlaywrightTimeoutError:
+            continue
+    return page_links
+
+def _refetch_missing_pages(category_name: str, base_url: str, page: Page, page_nums: List[int],
+                           progress: Optional[LinkProgress] = None) -> Dict[int, List[str]]:
+    """Re-visit individual listing pages that yielded nothing during the walk.
+
+    Bounded by MAX_GAP_REFETCH_TIME so a site outage cannot stall the run.
+    Recovered pages are checkpointed immediately.
+    """
+    recovered: Dict[int, List[str]] = {}
+    start_time = time.time()
+    for page_num in page_nums:
+        if time.time() - start_time > MAX_GAP_REFETCH_TIME:
+            print(f"[{category_name}] ⚠️  Gap re-fetch timeout ({MAX_GAP_REFETCH_TIME}s). "
+                  f"{len(page_nums) - len(recovered)} page(s) left unfetched.")
+            break
+        rate_limit_wait()
+        url = f"{base_url}?perPage={ITEMS_PER_PAGE}&page={page_num}"
+        try:
+            page.goto(url, wait_until='domcontentloaded', timeout=15000)
+            page_links = _extract_page_links(page)
+        except Exception as e:
+            print(f"[{category_name}] Re-fetch of page {page_num} failed: {e}")
+            continue
+        if page_links:
+            recovered[page_num] = page_links
+            if progress:
+                progress.record_page(category_name, page_num, page_links)
+            print(f"[{category_name}] Re-fetched page {page_num}: {len(page_links)} links")
+        time.sleep(random.uniform(0.5, 1.5))
+    return recovered
+
+def _record_collection_stats(category_name: str, total_items: Optional[int], max_pages: Optional[int],
+                             collected: int, missing_pages: List[int]) -> None:
+    _collection_stats[category_name] = {
+        "total_items": total_items,
+        "max_pages": max_pages,
+        "collected": collected,
+        "missing_pages": missing_pages,
+        "collected_at": datetime.now().isoformat(),
+    }
+
+def collect_links(category_name, base_url, browser: Browser, resume: bool = True):
+    """Walk the listing pages of a category and return unique detail URLs.
+
+    Every page is checkpointed in LinkProgress as soon as it is read, so a
+    restarted run resumes after the last completed page instead of page 1,
+    and a category already completed today is returned without a browser.
+    resume=False discards today's progress and walks from page 1.
+    """
     print(f"[{category_name}] Starting link collection...")
+    progress = LinkProgress()
+    if not resume:
+        progress.reset(category_name)
+    saved = progress.totals(category_name)
+    saved_pages = progress.pages(category_name)
+    links = [u for page_links in saved_pages.values() for u in page_links]
+    total_items = saved.get("total_items")
+    max_pages = saved.get("max_pages")  # Detected from pagination on page 1
+    
+    if saved.get("completed"):
+        missing_pages = progress.missing_pages(category_name, max_pages)
+        progress.close()
+        unique_links = list(set(links))
+        _record_collection_stats(category_name, total_items, max_pages, len(unique_links), missing_pages)
+        print(f"[{category_name}] ✓ Already collected today: {len(unique_links)} links from {len(saved_pages)} pages")
+        return unique_links
+    
+    page_num = progress.next_page(category_name)
+    if saved_pages:
+        print(f"[{category_name}] Resuming from page {page_num} ({len(saved_pages)} pages, {len(links)} links checkpointed)")
+    
     context = create_browser_context(browser)
     page = context.new_page()
-    links = []
-    page_num = 1
     consecutive_empty_pages = 0
+    walk_finished = False
     start_time = time.time()
+    elapsed_time = 0.0
     MAX_COLLECTION_TIME = 600
-    max_pages = None  # Will be detected from pagination
     
     try:
         while True:
@@ -602,6 +728,7 @@ def collect_links(category_name, base_url, browser: Browser):
             # Check against detected max pages
             if max_pages and page_num > max_pages:
                 print(f"[{category_name}] Reached detected maximum page ({max_pages}). Stopping.")
+                walk_finished = True
                 break
             
             # Safety check for infinite loops (only if max_pages not detected)
@@ -644,8 +771,9 @@ def collect_links(category_name, base_url, browser: Browser):
                             text = element.inner_text(timeout=5000)
                             match = re.search(r'(\d+)', text)
                             if match:
-                                total_items = int(match.group(1))
-                                if total_items > 10:  # Sanity check
+                                count = int(match.group(1))
+                                if count > 10:  # Sanity check
+                                    total_items = count
                                     max_pages = (total_items + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
                                     print(f"[{category_name}] ✓ Detected {total_items} items from XPath, max pages: {max_pages}")
                                     break
@@ -665,8 +793,9 @@ def collect_links(category_name, base_url, browser: Browser):
                         for pattern in patterns:
                             match = re.search(pattern, body_text)
                             if match:
-                                total_items = int(match.group(1))
-                                if total_items > 10:
+                                count = int(match.group(1))
+                                if count > 10:
+                                    total_items = count
                                     max_pages = (total_items + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
                                     print(f"[{category_name}] ✓ Detected {total_items} items from text, max pages: {max_pages}")
                                     break
@@ -710,25 +839,11 @@ def collect_links(category_name, base_url, browser: Browser):
                     
                 except Exception as e:
                     print(f"[{category_name}] Error detecting max pages: {e}")
+                progress.set_totals(category_name, total_items, max_pages)
             
             
             try:
-                selectors = ["a.button.detail-button", "a.detail-button"]
-                page_links = []
-                
-                for selector in selectors:
-                    try:
-                        page.wait_for_selector(selector, timeout=10000)
-                        elements = page.query_selector_all(selector)
-                        for elem in elements:
-                            link = elem.get_attribute("href")
-                            if link:
-                                page_links.append(link)
-                        
-                        if page_links:
-                            break
-                    except PlaywrightTimeoutError:
-                        continue
+                page_links = _extract_page_links(page)
                 
                 if not page_links:
                     print(f"[{category_name}] No links found on page {page_num}. URL: {page.url}")
@@ -737,6 +852,7 @@ def collect_links(category_name, base_url, browser: Browser):
                     next_buttons = page.query_selector_all("li.pagination-next a")
                     if not next_buttons:
                         print(f"[{category_name}] No next page button found. Finished collection.")
+                        walk_finished = True
                         break
                     
                     if consecutive_empty_pages >= 2:
@@ -749,12 +865,14 @@ def collect_links(category_name, base_url, browser: Browser):
                 
                 consecutive_empty_pages = 0
                 links.extend(page_links)
+                progress.record_page(category_name, page_num, page_links)
                 print(f"[{category_name}] Page {page_num}: Collected {len(page_links)} links. Total: {len(links)}")
                 
                 # Check for "Next" button
                 next_buttons = page.query_selector_all("li.pagination-next a")
                 if not next_buttons:
                     print(f"[{category_name}] No next page. Finished collection.")
+                    walk_finished = True
                     break
                 
                 page_num += 1
@@ -763,6 +881,28 @@ def collect_links(category_name, base_url, browser: Browser):
             except PlaywrightTimeoutError:
                 print(f"[{category_name}] Timeout on page {page_num}. Stopping.")
                 break
+        
+        # Partial-collection guard: a timeout or a run of empty pages ends the
+        # walk early, and every listing on the skipped pages would otherwise
+        # look sold today and "new" again tomorrow. Re-fetch just those pages.
+        if max_pages and total_items:
+            shortfall = 1 - len(set(links)) / total_items
+            missing_pages = progress.missing_pages(category_name, max_pages)
+            if shortfall > COLLECTION_SHORTFALL_TOLERANCE and missing_pages:
+                print(f"[{category_name}] ⚠️  Collected {len(set(links))}/{total_items} items "
+                      f"({shortfall:.1%} short). Re-fetching {len(missing_pages)} missing page(s)...")
+                recovered = _refetch_missing_pages(category_name, base_url, page, missing_pages, progress)
+                for page_links in recovered.values():
+                    links.extend(page_links)
+        
+        # Complete = matches the detected total (or, without one, the walk
+        # reached the last page). Incomplete categories resume next run.
+        if total_items:
+            complete = 1 - len(set(links)) / total_items <= COLLECTION_SHORTFALL_TOLERANCE
+        else:
+            complete = walk_finished
+        if complete:
+            progress.mark_complete(category_name)
                 
     except Exception as e:
         print(f"[{category_name}] Error: {e}")
@@ -771,9 +911,16 @@ def collect_links(category_name, base_url, browser: Browser):
             context.close()
         except:
             pass
-        
-    print(f"[{category_name}] ✓ Collection complete: {len(links)} unique links in {elapsed_time:.1f}s")
-    return list(set(links))
+        try:
+            missing_pages = progress.missing_pages(category_name, max_pages)
+        finally:
+            progress.close()
+    
+    unique_links = list(set(links))
+    _record_collection_stats(category_name, total_items, max_pages, len(unique_links), missing_pages)
+    
+    print(f"[{category_name}] ✓ Collection complete: {len(unique_links)} unique links in {elapsed_time:.1f}s")
+    return unique_links
 
 # --- Phase 2: Scrape Details ---
 def scrape_detail(url, category):
@@ -959,97 +1106,174 @@ def transform_to_db_format(scraped_data: dict, category: str) -> dict:
         "company_name": scraped_data.get("company_name"),
         "property_data": property_data
     }
+    # 価格・面積・間取り・築年を数値化して実カラムに保存（集計は SQL で済む）
+    db_record.update(typed_fields(category, db_record["price"], property_data))
     
     return db_record
 
+CSV_BASE_COLUMNS: List[str] = [
+    "title", "price", "url", "favorites", "update_date", "expiry_date", "images", "company_name"
+]
+
+def _clean_csv_text(text):
+    """Remove unusual line terminators that break CSV consumers."""
+    if isinstance(text, str):
+        return text.replace('\u2028', '').replace('\u2029', '').replace('\r', '').replace('\n', ' ')
+    return text
+
 def export_to_csv():
-    """Export collected data from DB to CSV"""
+    """Export collected data from DB to CSV.
+
+    Streams rows from db.iter_active_properties straight into one csv writer
+    per category, so memory stays flat regardless of table size. A first,
+    lightweight pass (category + property_data only) computes each
+    category's column union in first-seen order — the same column order the
+    old per-category DataFrame produced.
+    """
+    import csv
     print(f"\n{'='*70}")
     print("Exporting Data to CSV...")
     print(f"{'='*70}")
     
+    files = {}
     try:
-        # Get all active properties
-        active_properties = db.get_all_active_properties()
+        columns_by_category: Dict[str, Dict[str, None]] = {}
+        for item in db.iter_active_properties(fields=["category", "property_data"]):
+            columns = columns_by_category.setdefault(item["category"], dict.fromkeys(CSV_BASE_COLUMNS))
+            property_data = item.get("property_data")
+            if isinstance(property_data, dict):
+                for key in property_data:
+                    columns.setdefault(key)
         
-        if not active_properties:
+        if not columns_by_category:
             print("No active properties found to export.")
             return
 
-        # Group by category
-        data_by_category = {}
         today = datetime.now().strftime("%Y_%m_%d")
+        writers = {}
+        counts: Dict[str, int] = {}
+        filenames: Dict[str, str] = {}
         
-        for item in active_properties:
+        for item in db.iter_active_properties():
             category = item["category"]
+            if category not in columns_by_category:
+                # Row became active between the two passes; picked up next export
+                continue
             
-            if category not in data_by_category:
-                data_by_category[category] = []
+            if category not in writers:
+                # Generate filename: Category_Genre_YYYY_MM_DD.csv
+                cat_name_ja = CATEGORY_NAMES.get(category, "不明")
+                genre_name_ja = GENRE_NAMES.get(category, "不明")
+                filenames[category] = f"{cat_name_ja}_{genre_name_ja}_{today}.csv"
+                f = open(os.path.join(OUTPUT_DIR, filenames[category]), "w", encoding="utf-8-sig", newline="")
+                files[category] = f
+                writers[category] = csv.DictWriter(f, fieldnames=list(columns_by_category[category]),
+                                                   extrasaction="ignore", lineterminator="\n")
+                writers[category].writeheader()
+                counts[category] = 0
             
-            # Clean data (remove unusual line terminators)
-            def clean_text(text):
-                if isinstance(text, str):
-                    return text.replace('\u2028', '').replace('\u2029', '').replace('\r', '').replace('\n', ' ')
-                return text
-
             # Flatten data for CSV
             flat_item = {
-                "title": clean_text(item["title"]),
-                "price": clean_text(item["price"]),
+                "title": _clean_csv_text(item["title"]),
+                "price": _clean_csv_text(item["price"]),
                 "url": item["url"],
                 "favorites": item["favorites"],
                 "update_date": item["update_date"],
                 "expiry_date": item["expiry_date"],
                 "images": " | ".join(item["images"]) if isinstance(item["images"], list) else str(item["images"]),
-                "company_name": clean_text(item["company_name"])
+                "company_name": _clean_csv_text(item["company_name"])
             }
             
             # Add dynamic property data
             property_data = item.get("property_data", {})
             if isinstance(property_data, dict):
                 for key, value in property_data.items():
-                    flat_item[key] = clean_text(value)
-                
-            data_by_category[category].append(flat_item)
-        
-        # Export each category to CSV
-        for category, items in data_by_category.items():
-            if not items:
-                continue
-                
-            df = pd.DataFrame(items)
-            
-            # Generate filename: Category_Genre_YYYY_MM_DD.csv
-            cat_name_ja = CATEGORY_NAMES.get(category, "不明")
-            genre_name_ja = GENRE_NAMES.get(category, "不明")
-            filename = f"{cat_name_ja}_{genre_name_ja}_{today}.csv"
-            filepath = os.path.join(OUTPUT_DIR, filename)
+                    flat_item[key] = _clean_csv_text(value)
             
-            # Save to CSV
-            df.to_csv(filepath, index=False, encoding="utf-8-sig")
-            print(f"✓ Exported {len(items)} items to {filename}")
+            writers[category].writerow(flat_item)
+            counts[category] += 1
+        
+        for category, count in counts.items():
+            print(f"✓ Exported {count} items to {filenames[category]}")
             
     except Exception as e:
         print(f"Error exporting to CSV: {e}")
+    finally:
+        for f in files.values():
+            f.close()
 
 def detect_diff(category: str, current_urls: list) -> tuple:
     """Detect new and sold properties.
 
-    Compares the URL set we just collected against the snapshot taken on the
-    *previous* run for this category — chosen by sort order, not by calendar
-    date. This keeps diff detection working even after a long outage where
-    yesterday's snapshot is missing (which previously collapsed the diff back
-    to "every URL is new" and triggered a full re-scrape that never finished
-    inside the 2h timeout window).
+    Reconciles the URL set we just collected against `properties` itself
+    rather than against the previous snapshot: new = URLs with no row yet,
+    sold = active rows in this category that are no longer listed. Because
+    the comparison does not depend on yesterday's snapshot, a missing
+    snapshot can no longer collapse the diff into "every URL is new" (the
+    full re-scrape that never finished inside the 2h timeout window), and a
+    detail page that failed to scrape is simply picked up again next run.
+
+    As a side effect every still-listed row gets last_seen_date = today
+    (and inactive rows that are listed again are re-activated).
+
+    Returns (new_urls, sold_urls, reactivated_urls).
     """
-    current_set = set(current_urls)
-    previous_urls = db.get_previous_snapshot_links(category)
-    previous_set = set(previous_urls)
+    result = db.reconcile_links(category, current_urls)
+    print(f"  ✓ Refreshed last_seen_date for {result['touched']} listed properties", flush=True)
 
-    new_urls = list(current_set - previous_set)
-    sold_urls = list(previous_set - current_set)
+    return result["new"], result["sold"], result.get("reactivated", [])
 
-    return new_urls, sold_urls
+def verify_sold_urls(urls: List[str]) -> Tuple[List[str], List[str]]:
+    """Concurrently confirm sold candidates. Returns (gone, kept).
+
+    `kept` holds URLs that are still listed *and* URLs whose status could not
+    be determined — an unverifiable listing is left active and re-checked on
+    the next run rather than flipped to sold.
+    """
+    gone, kept = [], []
+    with requests.Session() as session:
+        session.headers["User-Agent"] = get_random_user_agent()
+        with ThreadPoolExecutor(max_workers=SOLD_VERIFY_WORKERS) as pool:
+            for url, result in zip(urls, pool.map(lambda u: listing_is_gone(session, u, SOLD_VERIFY_TIMEOUT), urls)):
+                (gone if result else kept).append(url)
+    return gone, kept
+
+def guard_sold_urls(category: str, current_urls: list, sold_urls: list) -> list:
+    """Filter sold candidates when today's collection looks incomplete.
+
+    If the collected count falls short of the total_items detected on page 1
+    by more than COLLECTION_SHORTFALL_TOLERANCE (e.g. the walk timed out and
+    the gap re-fetch could not recover every page), the missing URLs are not
+    trusted as sold; each is checked over HTTP and only confirmed removals
+    are returned.
+
+    A missing total_items (page 1 failed, or the count was not found) is the
+    same partial-collection case, so every candidate is verified. An empty
+    collection marks nothing sold at all.
+    """
+    if not sold_urls:
+        return sold_urls
+    collected = len(set(current_urls))
+    if not collected:
+        print(f"  ⚠️  No links collected for {category}; not marking "
+              f"{len(sold_urls)} sold candidates", flush=True)
+        return []
+    stats = _collection_stats.get(category) or {}
+    total_items = stats.get("total_items")
+    if not total_items:
+        print(f"  ⚠️  Total item count unknown for {category} ({collected} collected). "
+              f"Verifying {len(sold_urls)} sold candidates...", flush=True)
+    else:
+        shortfall = 1 - collected / total_items
+        if shortfall <= COLLECTION_SHORTFALL_TOLERANCE:
+            return sold_urls
+        print(f"  ⚠️  Partial collection: {collected}/{total_items} items ({shortfall:.1%} short). "
+              f"Verifying {len(sold_urls)} sold candidates...", flush=True)
+    started = time.time()
+    gone, kept = verify_sold_urls(sold_urls)
+    print(f"  ✓ Verified in {time.time() - started:.1f}s: {len(gone)} removed, "
+          f"{len(kept)} still listed or unverifiable (kept active)", flush=True)
+    return gone
 
 def auto_diagnose_and_fix(total_scraped: int, max_retries: int = 2):
     """
@@ -1206,7 +1430,7 @@ def main():
             if needs_refresh:
                 print("Collecting fresh links for all categories...\n")
                 for cat_name, cat_url in CATEGORIES.items():
-                    links = collect_links(cat_name, cat_url, browser)
+                    links = collect_links(cat_name, cat_url, browser, resume=not args.force_refresh)
                     all_links[cat_name] = links
                     # Save incrementally with metadata (backup)
                     save_links_with_metadata(LINKS_FILE, all_links)
@@ -1244,6 +1468,9 @@ def main():
     # still readable from `properties`) so the report can show what disappeared.
     report_by_category: Dict[str, Dict[str, int]] = {}
     report_sold_properties: List[Dict[str, Any]] = []
+    # URLs whose row changed in this run (new / sold / re-activated / scraped);
+    # only these are re-applied to the summary tables at the end
+    summary_urls: List[str] = []
     run_started_at = time.time()
     
     # Create a single executor for all categories to reuse threads/browsers
@@ -1260,7 +1487,9 @@ def main():
             
             # Detect diff (new and sold properties)
             if not args.no_diff:
-                new_urls, sold_urls = detect_diff(cat_name, links)
+                new_urls, sold_urls, reactivated_urls = detect_diff(cat_name, links)
+                sold_urls = guard_sold_urls(cat_name, links, sold_urls)
+                summary_urls.extend(reactivated_urls)
                 print(f"\n📊 Diff Detection:", flush=True)
                 print(f"  New properties: {len(new_urls)}", flush=True)
                 print(f"  Sold properties: {len(sold_urls)}", flush=True)
@@ -1276,8 +1505,11 @@ def main():
                 if sold_urls:
                     print(f"  📸 Archiving images for {len(sold_urls)} sold properties...", flush=True)
                     archived_count = 0
+                    # One bulk lookup instead of a round trip per sold URL
+                    sold_props = db.get_properties_by_urls(sold_urls)
+                    archive_jobs = []
                     for sold_url in sold_urls:
-                        prop = db.get_property_by_url(sold_url)
+                        prop = sold_props.get(sold_url)
                         if prop:
                             # Capture title/price/expiry for the daily report
                             # (before mark_inactive flips is_active=0)
@@ -1290,15 +1522,22 @@ def main():
                                 "last_seen_date": prop.get("last_seen_date"),
                             })
                             if prop.get("images"):
-                                urls_saved = archive_sold_property_images(
-                                    sold_url, prop["images"], cat_name
-                                )
-                                if urls_saved:
-                                    db.update_archived_images(sold_url, urls_saved)
-                                    archived_count += 1
+                                archive_jobs.append({
+                                    "url": sold_url,
+                                    "images": prop["images"],
+                                    "category": cat_name,
+                                })
+                    # Download / compress / upload run concurrently across
+                    # every sold property in the category
+                    archived, _ = archive_sold_properties(archive_jobs)
+                    for sold_url, urls_saved in archived.items():
+                        if urls_saved:
+                            db.update_archived_images(sold_url, urls_saved)
+                            archived_count += 1
                     print(f"  ✓ Archived images for {archived_count}/{len(sold_urls)} properties", flush=True)
 
                     marked = db.mark_properties_inactive(sold_urls)
+                    summary_urls.extend(sold_urls)
                     print(f"  ✓ Marked {marked} properties as sold", flush=True)
                 
                 # Only scrape NEW properties
@@ -1352,6 +1591,7 @@ def main():
                             # Save to database
                             if db.upsert_property(db_record):
                                 scraped_count += 1
+                                summary_urls.append(url)
                                 # Update checkpoint
                                 processed_urls.add(url)
                                 if len(processed_urls) % 10 == 0:
@@ -1402,9 +1642,36 @@ def main():
     print(f"Total scraped: {total_scraped}", flush=True)
     print(f"Database: {db.db_type.upper()}", flush=True)
     print(f"{'='*70}\n", flush=True)
+
+    # Summary tables for the stats API: apply only the rows that changed
+    try:
+        refreshed = db.refresh_summary_stats(summary_urls)
+        print(f"✓ Summary tables updated ({refreshed} changed properties)", flush=True)
+    except Exception as e:
+        print(f"⚠️  Summary table update failed (run rebuild_summary_stats.py): {e}", flush=True)
+
+    # Facet index for /api/facets and /api/properties/filter
+    try:
+        indexed = db.rebuild_facet_index()
+        print(f"✓ Facet index rebuilt ({indexed} active properties)", flush=True)
+    except Exception as e:
+        print(f"⚠️  Facet index rebuild failed (run rebuild_facet_index.py): {e}", flush=True)
+
+    # All writes of this run are committed: invalidate the API response cache
+    version = db.bump_data_version()
+    if version is not None:
+        print(f"✓ Data version bumped to {version}", flush=True)
     
-    # Export to CSV
-    export_to_csv()
+    # Export (EXPORT_FORMAT: csv / parquet / both)
+    if config.EXPORT_FORMAT in ("csv", "both"):
+        export_to_csv()
+    if config.EXPORT_FORMAT in ("parquet", "both"):
+        try:
+            from parquet_export import export_parquet
+            print("Exporting Parquet (changed rows only)...", flush=True)
+            export_parquet()
+        except Exception as e:
+            print(f"Parquet export failed: {e}", flush=True)
 
     # Daily phone-friendly report mail. Wrapped in try so a notification
     # failure cannot break the scrape job's exit code (the marker still gets
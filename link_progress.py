@@ -0,0 +1,131 @@
+"""
+リンク収集の進捗ストア（ページ単位のチェックポイント）
+
+collect_links が一覧ページを 1 ページ取得するたびに
+(カテゴリ, ページ番号, URL, 件数) を SQLite に記録する。
+再起動後は同じ日の最終完了ページの次から再開し、
+検出総件数に対する欠落ページだけを個別に再取得する。
+"""
+
+import os
+import json
+import sqlite3
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from config import config
+
+LINK_PROGRESS_PATH: str = os.getenv("LINK_PROGRESS_PATH", os.path.join(config.OUTPUT_DIR, "link_progress.db"))
+LINK_PROGRESS_RETENTION_DAYS: int = 7
+
+
+class LinkProgress:
+    """当日分のリンク収集進捗（カテゴリ × ページ）"""
+
+    def __init__(self, path: Optional[str] = None, run_date: Optional[str] = None):
+        path = path or LINK_PROGRESS_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.run_date = run_date or date.today().isoformat()
+        self.conn = sqlite3.connect(path, timeout=30.0)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS link_pages (
+                run_date TEXT NOT NULL,
+                category TEXT NOT NULL,
+                page_num INTEGER NOT NULL,
+                urls TEXT NOT NULL,
+                item_count INTEGER NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_date, category, page_num)
+            );
+            CREATE TABLE IF NOT EXISTS link_runs (
+                run_date TEXT NOT NULL,
+                category TEXT NOT NULL,
+                total_items INTEGER,
+                max_pages INTEGER,
+                completed INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_date, category)
+            );
+        """)
+        cutoff = (date.fromisoformat(self.run_date) - timedelta(days=LINK_PROGRESS_RETENTION_DAYS)).isoformat()
+        self.conn.execute("DELETE FROM link_pages WHERE run_date < ?", (cutoff,))
+        self.conn.execute("DELETE FROM link_runs WHERE run_date < ?", (cutoff,))
+        self.conn.commit()
+
+    def record_page(self, category: str, page_num: int, urls: List[str]) -> None:
+        """1 ページ分のリンクを記録（同じページの再取得は上書き）"""
+        self.conn.execute("""
+            INSERT INTO link_pages (run_date, category, page_num, urls, item_count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(run_date, category, page_num) DO UPDATE SET
+                urls = excluded.urls,
+                item_count = excluded.item_count,
+                fetched_at = CURRENT_TIMESTAMP
+        """, (self.run_date, category, page_num, json.dumps(urls), len(urls)))
+        self.conn.commit()
+
+    def set_totals(self, category: str, total_items: Optional[int], max_pages: Optional[int]) -> None:
+        """1 ページ目で検出した総件数 / 総ページ数を記録"""
+        self.conn.execute("""
+            INSERT INTO link_runs (run_date, category, total_items, max_pages)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(run_date, category) DO UPDATE SET
+                total_items = excluded.total_items,
+                max_pages = excluded.max_pages,
+                updated_at = CURRENT_TIMESTAMP
+        """, (self.run_date, category, total_items, max_pages))
+        self.conn.commit()
+
+    def mark_complete(self, category: str) -> None:
+        self.conn.execute("""
+            INSERT INTO link_runs (run_date, category, completed) VALUES (?, ?, 1)
+            ON CONFLICT(run_date, category) DO UPDATE SET
+                completed = 1,
+                updated_at = CURRENT_TIMESTAMP
+        """, (self.run_date, category))
+        self.conn.commit()
+
+    def totals(self, category: str) -> Dict[str, Any]:
+        """{"total_items", "max_pages", "completed"}（未記録なら空 dict）"""
+        row = self.conn.execute(
+            "SELECT total_items, max_pages, completed FROM link_runs WHERE run_date = ? AND category = ?",
+            (self.run_date, category),
+        ).fetchone()
+        if not row:
+            return {}
+        return {"total_items": row[0], "max_pages": row[1], "completed": bool(row[2])}
+
+    def pages(self, category: str) -> Dict[int, List[str]]:
+        """取得済みページ → URL リスト"""
+        rows = self.conn.execute(
+            "SELECT page_num, urls FROM link_pages WHERE run_date = ? AND category = ? ORDER BY page_num",
+            (self.run_date, category),
+        ).fetchall()
+        return {page_num: json.loads(urls) for page_num, urls in rows}
+
+    def next_page(self, category: str) -> int:
+        """再開するページ（取得済みの最後のページの次。未取得なら 1）"""
+        row = self.conn.execute(
+            "SELECT MAX(page_num) FROM link_pages WHERE run_date = ? AND category = ?",
+            (self.run_date, category),
+        ).fetchone()
+        return (row[0] or 0) + 1
+
+    def missing_pages(self, category: str, max_pages: Optional[int]) -> List[int]:
+        """1..max_pages のうちリンクを取得できていないページ"""
+        if not max_pages:
+            return []
+        done = {row[0] for row in self.conn.execute(
+            "SELECT page_num FROM link_pages WHERE run_date = ? AND category = ? AND item_count > 0",
+            (self.run_date, category),
+        )}
+        return [n for n in range(1, max_pages + 1) if n not in done]
+
+    def reset(self, category: str) -> None:
+        """当日分の進捗を破棄（--force-refresh 用）"""
+        self.conn.execute("DELETE FROM link_pages WHERE run_date = ? AND category = ?", (self.run_date, category))
+        self.conn.execute("DELETE FROM link_runs WHERE run_date = ? AND category = ?", (self.run_date, category))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Parquet（列指向）エクスポート
+
+properties を型付き Parquet に書き出す。CSV と違い文字列を再パースせずに
+分析できるよう、価格・賃料・面積は数値カラム、property_data の各キーは
+個別カラムとして展開する。
+
+出力レイアウト（Hive 形式パーティション）:
+    output/parquet/category=<cat>/snapshot_date=<YYYY-MM-DD>/part-0.parquet
+
+増分エクスポート:
+- 各パーティションは「前回エクスポート以降に updated_at が進んだ行」だけを持つ
+  （updated_at は内容変更時のみ進む — database.SQLITE_UPDATED_AT_TRIGGER）
+- カテゴリ毎のウォーターマークを _watermarks.json に保存し、変更のない
+  カテゴリはファイルを書かない
+- 同じ日の再実行は、その日のパーティションを同じ基点から書き直す（冪等）
+- updated_at は秒精度（SQLite）のため、実行時点の秒以降に更新された行は
+  次回に回す（ウォーターマークと同じ秒の更新を取りこぼさない）
+- 最新状態は url ごとに snapshot_date が最大の行（load_parquet_history 参照）
+
+使い方:
+    python parquet_export.py            # 増分
+    python parquet_export.py --full     # 全件で作り直し
+"""
+
+import os
+import json
+import shutil
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import config
+from database import db
+from property_normalize import typed_fields
+
+PARQUET_EXPORT_DIR: str = config.PARQUET_EXPORT_DIR
+WATERMARK_FILE: str = "_watermarks.json"
+ROW_GROUP_SIZE: int = 5000
+# Supabase の updated_at は NOW()（トランザクション開始時刻）なので、
+# 実行中のトランザクション分の余裕を持たせる
+SUPABASE_CUTOFF_LAG_SECONDS: int = 5
+PROPERTY_DATA_PREFIX: str = "property_data."
+
+# (カラム名, 型名) — 型名は _arrow_type で pyarrow の型に変換
+BASE_COLUMNS = [
+    ("id", "string"),
+    ("url", "string"),
+    ("category", "string"),
+    ("category_type", "string"),
+    ("category_name_ja", "string"),
+    ("genre_name_ja", "string"),
+    ("title", "string"),
+    ("price", "string"),
+    ("price_yen", "float64"),
+    ("rent_yen", "float64"),
+    ("land_m2", "float64"),
+    ("floor_m2", "float64"),
+    ("layout", "string"),
+    ("built_year", "int64"),
+    ("favorites", "int64"),
+    ("update_date", "string"),
+    ("expiry_date", "string"),
+    ("company_name", "string"),
+    ("images", "list<string>"),
+    ("is_active", "bool"),
+    ("first_seen_date", "date32"),
+    ("last_seen_date", "date32"),
+    ("created_at", "timestamp"),
+    ("updated_at", "timestamp"),
+]
+BASE_COLUMN_NAMES = {name for name, _ in BASE_COLUMNS}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _arrow_type(pa, type_name: str):
+    return {
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+        "date32": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "list<string>": pa.list_(pa.string()),
+    }[type_name]
+
+
+def _to_date(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _to_timestamp(value: Any) -> Optional[datetime]:
+    """SQLite の 'YYYY-MM-DD HH:MM:SS'（UTC）/ Supabase の ISO8601 → naive UTC"""
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _export_cutoff() -> str:
+    """この時刻より前に更新された行だけを出力する（排他的上限、DB の updated_at 形式）"""
+    now = datetime.now(timezone.utc)
+    if db.db_type == "sqlite":
+        return now.strftime("%Y-%m-%d %H:%M:%S")
+    return (now - timedelta(seconds=SUPABASE_CUTOFF_LAG_SECONDS)).isoformat()
+
+
+def _property_data_column(key: str) -> str:
+    return PROPERTY_DATA_PREFIX + key if key in BASE_COLUMN_NAMES else key
+
+
+def _to_record(row: Dict[str, Any], property_keys: List[str]) -> Dict[str, Any]:
+    property_data = row.get("property_data") or {}
+    if isinstance(property_data, str):
+        try:
+            property_data = json.loads(property_data)
+        except json.JSONDecodeError:
+            property_data = {}
+    images = row.get("images") or []
+    if isinstance(images, str):
+        try:
+            images = json.loads(images)
+        except json.JSONDecodeError:
+            images = []
+
+    record = {
+        "id": str(row["id"]) if row.get("id") is not None else None,
+        "url": row.get("url"),
+        "category": row.get("category"),
+        "category_type": row.get("category_type"),
+        "category_name_ja": row.get("category_name_ja"),
+        "genre_name_ja": row.get("genre_name_ja"),
+        "title": row.get("title"),
+        "price": row.get("price"),
+        "favorites": _to_int(row.get("favorites")),
+        "update_date": row.get("update_date"),
+        "expiry_date": row.get("expiry_date"),
+        "company_name": row.get("company_name"),
+        "images": [str(i) for i in images] if isinstance(images, list) else [],
+        "is_active": bool(row["is_active"]) if row.get("is_active") is not None else None,
+        "first_seen_date": _to_date(row.get("first_seen_date")),
+        "last_seen_date": _to_date(row.get("last_seen_date")),
+        "created_at": _to_timestamp(row.get("created_at")),
+        "updated_at": _to_timestamp(row.get("updated_at")),
+    }
+    record.update(typed_fields(row.get("category"), row.get("price"), property_data))
+    for key in property_keys:
+        value = property_data.get(key) if isinstance(property_data, dict) else None
+        record[_property_data_column(key)] = None if value is None else str(value)
+    return record
+
+
+def _batched(items: Iterable[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_watermarks(root: str) -> Dict[str, Dict[str, Any]]:
+    """{category: {"updated_at": ウォーターマーク, "snapshot_date": 最終出力日, "base": その日の基点}}"""
+    path = os.path.join(root, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_watermarks(root: str, watermarks: Dict[str, Dict[str, Any]]) -> None:
+    path = os.path.join(root, WATERMARK_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def export_category(category: str, snapshot_date: str, base: Optional[str],
+                    cutoff: str, root: str) -> Dict[str, Any]:
+    """base < updated_at < cutoff の 1 カテゴリ分を 1 パーティションに書き出す。
+
+    1 パス目で property_data のキー集合と updated_at の最大値を確定し、
+    2 パス目でスキーマ固定の ParquetWriter に行グループ単位で書く。
+    1 パス目以降に更新された行（updated_at > 最大値）は次回に回す。
+    戻り値: {"rows": 書いた行数, "updated_at": 新しいウォーターマーク}
+    """
+    pa = _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    property_keys: Dict[str, None] = {}
+    high_watermark: Optional[str] = None
+    for row in db.iter_properties_updated_since(base, cutoff, category=category):
+        property_data = row.get("property_data")
+        if isinstance(property_data, dict):
+            for key in property_data:
+                property_keys.setdefault(key, None)
+        updated_at = row.get("updated_at")
+        if updated_at and (high_watermark is None or updated_at > high_watermark):
+            high_watermark = updated_at
+
+    if high_watermark is None:
+        return {"rows": 0, "updated_at": base}
+
+    keys = list(property_keys)
+    fields = [pa.field(name, _arrow_type(pa, type_name)) for name, type_name in BASE_COLUMNS]
+    fields += [pa.field(_property_data_column(key), pa.string()) for key in keys]
+    schema = pa.schema(fields)
+
+    partition_dir = os.path.join(root, f"category={category}", f"snapshot_date={snapshot_date}")
+    os.makedirs(partition_dir, exist_ok=True)
+    path = os.path.join(partition_dir, "part-0.parquet")
+    tmp_path = path + ".tmp"
+
+    rows_written = 0
+    rows = (
+        _to_record(row, keys)
+        for row in db.iter_properties_updated_since(base, cutoff, category=category)
+        if not row.get("updated_at") or row["updated_at"] <= high_watermark
+    )
+    writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+    try:
+        for batch in _batched(rows, ROW_GROUP_SIZE):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            rows_written += len(batch)
+    finally:
+        writer.close()
+    os.replace(tmp_path, path)
+    return {"rows": rows_written, "updated_at": high_watermark}
+
+
+def export_parquet(root: Optional[str] = None, snapshot_date: Optional[str] = None,
+                   full: bool = False, categories: Optional[List[str]] = None) -> Dict[str, int]:
+    """全カテゴリを増分エクスポート。戻り値: {category: 書いた行数}"""
+    _require_pyarrow()
+    root = root or PARQUET_EXPORT_DIR
+    snapshot_date = snapshot_date or date.today().isoformat()
+    os.makedirs(root, exist_ok=True)
+    watermarks = load_watermarks(root)
+    cutoff = _export_cutoff()
+
+    results: Dict[str, int] = {}
+    for category in categories or list(config.CATEGORIES.keys()):
+        if full:
+            shutil.rmtree(os.path.join(root, f"category={category}"), ignore_errors=True)
+            watermarks.pop(category, None)
+            save_watermarks(root, watermarks)
+        state = watermarks.get(category, {})
+        # 同じ日の再実行はその日の基点から書き直す
+        base = state.get("base") if state.get("snapshot_date") == snapshot_date else state.get("updated_at")
+
+        result = export_category(category, snapshot_date, base, cutoff, root)
+        results[category] = result["rows"]
+        if result["rows"]:
+            watermarks[category] = {"updated_at": result["updated_at"], "snapshot_date": snapshot_date, "base": base}
+            save_watermarks(root, watermarks)
+            print(f"  [{category}] {result['rows']} changed rows -> snapshot_date={snapshot_date}")
+        else:
+            print(f"  [{category}] no changes since {base or 'beginning'}")
+    return results
+
+
+def load_parquet_history(root: Optional[str] = None, categories: Optional[List[str]] = None,
+                         since: Optional[str] = None, latest: bool = False):
+    """エクスポート済みパーティションを 1 つの pyarrow.Table として読む。
+
+    パーティション毎に property_data 由来のカラムが異なるため、
+    スキーマを統合してから読み込む（欠けたカラムは null）。
+    latest=True なら url ごとに最新 snapshot_date の行だけを返す。
+    """
+    pa = _require_pyarrow()
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    root = root or PARQUET_EXPORT_DIR
+    files = []
+    for category_dir in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        if not category_dir.startswith("category="):
+            continue
+        if categories and category_dir.split("=", 1)[1] not in categories:
+            continue
+        for snapshot_dir in sorted(os.listdir(os.path.join(root, category_dir))):
+            if since and snapshot_dir.split("=", 1)[-1] < since:
+                continue
+            path = os.path.join(root, category_dir, snapshot_dir, "part-0.parquet")
+            if os.path.exists(path):
+                files.append(path)
+    if not files:
+        return pa.table({})
+
+    partitioning = ds.partitioning(
+        pa.schema([("category", pa.string()), ("snapshot_date", pa.string())]), flavor="hive"
+    )
+    schema = pa.unify_schemas([pq.read_schema(f) for f in files] + [partitioning.schema])
+    table = ds.dataset(files, schema=schema, format="parquet",
+                       partitioning=partitioning, partition_base_dir=root).to_table()
+    if latest:
+        table = table.sort_by([("url", "ascending"), ("snapshot_date", "descending")])
+        urls = table.column("url").to_pylist()
+        keep = [i for i, url in enumerate(urls) if i == 0 or url != urls[i - 1]]
+        table = table.take(pa.array(keep, type=pa.int64()))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="properties を Parquet に増分エクスポート")
+    parser.add_argument("--full", action="store_true", help="既存パーティションを削除して全件で作り直す")
+    parser.add_argument("--date", help="snapshot_date（既定: 今日）")
+    parser.add_argument("--root", help=f"出力先（既定: {PARQUET_EXPORT_DIR}）")
+    args = parser.parse_args()
+
+    print(f"Exporting Parquet ({db.db_type}) -> {args.root or PARQUET_EXPORT_DIR}")
+    results = export_parquet(root=args.root, snapshot_date=args.date, full=args.full)
+    print(f"✅ {sum(results.values())} rows in {sum(1 for n in results.values() if n)} partition(s)")
+
+
+if __name__ == "__main__":
+    main()
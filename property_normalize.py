@@ -0,0 +1,365 @@
+"""
+物件データの正規化（価格・面積・間取り・築年の数値化）
+
+e-uchina.net の自由記述（"4,980万円", "1億2,000万円", "5.8万円", "158.26㎡", "47.87坪" など）
+を数値に変換する。ルールはダッシュボードの sales-dashboard/src/lib/price.ts と同じ。
+築年月は market-price/route.ts の parseBuildingAgeYears と同じ規則で西暦年にする。
+
+価格・面積の解析はこのモジュールに一本化している（統計・日次レポート・CSV）。
+- parse_price_yen / parse_area_m2: 1 件ずつ（None = 解析不能）
+- parse_price_yen_batch / parse_area_m2_batch: 配列を一括（NaN = 解析不能）。
+  重複を除いた文字列を NumPy のコードポイント行列で解析する
+- 両者の一致は tests/test_property_normalize.py で確認する
+
+typed_fields の結果は properties の実カラム（TYPED_COLUMNS）として
+書き込み時に保存される（transform_to_db_format / Database.upsert_property）。
+"""
+
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+# 賃貸カテゴリは 家賃、売買カテゴリは 価格
+RENTAL_CATEGORIES = frozenset({"jukyo", "jigyo", "yard", "parking"})
+
+TSUBO_M2 = 3.30579
+
+RENT_KEYS = ("家賃", "賃料")
+SALE_PRICE_KEYS = ("価格", "販売価格")
+LAND_AREA_KEYS = ("土地面積",)
+FLOOR_AREA_KEYS = ("建物面積", "専有面積", "延床面積", "使用部分面積")
+LAYOUT_KEYS = ("間取り",)
+BUILT_KEYS = ("築年月", "築年")
+
+# properties に保存する型付きカラム（SQLite の型）
+TYPED_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("price_yen", "REAL"),
+    ("rent_yen", "REAL"),
+    ("land_m2", "REAL"),
+    ("floor_m2", "REAL"),
+    ("layout", "TEXT"),
+    ("built_year", "INTEGER"),
+)
+TYPED_COLUMN_NAMES: Tuple[str, ...] = tuple(name for name, _ in TYPED_COLUMNS)
+
+# 価格帯の境界（円）。集計テーブルの price_band キーになる
+RENT_BAND_EDGES_YEN: Tuple[int, ...] = (50_000, 80_000, 120_000, 200_000)
+SALE_BAND_EDGES_YEN: Tuple[int, ...] = (10_000_000, 20_000_000, 30_000_000, 50_000_000, 100_000_000)
+
+# 和暦の元年 - 1
+ERA_OFFSETS = {"令和": 2018, "平成": 1988, "昭和": 1925}
+
+_FULLWIDTH_DIGITS = str.maketrans("０１２３４５６７８９．", "0123456789.")
+_FULLWIDTH_ALNUM = str.maketrans(
+    "０１２３４５６７８９ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚ＋",
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ+",
+)
+_INQUIRY_RE = re.compile(r"問|相談|未定|非公開")
+_RANGE_SPLIT_RE = re.compile(r"[～〜~\-－]")
+_OKU_RE = re.compile(r"(\d+(?:\.\d+)?)\s*億")
+_OKU_MAN_RE = re.compile(r"億\s*(\d+(?:\.\d+)?)\s*万")
+_MAN_RE = re.compile(r"(\d+(?:\.\d+)?)\s*万")
+_YEN_RE = re.compile(r"(\d+)\s*円")
+_NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)")
+_TSUBO_RE = re.compile(r"(\d+(?:\.\d+)?)\s*坪")
+_M2_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:m[²2]|㎡|平米)", re.IGNORECASE)
+_LAYOUT_RE = re.compile(r"(\d+)\s*(S?LDK|S?DK|SK|K|R)")
+_WESTERN_YEAR_RE = re.compile(r"((?:19|20)\d{2})")
+_ERA_YEAR_RE = re.compile(r"(令和|平成|昭和)\s*(\d{1,2}|元)")
+
+
+def normalize_digits(text: str) -> str:
+    """全角数字 → 半角、桁区切りカンマを除去"""
+    return text.translate(_FULLWIDTH_DIGITS).replace(",", "").replace("，", "")
+
+
+def parse_price_yen(text: Any) -> Optional[float]:
+    """価格文字列 → 円。"お問い合わせ" 等や解析不能は None。範囲は先頭の値。"""
+    if not text or not isinstance(text, str):
+        return None
+    if _INQUIRY_RE.search(text):
+        return None
+    return _parse_price_segment(normalize_digits(_RANGE_SPLIT_RE.split(text)[0]))
+
+
+def _parse_price_segment(s: str) -> Optional[float]:
+    m = _OKU_RE.search(s)
+    if m:
+        total = float(m.group(1)) * 100_000_000
+        m = _OKU_MAN_RE.search(s)
+        if m:
+            total += float(m.group(1)) * 10_000
+        return total
+    m = _MAN_RE.search(s)
+    if m:
+        return float(m.group(1)) * 10_000
+    m = _YEN_RE.search(s)
+    if m:
+        return float(m.group(1))
+    m = _NUMBER_RE.search(s)
+    if m:
+        # 単位なし: 10万以上は円、それ未満は万円とみなす
+        value = float(m.group(1))
+        return value if value >= 100_000 else value * 10_000
+    return None
+
+
+def parse_price_range_yen(text: Any) -> Tuple[Optional[float], Optional[float]]:
+    """"3,980万円～4,500万円" → (最小, 最大) 円。単一価格は (価格, 価格)。"""
+    if not text or not isinstance(text, str) or _INQUIRY_RE.search(text):
+        return None, None
+    values = [v for v in (_parse_price_segment(normalize_digits(part))
+                          for part in _RANGE_SPLIT_RE.split(text)) if v is not None]
+    if not values:
+        return None, None
+    return min(values), max(values)
+
+
+def parse_area_m2(text: Any) -> Optional[float]:
+    """面積文字列 → ㎡（坪は換算、単位なしは㎡）"""
+    if not text or not isinstance(text, str):
+        return None
+    s = normalize_digits(text)
+    m = _TSUBO_RE.search(s)
+    if m:
+        return float(m.group(1)) * TSUBO_M2
+    m = _M2_RE.search(s) or _NUMBER_RE.search(s)
+    if m:
+        return float(m.group(1))
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 一括（ベクトル化）版 — 結果は float64 配列、解析不能は NaN
+#
+# 重複を除いた文字列をコードポイント行列（uint32）にし、大半を占める
+# 「数字[,.]」+ 単位（万 / 万円 / 億 / 億円 / 円 / ㎡ / 坪 ...）だけの文字列を
+# NumPy で一括解析する。範囲・お問い合わせ・億+万などそれ以外は
+# 1 件ずつの関数にフォールバックするので、結果は常に scalar 版と同一。
+# ---------------------------------------------------------------------------
+
+_FAST_WIDTH = 24          # これより長い文字列はフォールバック
+_FAST_MAX_DIGITS = 15     # int64 の仮数で正確に表せる桁数
+_POW10 = 10 ** np.arange(_FAST_MAX_DIGITS + 1, dtype=np.int64)
+
+
+def _unit_code(unit: str) -> int:
+    """単位（0〜2 文字）→ 整数キー"""
+    chars = [ord(c) for c in unit] + [0, 0]
+    return (chars[0] << 21) | chars[1]
+
+
+def _unit_codes(*units: str) -> np.ndarray:
+    return np.array([_unit_code(u) for u in units], dtype=np.int64)
+
+
+_BARE_UNIT = _unit_codes("")
+_MAN_UNITS = _unit_codes("万", "万円")
+_OKU_UNITS = _unit_codes("億", "億円")
+_YEN_UNITS = _unit_codes("円")
+_M2_UNITS = _unit_codes("", "㎡", "平米", "m²", "M²", "m2", "M2")
+_TSUBO_UNITS = _unit_codes("坪")
+
+
+def _factorize_strings(values: Iterable[Any]) -> Tuple[np.ndarray, list]:
+    """(各要素の uniques 内の位置 / None は -1, 重複を除いた値のリスト)
+
+    文字列以外の値は "" に置き換える（scalar 版と同じく解析不能 = NaN になる）。
+    pandas は一括解析のときだけ読み込む（import に約 0.1 秒かかるため）。
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(list(values), dtype=object))
+    return codes, [u if isinstance(u, str) else "" for u in uniques]
+
+
+def _numeric_prefix(strings: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """先頭の「数字・カンマ・小数点」部分を一括で数値化する。
+
+    戻り値: (値, 単位キー, 小数点を含むか, 高速路で扱えるか)
+    """
+    n = len(strings)
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=n)
+    chars = np.array(strings, dtype=f"<U{_FAST_WIDTH}").view(np.uint32)
+    chars = chars.reshape(n, -1).astype(np.int64)
+    width = chars.shape[1]
+    chars = np.pad(chars, ((0, 0), (0, 2)))
+
+    fullwidth = (chars >= 0xFF10) & (chars <= 0xFF19)
+    chars[fullwidth] -= 0xFEE0
+    chars[chars == 0xFF0C] = ord(",")
+    chars[chars == 0xFF0E] = ord(".")
+
+    is_digit = (chars >= 48) & (chars <= 57)
+    is_dot = chars == 46
+    numeric = is_digit | is_dot | (chars == 44)
+    prefix_len = np.argmin(numeric, axis=1)          # 最初の数字以外（末尾の 0 パディング含む）
+    in_prefix = np.arange(chars.shape[1]) < prefix_len[:, None]
+
+    digit = is_digit & in_prefix
+    dot = is_dot & in_prefix
+    n_digits = digit.sum(axis=1)
+    n_dots = dot.sum(axis=1)
+    dot_pos = np.where(n_dots == 1, np.argmax(dot, axis=1), prefix_len)
+    n_frac = (digit & (np.arange(chars.shape[1]) > dot_pos[:, None])).sum(axis=1)
+
+    # 仮数 = 数字を右から数えた桁で重み付け（カンマ・小数点は無視）
+    exponent = np.cumsum(digit[:, ::-1], axis=1)[:, ::-1] - 1
+    weights = np.where(digit, _POW10[np.clip(exponent, 0, _FAST_MAX_DIGITS)], 0)
+    mantissa = ((chars - 48) * weights).sum(axis=1)
+    # int / 10**k は float(str) と同じく正しく丸められる（k <= 15）
+    values = mantissa / _POW10[np.clip(n_frac, 0, _FAST_MAX_DIGITS)].astype(np.float64)
+
+    rows = np.arange(n)
+    unit = (chars[rows, prefix_len] << 21) | chars[rows, prefix_len + 1]
+    ok = ((lengths <= width) & (lengths - prefix_len <= 2)
+          & (n_digits >= 1) & (n_digits <= _FAST_MAX_DIGITS)
+          & ((n_dots == 0) | ((n_dots == 1) & (n_frac >= 1) & (n_digits > n_frac))))
+    return values, unit, n_dots > 0, ok
+
+
+def _expand(codes: np.ndarray, unique_values: np.ndarray) -> np.ndarray:
+    out = np.full(len(codes), np.nan)
+    mask = codes >= 0
+    out[mask] = unique_values[codes[mask]]
+    return out
+
+
+def _fallback(strings: list, result: np.ndarray, todo: np.ndarray, parse) -> None:
+    for i in np.flatnonzero(todo):
+        value = parse(strings[i])
+        result[i] = np.nan if value is None else value
+
+
+def parse_price_yen_batch(values: Iterable[Any]) -> np.ndarray:
+    """parse_price_yen の一括版（同じ規則・同じ結果）"""
+    codes, strings = _factorize_strings(values)
+    if not strings:
+        return np.full(len(codes), np.nan)
+
+    number, unit, has_dot, ok = _numeric_prefix(strings)
+    result = np.full(len(strings), np.nan)
+    man, oku = ok & np.isin(unit, _MAN_UNITS), ok & np.isin(unit, _OKU_UNITS)
+    yen, bare = ok & np.isin(unit, _YEN_UNITS) & ~has_dot, ok & np.isin(unit, _BARE_UNIT)
+    result[man] = number[man] * 10_000
+    result[oku] = number[oku] * 100_000_000
+    result[yen] = number[yen]
+    result[bare] = np.where(number[bare] >= 100_000, number[bare], number[bare] * 10_000)
+    _fallback(strings, result, ~(man | oku | yen | bare), parse_price_yen)
+    return _expand(codes, result)
+
+
+def parse_area_m2_batch(values: Iterable[Any]) -> np.ndarray:
+    """parse_area_m2 の一括版（同じ規則・同じ結果）"""
+    codes, strings = _factorize_strings(values)
+    if not strings:
+        return np.full(len(codes), np.nan)
+
+    number, unit, _, ok = _numeric_prefix(strings)
+    result = np.full(len(strings), np.nan)
+    m2, tsubo = ok & np.isin(unit, _M2_UNITS), ok & np.isin(unit, _TSUBO_UNITS)
+    result[m2] = number[m2]
+    result[tsubo] = number[tsubo] * TSUBO_M2
+    _fallback(strings, result, ~(m2 | tsubo), parse_area_m2)
+    return _expand(codes, result)
+
+
+def parse_layout(text: Any) -> Optional[str]:
+    """間取り → 正規化した表記（"３ＬＤＫ" → "3LDK", "ワンルーム" → "1R"）。複数表記は先頭。"""
+    if not text or not isinstance(text, str):
+        return None
+    s = text.translate(_FULLWIDTH_ALNUM).replace(" ", "").replace("\u3000", "")
+    if "ワンルーム" in s:
+        return "1R"
+    m = _LAYOUT_RE.search(s)
+    if m:
+        return f"{int(m.group(1))}{m.group(2)}"
+    return None
+
+
+def parse_built_year(text: Any, today: Optional[date] = None) -> Optional[int]:
+    """築年月 → 西暦の建築年（"2015年3月", "平成27年", "令和元年5月", "2015/03"）。新築は今年。"""
+    if not text or not isinstance(text, str):
+        return None
+    s = normalize_digits(text.strip())
+    if not s or s == "不明":
+        return None
+    if s == "新築":
+        return (today or date.today()).year
+
+    m = _WESTERN_YEAR_RE.search(s)
+    if m:
+        return int(m.group(1))
+    m = _ERA_YEAR_RE.search(s)
+    if m:
+        era_year = 1 if m.group(2) == "元" else int(m.group(2))
+        return ERA_OFFSETS[m.group(1)] + era_year
+    return None
+
+
+def _yen_label(yen: int) -> str:
+    """10_000_000 → "1,000万"、100_000_000 → "1億"（単位「円」は呼び出し側で付ける）"""
+    if yen % 100_000_000 == 0:
+        return f"{yen // 100_000_000}億"
+    return f"{yen // 10_000:,}万"
+
+
+def _band_labels(prefix: str, edges: Tuple[int, ...]) -> Tuple[str, ...]:
+    labels = [f"{prefix}:〜{_yen_label(edges[0])}円"]
+    labels += [f"{prefix}:{_yen_label(lo)}〜{_yen_label(hi)}円" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f"{prefix}:{_yen_label(edges[-1])}円〜")
+    return tuple(labels)
+
+
+RENT_BANDS: Tuple[str, ...] = _band_labels("賃貸", RENT_BAND_EDGES_YEN)
+SALE_BANDS: Tuple[str, ...] = _band_labels("売買", SALE_BAND_EDGES_YEN)
+PRICE_BANDS: Tuple[str, ...] = RENT_BANDS + SALE_BANDS   # 表示順
+
+
+def price_band(category: str, price_yen: Optional[float], rent_yen: Optional[float]) -> Optional[str]:
+    """型付きカラムの価格 → 価格帯ラベル（"賃貸:5万〜8万円", "売買:1億円〜" など）"""
+    if category in RENTAL_CATEGORIES:
+        value, edges, labels = rent_yen, RENT_BAND_EDGES_YEN, RENT_BANDS
+    else:
+        value, edges, labels = price_yen, SALE_BAND_EDGES_YEN, SALE_BANDS
+    if value is None or value != value or value <= 0:
+        return None
+    return labels[sum(value >= edge for edge in edges)]
+
+
+def _first(data: Dict[str, Any], keys) -> Optional[str]:
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return None
+
+
+def typed_fields(category: str, price: Optional[str], property_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """1 物件分の型付きカラム {price_yen, rent_yen, land_m2, floor_m2, layout, built_year}"""
+    data = property_data if isinstance(property_data, dict) else {}
+    if category in RENTAL_CATEGORIES:
+        price_yen = None
+        rent_yen = parse_price_yen(_first(data, RENT_KEYS) or price)
+    else:
+        price_yen = parse_price_yen(_first(data, SALE_PRICE_KEYS) or price)
+        rent_yen = None
+
+    land_m2 = parse_area_m2(_first(data, LAND_AREA_KEYS))
+    floor_m2 = parse_area_m2(_first(data, FLOOR_AREA_KEYS))
+    # 土地カテゴリの「面積」は土地、それ以外は建物・専有部分
+    if category == "tochi":
+        land_m2 = land_m2 if land_m2 is not None else parse_area_m2(data.get("面積"))
+    elif floor_m2 is None:
+        floor_m2 = parse_area_m2(data.get("面積"))
+
+    return {
+        "price_yen": price_yen,
+        "rent_yen": rent_yen,
+        "land_m2": land_m2,
+        "floor_m2": floor_m2,
+        "layout": parse_layout(_first(data, LAYOUT_KEYS)),
+        "built_year": parse_built_year(_first(data, BUILT_KEYS)),
+    }
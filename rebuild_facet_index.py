@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Rebuild the facet index (/api/facets, /api/properties/filter) from the active rows of `properties`.
+
+The scraper rebuilds it after every run; run this after manual edits to
+`properties`, after changing the facet rules (Database._facet_member) or
+if the scraper reported that the rebuild failed.
+Supabase requires supabase_facet_index_migration.sql to be applied first.
+"""
+
+from database import db
+
+
+def main():
+    print(f"Rebuilding facet index ({db.db_type})...")
+    total = db.rebuild_facet_index()
+    print(f"✅ Rebuilt facet index from {total} active row(s)")
+    db.bump_data_version()
+
+
+if __name__ == "__main__":
+    main()
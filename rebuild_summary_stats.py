@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Rebuild the summary tables (stats_members / stats_counts) from `properties`.
+
+The scraper keeps them up to date incrementally; run this after manual
+edits to `properties`, after changing the price bands / city rules, or
+whenever the dashboard totals look off.
+Supabase requires supabase_summary_stats_migration.sql to be applied first.
+"""
+
+from database import db
+
+
+def main():
+    print(f"Rebuilding summary tables ({db.db_type})...")
+    total = db.rebuild_summary_stats()
+    print(f"✅ Rebuilt summary tables from {total} row(s)")
+    db.bump_data_version()
+
+
+if __name__ == "__main__":
+    main()
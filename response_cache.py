@@ -0,0 +1,291 @@
+"""
+Versioned response cache for the Flask API (server.py).
+
+The data only changes when a batch of writes finishes (the nightly scrape,
+rebuild_summary_stats.py, ...), and each batch bumps Database's data version.
+Responses are cached per (route, query string) and tagged with the data
+version and today's date (several endpoints default to "today"), so a repeat
+request costs one version read — itself memoized for a few seconds — instead
+of the full-table queries behind it.
+
+Every cached response carries a strong ETag (hash of the body; the gzip /
+brotli variants, compressed once per entry, get their own) and
+`If-None-Match` is answered with 304. Nothing is marked immutable: even a
+past-date diff changes when a listing of that day is sold or re-listed.
+
+Concurrent misses for the same key are coalesced (single flight): one request
+runs the view, the others wait for its result (at most coalesce_timeout
+seconds, then they run the view themselves). A background refresher polls
+the data version and, when it (or the date) changes and at startup, re-runs
+the hot keys so the first dashboard load after a scrape is already a hit.
+Its own requests are not counted towards the hot keys.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import date
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request
+
+from http_compression import MIN_COMPRESS_BYTES, available_encodings, compress, negotiate
+
+MUTABLE_CACHE_CONTROL = "no-cache"                                   # always revalidate (→ 304)
+MAX_TRACKED_KEYS = 1000                                             # request counts kept for hot_keys()
+WARM_ENVIRON_KEY = "response_cache.warm"                            # set on the refresher's own requests
+
+
+class _Entry:
+    __slots__ = ("tag", "body", "mimetype", "etag", "encoded")
+
+    def __init__(self, tag, body: bytes, mimetype: str, etag: str):
+        self.tag = tag
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.encoded: Dict[str, bytes] = {}     # Content-Encoding -> compressed body
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.encoded.values())
+
+
+class ResponseCache:
+    """LRU of successful GET responses, bounded by total body bytes."""
+
+    def __init__(self, get_version: Callable[[], Optional[int]], max_bytes: int,
+                 version_ttl: float = 5.0, enabled: bool = True, coalesce_timeout: float = 30.0):
+        self._get_version = get_version
+        self.max_bytes = max_bytes
+        self.version_ttl = version_ttl
+        self.coalesce_timeout = coalesce_timeout
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_read_at = 0.0
+        self._inflight: Dict[Tuple, threading.Event] = {}
+        self._requests_by_key: Counter = Counter()
+        self._refresher: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    # ---- data version ----------------------------------------------------
+
+    def current_version(self) -> Optional[int]:
+        """Data version, re-read at most every version_ttl seconds."""
+        now = time.monotonic()
+        if self._version is None or now - self._version_read_at >= self.version_ttl:
+            self._version = self._get_version()
+            self._version_read_at = now
+        return self._version
+
+    def invalidate_version(self) -> None:
+        """Force the next request to re-read the data version."""
+        self._version_read_at = 0.0
+
+    # ---- entries -----------------------------------------------------------
+
+    @staticmethod
+    def request_key() -> Tuple:
+        return (request.path, tuple(sorted(request.args.items(multi=True))))
+
+    def _get(self, key: Tuple) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: Tuple, entry: _Entry) -> None:
+        size = entry.size()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size()
+            self._entries[key] = entry
+            self._bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size()
+
+    def _encoded(self, key: Tuple, entry: _Entry, encoding: str) -> bytes:
+        """entry's body in `encoding`, compressed on first use and kept."""
+        data = entry.encoded.get(encoding)
+        if data is not None:
+            return data
+        data = compress(entry.body, encoding)
+        with self._lock:
+            if encoding not in entry.encoded:
+                entry.encoded[encoding] = data
+                if self._entries.get(key) is entry:
+                    self._bytes += len(data)
+                    self._evict()
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits,
+                    "misses": self.misses, "coalesced": self.coalesced, "data_version": self._version}
+
+    def hot_keys(self, n: int) -> List[Tuple]:
+        """The n most requested keys."""
+        with self._lock:
+            return [key for key, _ in self._requests_by_key.most_common(n)]
+
+    # ---- Flask integration -------------------------------------------------
+
+    def cached(self):
+        """Decorator for GET views returning JSON.
+
+        Non-200 responses are never cached. If the data version cannot be
+        read, responses are served uncached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != "GET":
+                    return view(*args, **kwargs)
+
+                version = self.current_version()
+                if version is None:
+                    return view(*args, **kwargs)
+                tag = (version, date.today().isoformat())
+
+                key = self.request_key()
+                entry = self._get_or_compute(key, tag, lambda: view(*args, **kwargs))
+                if isinstance(entry, Response):
+                    return entry
+                if request.environ.get(WARM_ENVIRON_KEY):
+                    return self._respond(key, entry)
+                with self._lock:
+                    self._requests_by_key[key] += 1
+                    if len(self._requests_by_key) > MAX_TRACKED_KEYS:
+                        self._requests_by_key = Counter(
+                            dict(self._requests_by_key.most_common(MAX_TRACKED_KEYS // 2)))
+                return self._respond(key, entry)
+            return wrapper
+        return decorator
+
+    def _get_or_compute(self, key: Tuple, tag, produce: Callable[[], Any]):
+        """Cached entry for (key, tag), running produce() at most once at a time.
+
+        Returns an _Entry, or the raw Response when it is not cacheable.
+        """
+        flight_key = (key, tag)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.tag == tag:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            flight = self._inflight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[flight_key] = threading.Event()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if flight.wait(self.coalesce_timeout):
+                entry = self._get(key)
+                if entry is not None and entry.tag == tag:
+                    return entry
+            # The leader's response was not cacheable (error), or the leader
+            # is hanging: run our own
+            return current_app.make_response(produce())
+
+        try:
+            response = current_app.make_response(produce())
+            if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+                return response
+            body = response.get_data()
+            entry = _Entry(tag, body, response.mimetype,
+                           hashlib.blake2b(body, digest_size=16).hexdigest())
+            self._put(key, entry)
+            return entry
+        finally:
+            with self._lock:
+                del self._inflight[flight_key]
+            flight.set()
+
+    # ---- background re-warm ------------------------------------------------
+
+    def warm(self, app, keys: Iterable[Tuple]) -> int:
+        """Request each (path, query items) key through the app so it is cached
+        for the current data version; returns the number of keys warmed."""
+        client = app.test_client()
+        headers = {"Accept-Encoding": ", ".join(available_encodings())}   # precompress as well
+        warmed = 0
+        for path, query in keys:
+            try:
+                url = f"{path}?{urlencode(query)}" if query else path
+                response = client.get(url, headers=headers, environ_overrides={WARM_ENVIRON_KEY: True})
+                if response.status_code == 200:
+                    warmed += 1
+            except Exception as e:
+                print(f"⚠️  Cache warm-up failed for {path}: {e}")
+        return warmed
+
+    def start_refresher(self, app, warm_paths: Iterable[str], hot_keys: int = 20) -> None:
+        """Warm warm_paths now, then re-warm them plus the hot_keys most
+        requested keys whenever the data version or the date changes."""
+        if not self.enabled or self._refresher is not None:
+            return
+        base_keys = [(path, ()) for path in warm_paths]
+
+        def keys_to_warm() -> List[Tuple]:
+            keys = list(base_keys)
+            keys += [k for k in self.hot_keys(hot_keys) if k not in keys]
+            return keys
+
+        def run():
+            seen = None
+            while True:
+                version = self._get_version()
+                current = (version, date.today())
+                if version is not None and current != seen:
+                    with self._lock:
+                        self._version = version
+                        self._version_read_at = time.monotonic()
+                    start = time.perf_counter()
+                    warmed = self.warm(app, keys_to_warm())
+                    print(f"✓ Response cache warmed for data version {version}: "
+                          f"{warmed} key(s) in {time.perf_counter() - start:.2f}s")
+                    seen = current
+                time.sleep(max(self.version_ttl, 1.0))
+
+        self._refresher = threading.Thread(target=run, name="response-cache-refresher", daemon=True)
+        self._refresher.start()
+
+    def _respond(self, key: Tuple, entry: _Entry) -> Response:
+        encoding = negotiate(request.accept_encodings) if len(entry.body) >= MIN_COMPRESS_BYTES else None
+        etag = f"{entry.etag}-{encoding}" if encoding else entry.etag
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif encoding:
+            response = Response(self._encoded(key, entry, encoding), mimetype=entry.mimetype)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(etag)
+        response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = MUTABLE_CACHE_CONTROL
+        response.headers["X-Data-Version"] = str(entry.tag[0])
+        return response
@@ -7,13 +7,42 @@ from flask import Flask, jsonify, request, send_from_directory, Response
 from flask_cors import CORS
 from database import db
 from datetime import datetime, date, timedelta
-from typing import Tuple, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, Any, List, Optional
 import os
+import threading
+import time
 from config import config
+from response_cache import ResponseCache
+from facet_index import FacetIndex, FACETS, BOOLEAN_FACETS
+from http_compression import negotiate, compress_stream, compress_response
 
 app = Flask(__name__, static_folder='.')
 CORS(app)
 
+# Responses are cached per route + query string until the scraper (or a
+# rebuild / backfill / import) bumps the data version; see response_cache.py
+response_cache = ResponseCache(
+    db.get_data_version,
+    max_bytes=config.API_CACHE_MAX_BYTES,
+    version_ttl=config.API_CACHE_VERSION_TTL,
+    enabled=config.API_CACHE_ENABLED,
+)
+
+# Independent queries of one request run side by side: Supabase calls are
+# blocking HTTP round trips and SQLite releases the GIL while it reads
+_query_pool = ThreadPoolExecutor(max_workers=config.API_QUERY_WORKERS, thread_name_prefix='api-query')
+
+def _concurrently(*calls):
+    """Run (fn, *args) calls on the query pool; results in call order"""
+    futures = [_query_pool.submit(fn, *args) for fn, *args in calls]
+    return [f.result() for f in futures]
+
+@app.after_request
+def _compress(response):
+    """gzip / brotli for JSON responses that are neither cached (precompressed) nor streamed"""
+    return compress_response(response, request.accept_encodings)
+
 # ================================================================
 # Static file serving
 # ================================================================
@@ -32,38 +61,118 @@ def serve_static(path):
 # Property API Endpoints
 # ================================================================
 
+def _page_args() -> Dict[str, Any]:
+    """Pagination / projection query params shared by the property listings.
+
+      - fields: Comma-separated columns to return, e.g. url,title,price (optional)
+      - after:  next_cursor of the previous page (optional)
+      - limit:  Page size (optional; without it every matching row is returned)
+      - stream: ndjson | json (optional) -- see _listing_response
+    """
+    fields = request.args.get('fields')
+    return {
+        'fields': [f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+        'after': request.args.get('after') or None,
+        'limit': request.args.get('limit', type=int),
+    }
+
+# Rows per chunk (and per compressor flush) of a streamed listing
+STREAM_CHUNK_ROWS = 200
+
+def _listing_response(where: Dict[str, Any], order: str, **extra):
+    """A property listing as one JSON page, or streamed from the DB cursor.
+
+    ?stream=ndjson -- application/x-ndjson, one property per line
+    ?stream=json   -- the usual {"success", ..., "data": [...], "count",
+                      "next_cursor"} object, written row by row
+    Streams never hold the whole result in memory, are gzip / brotli
+    encoded on the fly and bypass the response cache.
+    """
+    args = _page_args()
+    stream = request.args.get('stream')
+    if stream is None:
+        properties, next_cursor = db.get_properties_page(where=where, order=order, **args)
+        return jsonify({
+            'success': True,
+            **extra,
+            'count': len(properties),
+            'next_cursor': next_cursor,
+            'data': properties
+        })
+    if stream not in ('ndjson', 'json'):
+        raise ValueError(f"Invalid stream format: {stream}")
+    
+    limit = args['limit']
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be positive")
+    rows = db.iter_properties(where=where, fields=args['fields'], order=order, after=args['after'],
+                              limit=None if limit is None else limit + 1)
+    chunks = _ndjson_chunks(rows, limit) if stream == 'ndjson' else _json_stream_chunks(rows, limit, extra)
+    encoding = negotiate(request.accept_encodings)
+    response = Response(compress_stream(chunks, encoding),
+                        mimetype='application/x-ndjson' if stream == 'ndjson' else 'application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def _ndjson_chunks(rows, limit):
+    batch = []
+    for i, (_, row) in enumerate(rows):
+        if limit is not None and i == limit:
+            break
+        batch.append(app.json.dumps(row))
+        if len(batch) == STREAM_CHUNK_ROWS:
+            yield ('\n'.join(batch) + '\n').encode()
+            batch = []
+    if batch:
+        yield ('\n'.join(batch) + '\n').encode()
+
+def _json_stream_chunks(rows, limit, extra):
+    head = app.json.dumps({'success': True, **extra})
+    yield (head[:-1] + ', "data": [').encode()
+    count = 0
+    last_cursor = next_cursor = None
+    batch = []
+    for cursor, row in rows:
+        if limit is not None and count == limit:
+            next_cursor = last_cursor
+            break
+        batch.append(app.json.dumps(row))
+        count += 1
+        last_cursor = cursor
+        if len(batch) == STREAM_CHUNK_ROWS:
+            yield ((', ' if count > len(batch) else '') + ', '.join(batch)).encode()
+            batch = []
+    if batch:
+        yield ((', ' if count > len(batch) else '') + ', '.join(batch)).encode()
+    yield f'], "count": {count}, "next_cursor": {app.json.dumps(next_cursor)}}}'.encode()
+
+def _bad_request(e: Exception):
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 400
+
 @app.route('/api/properties/all', methods=['GET'])
+@response_cache.cached()
 def get_all_properties():
     """
     Get all active properties
     Query params:
       - category: Filter by category (optional)
       - category_type: Filter by category type 賃貸/売買 (optional)
-      - limit: Limit number of results (optional)
+      - fields / after / limit / stream: see _page_args (optional)
     """
     try:
-        # Get all active properties from database
-        properties = db.get_all_active_properties()
-        
-        # Apply filters
-        category = request.args.get('category')
-        category_type = request.args.get('category_type')
-        limit = request.args.get('limit', type=int)
-        
-        if category:
-            properties = [p for p in properties if p['category'] == category]
-        
-        if category_type:
-            properties = [p for p in properties if p['category_type'] == category_type]
-        
-        if limit:
-            properties = properties[:limit]
-        
-        return jsonify({
-            'success': True,
-            'count': len(properties),
-            'data': properties
-        })
+        where: Dict[str, Any] = {'is_active': True}
+        for key in ('category', 'category_type'):
+            if request.args.get(key):
+                where[key] = request.args[key]
+        
+        return _listing_response(where, 'id')
+    except ValueError as e:
+        return _bad_request(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -71,12 +180,14 @@ def get_all_properties():
         }), 500
 
 @app.route('/api/properties/new', methods=['GET'])
+@response_cache.cached()
 def get_new_properties():
     """
-    Get properties added today (or specific date)
+    Get properties added today (or specific date), newest first
     Query params:
       - date: Date in YYYY-MM-DD format (optional, defaults to today)
       - category: Filter by category (optional)
+      - fields / after / limit / stream: see _page_args (optional)
     """
     try:
         target_date = request.args.get('date')
@@ -85,173 +196,265 @@ def get_new_properties():
         else:
             target_date = date.today()
         
-        # Query properties by first_seen_date
-        if db.db_type == 'sqlite':
-            properties = _get_new_properties_sqlite(target_date)
-        else:
-            properties = _get_new_properties_supabase(target_date)
-        
-        # Apply category filter
-        category = request.args.get('category')
-        if category:
-            properties = [p for p in properties if p['category'] == category]
-        
-        return jsonify({
-            'success': True,
-            'date': target_date.isoformat(),
-            'count': len(properties),
-            'data': properties
-        })
+        return _listing_response(_new_where(target_date, request.args.get('category')), '-id',
+                                 date=target_date.isoformat())
+    except ValueError as e:
+        return _bad_request(e)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def _get_new_properties_sqlite(target_date):
-    """SQLite implementation for getting new properties"""
-    import sqlite3
-    import json
-    
-    conn = db._get_sqlite_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("""
-            SELECT * FROM properties 
-            WHERE first_seen_date = ? AND is_active = 1
-            ORDER BY created_at DESC
-        """, (target_date.isoformat(),))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            data = dict(row)
-            data["images"] = json.loads(data["images"]) if data["images"] else []
-            data["property_data"] = json.loads(data["property_data"]) if data["property_data"] else {}
-            data["is_active"] = bool(data["is_active"])
-            results.append(data)
-        
-        return results
-    finally:
-        conn.close()
-
-def _get_new_properties_supabase(target_date):
-    """Supabase implementation for getting new properties"""
-    result = db.supabase.table("properties")\
-        .select("*")\
-        .eq("first_seen_date", target_date.isoformat())\
-        .eq("is_active", True)\
-        .order("created_at", desc=True)\
-        .execute()
-    
-    return result.data if result.data else []
+def _new_where(target_date, category=None) -> Dict[str, Any]:
+    """Filter for properties first seen on target_date"""
+    where: Dict[str, Any] = {'first_seen_date': target_date.isoformat(), 'is_active': True}
+    if category:
+        where['category'] = category
+    return where
+
+def _sold_where(category=None, on_date=None, since_date=None) -> Dict[str, Any]:
+    """Filter for properties marked inactive on / since a date"""
+    where: Dict[str, Any] = {'is_active': False}
+    if on_date:
+        where['last_seen_date'] = on_date
+    if since_date:
+        where['last_seen_date__gte'] = since_date
+    if category:
+        where['category'] = category
+    return where
 
 @app.route('/api/properties/sold', methods=['GET'])
+@response_cache.cached()
 def get_sold_properties():
     """
-    Get recently sold/removed properties
+    Get recently sold/removed properties, most recent first
     Query params:
       - days: Number of days to look back (default: 7)
       - category: Filter by category (optional)
+      - fields / after / limit / stream: see _page_args (optional)
     """
     try:
         days_back = request.args.get('days', default=7, type=int)
         cutoff_date = (date.today() - timedelta(days=days_back)).isoformat()
         
-        # Query inactive properties
-        if db.db_type == 'sqlite':
-            properties = _get_sold_properties_sqlite(cutoff_date)
-        else:
-            properties = _get_sold_properties_supabase(cutoff_date)
-        
-        # Apply category filter
-        category = request.args.get('category')
-        if category:
-            properties = [p for p in properties if p['category'] == category]
-        
+        return _listing_response(_sold_where(request.args.get('category'), since_date=cutoff_date),
+                                 '-last_seen_date', days_back=days_back)
+    except ValueError as e:
+        return _bad_request(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/properties/search', methods=['GET'])
+@response_cache.cached()
+def search_properties():
+    """
+    Full-text search over title, company, 所在地 and property details, best match first
+    Query params:
+      - q: Search terms separated by spaces, e.g. 北谷 3LDK ペット可 (required; every term must match)
+      - active: true / false to only return active / sold properties (optional; default both)
+      - category / category_type: Filter (optional)
+      - fields / after: see _page_args (optional)
+      - limit: Page size (optional; default 20, max 100)
+    """
+    try:
+        query = request.args.get('q', '')
+        where: Dict[str, Any] = {}
+        active = request.args.get('active')
+        if active is not None:
+            if active not in ('true', 'false'):
+                raise ValueError(f"Invalid active: {active}")
+            where['is_active'] = active == 'true'
+        for key in ('category', 'category_type'):
+            if request.args.get(key):
+                where[key] = request.args[key]
+
+        args = _page_args()
+        limit = 20 if args['limit'] is None else args['limit']
+        properties, next_cursor = db.search_properties(query, where=where, fields=args['fields'],
+                                                       after=args['after'], limit=limit)
         return jsonify({
             'success': True,
-            'days_back': days_back,
+            'query': query,
             'count': len(properties),
+            'next_cursor': next_cursor,
             'data': properties
         })
+    except ValueError as e:
+        return _bad_request(e)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def _get_sold_properties_sqlite(cutoff_date):
-    """SQLite implementation for getting sold properties"""
-    import sqlite3
-    import json
-    
-    conn = db._get_sqlite_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
+# The facet index stored by the last scrape (or rebuild_facet_index.py),
+# reloaded when the data version changes; built from `properties` if none
+# is stored yet. Without a data version (table missing or unreadable) the
+# stored index's built_at decides, and an index built from `properties`
+# is rebuilt after FACET_INDEX_MAX_AGE seconds.
+FACET_INDEX_MAX_AGE = 300
+
+_facet_lock = threading.Lock()          # guards _facet_state
+_facet_reload_lock = threading.Lock()   # one request (re)loads at a time
+_facet_state: Dict[str, Any] = {'stamp': None, 'index': None, 'loaded_at': 0.0}
+
+def _facet_stamp() -> Optional[Tuple[str, Any]]:
+    version = response_cache.current_version()
+    if version is not None:
+        return ('version', version)
+    built_at = db.get_facet_index_built_at()
+    return ('built_at', built_at) if built_at is not None else None
+
+def _facet_index_is_current(stamp) -> bool:
+    if _facet_state['index'] is None or stamp != _facet_state['stamp']:
+        return False
+    return stamp is not None or time.monotonic() - _facet_state['loaded_at'] < FACET_INDEX_MAX_AGE
+
+def _facet_index() -> FacetIndex:
+    stamp = _facet_stamp()
+    with _facet_lock:
+        if _facet_index_is_current(stamp):
+            return _facet_state['index']
+        previous = _facet_state['index']
+    # While one request reloads (a full scan if nothing is stored), the
+    # others keep answering from the previous index instead of queueing
+    if not _facet_reload_lock.acquire(blocking=previous is None):
+        return previous
     try:
-        cursor.execute("""
-            SELECT * FROM properties 
-            WHERE is_active = 0 AND last_seen_date >= ?
-            ORDER BY last_seen_date DESC
-        """, (cutoff_date,))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            data = dict(row)
-            data["images"] = json.loads(data["images"]) if data["images"] else []
-            data["property_data"] = json.loads(data["property_data"]) if data["property_data"] else {}
-            data["is_active"] = bool(data["is_active"])
-            results.append(data)
-        
-        return results
+        with _facet_lock:
+            if _facet_index_is_current(stamp):
+                return _facet_state['index']
+        index = db.load_facet_index()
+        if index is None:
+            index = db.build_facet_index()
+        with _facet_lock:
+            _facet_state.update(stamp=stamp, index=index, loaded_at=time.monotonic())
+        return index
     finally:
-        conn.close()
-
-def _get_sold_properties_supabase(cutoff_date):
-    """Supabase implementation for getting sold properties"""
-    result = db.supabase.table("properties")\
-        .select("*")\
-        .eq("is_active", False)\
-        .gte("last_seen_date", cutoff_date)\
-        .order("last_seen_date", desc=True)\
-        .execute()
+        _facet_reload_lock.release()
+
+def _facet_filters() -> Dict[str, List[str]]:
+    """Facet query params, e.g. ?city=那覇市,浦添市&layout=3LDK&pet=true (comma = OR)"""
+    filters = {}
+    for facet in FACETS:
+        raw = request.args.get(facet)
+        if not raw:
+            continue
+        values = list(dict.fromkeys(v.strip() for v in raw.split(',') if v.strip()))
+        for value in values:
+            if facet in BOOLEAN_FACETS and value not in ('true', 'false'):
+                raise ValueError(f"Invalid {facet}: {value}")
+        filters[facet] = values
+    return filters
+
+@app.route('/api/facets', methods=['GET'])
+@response_cache.cached()
+def get_facets():
+    """
+    Facet counts of the active properties for a filter combination
+    Query params (all optional; comma-separated values are OR, facets are AND):
+      - category / category_type / city / layout / price_band: e.g. city=那覇市,浦添市
+      - pet / parking: true / false
+    Each facet's counts apply the filters on the other facets.
+    """
+    try:
+        filters = _facet_filters()
+        index = _facet_index()
+        total, facets = index.counts(filters)
+        return jsonify({
+            'success': True,
+            'filters': filters,
+            'total': total,
+            'facets': facets,
+            'built_at': index.built_at
+        })
+    except ValueError as e:
+        return _bad_request(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+FILTER_MAX_LIMIT = 100
+
+@app.route('/api/properties/filter', methods=['GET'])
+@response_cache.cached()
+def filter_properties():
+    """
+    Active properties matching facet filters, newest first
+    Query params:
+      - category / category_type / city / layout / price_band / pet / parking: see /api/facets (optional)
+      - fields / after: see _page_args (optional)
+      - limit: Page size (optional; default 20, max 100)
+    """
+    try:
+        filters = _facet_filters()
+        args = _page_args()
+        limit = 20 if args['limit'] is None else args['limit']
+        if not 1 <= limit <= FILTER_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {FILTER_MAX_LIMIT}")
+        ids, next_cursor, total = _facet_index().page(filters, args['after'], limit)
+        properties = db.get_properties_by_ids(ids, args['fields'])
+        return jsonify({
+            'success': True,
+            'filters': filters,
+            'total': total,
+            'count': len(properties),
+            'next_cursor': next_cursor,
+            'data': properties
+        })
+    except ValueError as e:
+        return _bad_request(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _live_advanced_stats():
+    """Full-table statistics (fallback when the summary tables are not built)"""
+    # Active count, time-based / category / price statistics and area
+    # distribution are independent queries: run them concurrently
+    total_active, time_stats, cat_stats, price_stats, area_dist = _concurrently(
+        (lambda: sum(1 for _ in db.iter_active_properties(fields=['category'])),),
+        (db.get_time_based_statistics,),
+        (db.get_category_statistics,),
+        (db.get_price_statistics,),
+        (db.get_area_distribution,),
+    )
     
-    return result.data if result.data else []
-# Advanced Statistics Endpoint
-# Add this after line 222 in server.py
+    # Calculate counts by type
+    by_type = {}
+    for cat in cat_stats.values():
+        cat_type = cat['category_type']
+        by_type[cat_type] = by_type.get(cat_type, 0) + cat['count']
+    
+    return total_active, time_stats, cat_stats, price_stats, area_dist, by_type
 
 @app.route('/api/stats/advanced', methods=['GET'])
+@response_cache.cached()
 def get_advanced_stats():
     """
     Get comprehensive statistics with price analysis, trends, and area distribution
     """
     try:
-        # Get all active properties count
-        all_props = db.get_all_active_properties()
-        total_active = len(all_props)
-        
-        # Get time-based statistics
-        time_stats = db.get_time_based_statistics()
-        
-        # Get category statistics
-        cat_stats = db.get_category_statistics()
-        
-        # Get price statistics
-        price_stats = db.get_price_statistics()
-        
-        # Get area distribution
-        area_dist = db.get_area_distribution()
-        
-        # Calculate counts by type
-        by_type = {}
-        for cat in cat_stats.values():
-            cat_type = cat['category_type']
-            by_type[cat_type] = by_type.get(cat_type, 0) + cat['count']
+        # Precomputed summary tables (a few dozen rows); live statistics
+        # only if they have not been built yet
+        summary = db.get_summary_statistics()
+        if summary:
+            total_active = summary['total_active']
+            time_stats = summary['time']
+            cat_stats = summary['by_category']
+            price_stats = summary['price_stats']
+            area_dist = summary['by_area']
+            by_type = summary['by_type']
+        else:
+            total_active, time_stats, cat_stats, price_stats, area_dist, by_type = _live_advanced_stats()
         
         return jsonify({
             'success': True,
@@ -267,15 +470,20 @@ def get_advanced_stats():
                 'median': f"¥{price_stats['median']}万円",
                 'min': f"¥{price_stats['min']}万円",
                 'max': f"¥{price_stats['max']}万円",
+                'percentile25': f"¥{price_stats['percentile25']}万円",
+                'percentile75': f"¥{price_stats['percentile75']}万円",
                 'count': price_stats['count'],
                 'average_raw': price_stats['average'],
                 'median_raw': price_stats['median'],
                 'min_raw': price_stats['min'],
-                'max_raw': price_stats['max']
+                'max_raw': price_stats['max'],
+                'percentile25_raw': price_stats['percentile25'],
+                'percentile75_raw': price_stats['percentile75']
             },
             'by_category': cat_stats,
             'by_type': by_type,
             'by_area': area_dist,
+            'by_price_band': summary['by_price_band'] if summary else None,
             'database_type': db.db_type
         })
     except Exception as e:
@@ -283,12 +491,15 @@ def get_advanced_stats():
             'success': False,
             'error': str(e)
         }),500
+
 @app.route('/api/properties/diff', methods=['GET'])
+@response_cache.cached()
 def get_daily_diff():
     """
     Get today's diff: new and sold properties by category
     Query params:
       - date: Date in YYYY-MM-DD format (optional, defaults to today)
+      - fields: Comma-separated columns to return per property (optional)
     """
     try:
         target_date = request.args.get('date')
@@ -297,20 +508,20 @@ def get_daily_diff():
         else:
             target_date = date.today()
         
-        # Get new properties
-        new_props = _get_new_properties_sqlite(target_date) if db.db_type == 'sqlite' else _get_new_properties_supabase(target_date)
+        # Grouping needs category, so always fetch it and drop it afterwards
+        fields = _page_args()['fields']
+        query_fields = fields + ['category'] if fields and 'category' not in fields else fields
         
-        # Get sold properties (from target date)
-        if db.db_type == 'sqlite':
-            sold_props = _get_sold_on_date_sqlite(target_date)
-        else:
-            sold_props = _get_sold_on_date_supabase(target_date)
+        (new_props, _), (sold_props, _) = _concurrently(
+            (db.get_properties_page, _new_where(target_date), query_fields, '-id'),
+            (db.get_properties_page, _sold_where(on_date=target_date.isoformat()), query_fields, '-last_seen_date'),
+        )
         
         # Group by category
         def group_by_category(properties):
             by_category = {}
             for prop in properties:
-                cat = prop['category']
+                cat = prop['category'] if query_fields is fields else prop.pop('category')
                 if cat not in by_category:
                     by_category[cat] = []
                 by_category[cat].append(prop)
@@ -338,64 +549,40 @@ def get_daily_diff():
             'total_sold': len(sold_props),
             'by_category': summary
         })
+    except ValueError as e:
+        return _bad_request(e)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def _get_sold_on_date_sqlite(target_date):
-    """Get properties sold on specific date (SQLite)"""
-    import sqlite3
-    import json
-    
-    conn = db._get_sqlite_connection()
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("""
-            SELECT * FROM properties 
-            WHERE is_active = 0 AND last_seen_date = ?
-            ORDER BY last_seen_date DESC
-        """, (target_date.isoformat(),))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            data = dict(row)
-            data["images"] = json.loads(data["images"]) if data["images"] else []
-            data["property_data"] = json.loads(data["property_data"]) if data["property_data"] else {}
-            data["is_active"] = bool(data["is_active"])
-            results.append(data)
-        
-        return results
-    finally:
-        conn.close()
-
-def _get_sold_on_date_supabase(target_date):
-    """Get properties sold on specific date (Supabase)"""
-    result = db.supabase.table("properties")\
-        .select("*")\
-        .eq("is_active", False)\
-        .eq("last_seen_date", target_date.isoformat())\
-        .order("last_seen_date", desc=True)\
-        .execute()
-    
-    return result.data if result.data else []
-
 @app.route('/api/stats', methods=['GET'])
+@response_cache.cached()
 def get_stats():
     """Get overall statistics"""
     try:
-        properties = db.get_all_active_properties()
-        
-        # Calculate stats
-        total = len(properties)
+        summary = db.get_summary_statistics()
+        if summary:
+            return jsonify({
+                'success': True,
+                'total_active': summary['total_active'],
+                'new_today': summary['time']['new_today'],
+                'by_category': {cat: c['count'] for cat, c in summary['by_category'].items()},
+                'by_type': {'賃貸': 0, '売買': 0, **summary['by_type']},
+                'database_type': db.db_type
+            })
+        
+        # Today's new count is fetched while the active rows stream
+        new_today_future = _query_pool.submit(db.get_properties_page, _new_where(date.today()), ['id'])
+        
+        # Calculate stats (only the two columns needed, streamed)
+        total = 0
         by_category = {}
         by_type = {'賃貸': 0, '売買': 0}
         
-        for prop in properties:
+        for prop in db.iter_active_properties(fields=['category', 'category_type']):
+            total += 1
             # By category
             cat = prop['category']
             if cat not in by_category:
@@ -406,8 +593,7 @@ def get_stats():
             cat_type = prop['category_type']
             by_type[cat_type] += 1
         
-        # Get today's new count
-        new_today = _get_new_properties_sqlite(date.today()) if db.db_type == 'sqlite' else _get_new_properties_supabase(date.today())
+        new_today, _ = new_today_future.result()
         
         return jsonify({
             'success': True,
@@ -431,6 +617,7 @@ if __name__ == '__main__':
     port: int = config.API_PORT
     host: str = config.API_HOST
     debug: bool = config.API_DEBUG
+    db.initialize()   # fail at startup, not on the first request, if the backend is misconfigured
     
     print(f"\n{'='*70}")
     print(f"うちなーらいふ不動産 API Server")
@@ -438,6 +625,11 @@ if __name__ == '__main__':
     print(f"Database: {db.db_type.upper()}")
     print(f"Server: http://{host}:{port}")
     print(f"Debug Mode: {debug}")
+    print(f"Production: gunicorn -c gunicorn.conf.py wsgi:app")
     print(f"{'='*70}\n")
     
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        response_cache.start_refresher(app, config.API_CACHE_WARM_PATHS, config.API_CACHE_WARM_HOT_KEYS)
+    
     app.run(host=host, port=port, debug=debug)
@@ -0,0 +1,56 @@
+"""
+成約候補の HTTP 確認
+
+一覧から消えた物件の詳細ページに HEAD を送り、掲載が終わったかを判定する。
+404/410 と、詳細ページ以外（一覧ページやトップ）へのリダイレクトだけを
+掲載終了とみなす。http→https、クエリの追加、末尾スラッシュなど、
+同じ物件の詳細ページに着くリダイレクトは掲載中として扱う。
+"""
+
+import re
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+
+# /bukken/<category>/<listing id>/detail.html （detail.html と末尾の / は省略可）
+DETAIL_PATH_RE = re.compile(r"^/bukken/[^/]+/([^/]+)(?:/detail\.html)?/?$")
+
+
+def listing_id(url: str) -> Optional[str]:
+    """詳細ページ URL の物件 ID（詳細ページでなければ None）"""
+    match = DETAIL_PATH_RE.match(urlsplit(url).path)
+    return match.group(1) if match else None
+
+
+def is_same_listing(requested: str, final: str) -> bool:
+    """リダイレクト後の URL が、要求した物件の詳細ページのままか
+
+    物件 ID が取れる URL は ID で比べる（カテゴリの付け替えや正規化も掲載中）。
+    取れない URL はパスを比べる（スキーム・ホスト・クエリの違いは無視）。
+    """
+    requested_id = listing_id(requested)
+    if requested_id is not None:
+        return listing_id(final) == requested_id
+    return urlsplit(final).path.rstrip("/") == urlsplit(requested).path.rstrip("/")
+
+
+def listing_is_gone(session: requests.Session, url: str, timeout: float) -> Optional[bool]:
+    """True = listing removed, False = still listed, None = could not tell.
+
+    HEAD first (no body); servers that reject HEAD get a streamed GET that is
+    closed before the body is read. Removed listings answer 404/410 or
+    redirect off the detail page; any other redirect keeps the listing.
+    """
+    try:
+        resp = session.head(url, allow_redirects=True, timeout=timeout)
+        if resp.status_code in (405, 501):
+            resp = session.get(url, allow_redirects=True, timeout=timeout, stream=True)
+            resp.close()
+    except requests.RequestException:
+        return None
+    if resp.status_code in (404, 410):
+        return True
+    if resp.status_code == 200:
+        return not is_same_listing(url, resp.url)
+    return None
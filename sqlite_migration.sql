@@ -6,6 +6,7 @@
 -- Drop existing tables if they exist
 DROP TABLE IF EXISTS property_snapshots;
 DROP TABLE IF EXISTS daily_link_snapshots;
+DROP TABLE IF EXISTS listing_urls;
 DROP TABLE IF EXISTS properties;
 
 -- =====================================================
@@ -44,6 +45,14 @@ CREATE TABLE properties (
   first_seen_date DATE DEFAULT (date('now')),
   last_seen_date DATE DEFAULT (date('now')),
   
+  -- Typed columns parsed from price / property_data at write time (property_normalize.py)
+  price_yen REAL,
+  rent_yen REAL,
+  land_m2 REAL,
+  floor_m2 REAL,
+  layout TEXT,      -- "3LDK", "1R", ...
+  built_year INTEGER,
+  
   -- Timestamps
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
@@ -57,6 +66,28 @@ CREATE INDEX idx_properties_first_seen ON properties(first_seen_date DESC);
 CREATE INDEX idx_properties_last_seen ON properties(last_seen_date DESC);
 CREATE INDEX idx_properties_url ON properties(url);
 CREATE INDEX idx_properties_created_at ON properties(created_at DESC);
+CREATE INDEX idx_properties_updated_at ON properties(updated_at);
+CREATE INDEX idx_properties_price_yen ON properties(category, price_yen);
+CREATE INDEX idx_properties_rent_yen ON properties(category, rent_yen);
+CREATE INDEX idx_properties_land_m2 ON properties(category, land_m2);
+CREATE INDEX idx_properties_floor_m2 ON properties(category, floor_m2);
+CREATE INDEX idx_properties_layout ON properties(category, layout);
+CREATE INDEX idx_properties_built_year ON properties(category, built_year);
+-- 統計 API 用の式インデックス（database.STAT_PRICE_SQL / STAT_LOCATION_SQL と同じ式。
+-- json.dumps が \uXXXX にエスケープしたキーも引く）
+CREATE INDEX idx_properties_stat_price ON properties(is_active, (CASE WHEN json_valid(property_data) THEN COALESCE(
+  NULLIF(NULLIF(json_extract(property_data, '$."価格"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."\u4fa1\u683c"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."家賃"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."\u5bb6\u8cc3"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."price"'), ''), 0)) END));
+CREATE INDEX idx_properties_stat_location ON properties(is_active, (CASE WHEN json_valid(property_data) THEN COALESCE(
+  NULLIF(NULLIF(json_extract(property_data, '$."所在地"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."\u6240\u5728\u5730"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."住所"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."\u4f4f\u6240"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."location"'), ''), 0),
+  NULLIF(NULLIF(json_extract(property_data, '$."area"'), ''), 0)) END));
 
 -- =====================================================
 -- Table 2: daily_link_snapshots
@@ -68,8 +99,10 @@ CREATE TABLE daily_link_snapshots (
   snapshot_date DATE NOT NULL,
   category TEXT NOT NULL CHECK (category IN ('jukyo', 'jigyo', 'yard', 'parking', 'tochi', 'mansion', 'house', 'sonota')),
   
-  -- Array of URLs (stored as JSON)
+  -- Array of URLs (stored as JSON); '[]' when url_ids is set
   urls TEXT NOT NULL, -- JSON array
+  -- listing_urls ids: 0x01 + zlib(uint32 LE deltas of the sorted ids)
+  url_ids BLOB,
   url_count INTEGER NOT NULL,
   
   -- Metadata
@@ -83,6 +116,74 @@ CREATE TABLE daily_link_snapshots (
 CREATE INDEX idx_daily_snapshots_date ON daily_link_snapshots(snapshot_date DESC);
 CREATE INDEX idx_daily_snapshots_category ON daily_link_snapshots(category);
 
+-- =====================================================
+-- Table 2b: listing_urls
+-- Purpose: URL dictionary - stable integer id per listing URL
+-- =====================================================
+CREATE TABLE listing_urls (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  url TEXT NOT NULL UNIQUE
+);
+
+-- =====================================================
+-- Table 2c: stats_members / stats_counts
+-- Purpose: Summary tables for the stats API (database.SUMMARY_TABLES_SQL)
+--   stats_members: per-listing keys it is counted under
+--   stats_counts:  listings per (dimension, key)
+-- =====================================================
+CREATE TABLE stats_members (
+  url TEXT PRIMARY KEY,
+  category TEXT,
+  category_type TEXT,
+  category_label TEXT,  -- 'category|genre_name_ja|category_type' (active rows)
+  city TEXT,
+  price_band TEXT,
+  price_man TEXT,
+  new_on TEXT,  -- 'YYYY-MM-DD|category' (first_seen_date, active rows)
+  sold_on TEXT  -- 'YYYY-MM-DD|category' (last_seen_date, inactive rows)
+);
+
+CREATE TABLE stats_counts (
+  dimension TEXT NOT NULL,
+  key TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  PRIMARY KEY (dimension, key)
+);
+
+-- =====================================================
+-- Table 2d: data_version
+-- Purpose: Counter bumped after each batch of writes (database.DATA_VERSION_SQL);
+--   the API response cache / ETags are keyed on it
+-- =====================================================
+CREATE TABLE data_version (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  version INTEGER NOT NULL,
+  bumped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (id, version) VALUES (1, 1);
+
+-- =====================================================
+-- Table 2e: properties_fts
+-- Purpose: Full-text search index (FTS5, trigram tokenizer) over title,
+--   company_name, 所在地 and the property_data values, kept in sync by the
+--   properties_fts_* triggers. Created (and back-filled) by
+--   Database._upgrade_sqlite_schema from database.SEARCH_FTS_SQL
+-- =====================================================
+
+-- =====================================================
+-- Table 2f: facet_index
+-- Purpose: Facet bitmaps of the active listings for /api/facets and
+--   /api/properties/filter (facet_index.FacetIndex.to_bytes), rebuilt after
+--   each scrape by Database.rebuild_facet_index (database.FACET_INDEX_SQL)
+-- =====================================================
+CREATE TABLE facet_index (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  data BLOB NOT NULL,
+  property_count INTEGER NOT NULL,
+  built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- =====================================================
 -- Table 3: property_snapshots (Optional)
 -- Purpose: Historical snapshots of property details
@@ -116,11 +217,28 @@ CREATE INDEX idx_property_snapshots_date ON property_snapshots(snapshot_date DES
 -- =====================================================
 
 -- Auto-update updated_at timestamp on properties
+-- Content changes only: last_seen_date touches and no-op updates keep updated_at
+-- (used as the incremental export watermark)
 CREATE TRIGGER update_properties_updated_at
   AFTER UPDATE ON properties
   FOR EACH ROW
+  WHEN NEW.updated_at IS OLD.updated_at AND (
+     NEW.url IS NOT OLD.url
+     OR NEW.category IS NOT OLD.category
+     OR NEW.category_type IS NOT OLD.category_type
+     OR NEW.category_name_ja IS NOT OLD.category_name_ja
+     OR NEW.genre_name_ja IS NOT OLD.genre_name_ja
+     OR NEW.title IS NOT OLD.title
+     OR NEW.price IS NOT OLD.price
+     OR NEW.favorites IS NOT OLD.favorites
+     OR NEW.update_date IS NOT OLD.update_date
+     OR NEW.expiry_date IS NOT OLD.expiry_date
+     OR NEW.images IS NOT OLD.images
+     OR NEW.company_name IS NOT OLD.company_name
+     OR NEW.property_data IS NOT OLD.property_data
+     OR NEW.is_active IS NOT OLD.is_active)
 BEGIN
-  UPDATE properties SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+  UPDATE properties SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
 END;
 
 -- =====================================================
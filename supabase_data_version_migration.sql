@@ -0,0 +1,23 @@
+-- =====================================================
+-- Supabase Migration: データバージョン（API 応答キャッシュの基準）
+-- スクレイプ・集計の再構築・バックフィル・CSV 取り込みの終了時に
+-- Database.bump_data_version が 1 つ進める（再実行可）
+-- 未適用の場合、API はキャッシュせずに毎回 DB から応答を作る
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL,
+    bumped_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+INSERT INTO data_version (id, version) VALUES (1, 1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS BIGINT AS $$
+    UPDATE data_version
+    SET version = version + 1, bumped_at = NOW()
+    WHERE id = 1
+    RETURNING version;
+$$ LANGUAGE sql VOLATILE;
@@ -0,0 +1,24 @@
+-- =====================================================
+-- Supabase Migration: ファセット索引（/api/facets, /api/properties/filter）
+-- 掲載中の物件のファセット値ごとのビットマップ（facet_index.FacetIndex）を 1 行で保持する（再実行可）
+-- スクレイプ終了時に Database.rebuild_facet_index が作り直す。手動の再構築は python rebuild_facet_index.py
+-- 未適用・未構築の場合、API サーバーが properties から作ってメモリに持つ
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS facet_index (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    data TEXT NOT NULL,             -- base64(0x01 + zlib(ヘッダー JSON + ID の差分 + ビットマップ))
+    property_count INTEGER NOT NULL,
+    built_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- =====================================================
+-- Row Level Security (RLS) 設定
+-- =====================================================
+
+ALTER TABLE facet_index ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access on facet_index" ON facet_index;
+CREATE POLICY "Allow public read access on facet_index"
+    ON facet_index FOR SELECT
+    USING (true);
@@ -0,0 +1,45 @@
+-- =====================================================
+-- Supabase Migration: 圧縮リンクスナップショット（URL辞書）
+-- supabase_setup.sql 適用済みのプロジェクトに追加で実行する（再実行可）
+-- =====================================================
+
+-- 1. URL辞書テーブル（物件URL → 安定した整数ID）
+CREATE TABLE IF NOT EXISTS listing_urls (
+    id BIGSERIAL PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+
+-- 2. スナップショットに圧縮ID配列カラムを追加
+--    base64(0x01 + zlib(ソート済みIDの差分 uint32 LE))。設定済みの行では urls は '[]'
+ALTER TABLE daily_link_snapshots ADD COLUMN IF NOT EXISTS url_ids TEXT;
+
+-- 3. URLをまとめて辞書登録し、{id, url} を返すRPC
+--    スクレイパーは anon キーで呼ぶため SECURITY DEFINER（listing_urls への直接の書き込みは service_role のみ）
+CREATE OR REPLACE FUNCTION intern_listing_urls(p_urls TEXT[])
+RETURNS TABLE (id BIGINT, url TEXT) AS $$
+    WITH inserted AS (
+        INSERT INTO listing_urls (url)
+        SELECT DISTINCT u FROM unnest(p_urls) AS u
+        ON CONFLICT (url) DO NOTHING
+        RETURNING listing_urls.id, listing_urls.url
+    )
+    SELECT inserted.id, inserted.url FROM inserted
+    UNION ALL
+    SELECT l.id, l.url FROM listing_urls l WHERE l.url = ANY(p_urls);
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+-- =====================================================
+-- Row Level Security (RLS) 設定
+-- =====================================================
+
+ALTER TABLE listing_urls ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access on listing_urls" ON listing_urls;
+CREATE POLICY "Allow public read access on listing_urls"
+    ON listing_urls FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "Allow service role full access on listing_urls" ON listing_urls;
+CREATE POLICY "Allow service role full access on listing_urls"
+    ON listing_urls FOR ALL
+    USING (auth.role() = 'service_role');
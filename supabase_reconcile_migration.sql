@@ -0,0 +1,51 @@
+-- =====================================================
+-- Supabase Migration: リンク照合（reconcile_links RPC）
+-- 当日のURL集合と properties を集合演算で照合する（再実行可）
+-- 未適用の場合、Database.reconcile_links はクライアント側の照合にフォールバック
+-- =====================================================
+
+-- 戻り値の列が増えたため、旧定義があれば作り直す
+DROP FUNCTION IF EXISTS reconcile_links(TEXT, TEXT[]);
+
+CREATE OR REPLACE FUNCTION reconcile_links(p_category TEXT, p_urls TEXT[])
+RETURNS TABLE (new_urls TEXT[], sold_urls TEXT[], reactivated_urls TEXT[], touched INTEGER) AS $$
+DECLARE
+    v_new TEXT[];
+    v_sold TEXT[];
+    v_reactivated TEXT[];
+    v_touched INTEGER;
+BEGIN
+    CREATE TEMP TABLE IF NOT EXISTS current_links (url TEXT PRIMARY KEY) ON COMMIT DROP;
+    TRUNCATE current_links;
+    INSERT INTO current_links (url)
+    SELECT DISTINCT u FROM unnest(p_urls) AS u
+    ON CONFLICT DO NOTHING;
+
+    -- 新着: properties に行がないURL
+    SELECT COALESCE(array_agg(c.url), '{}') INTO v_new
+    FROM current_links c
+    WHERE NOT EXISTS (SELECT 1 FROM properties p WHERE p.url = c.url);
+
+    -- 売約候補: カテゴリ内のアクティブ行で当日のURL集合にないもの
+    SELECT COALESCE(array_agg(p.url), '{}') INTO v_sold
+    FROM properties p
+    WHERE p.category = p_category AND p.is_active = true
+      AND NOT EXISTS (SELECT 1 FROM current_links c WHERE c.url = p.url);
+
+    -- 再掲載: 非アクティブ行で当日のURL集合にあるもの（集計テーブルの更新用）
+    SELECT COALESCE(array_agg(p.url), '{}') INTO v_reactivated
+    FROM properties p
+    JOIN current_links c ON c.url = p.url
+    WHERE p.is_active IS DISTINCT FROM true;
+
+    -- 掲載継続中の行の last_seen_date を一括更新（再掲載は再アクティブ化）
+    UPDATE properties p
+    SET last_seen_date = CURRENT_DATE, is_active = true
+    FROM current_links c
+    WHERE p.url = c.url
+      AND (p.last_seen_date IS DISTINCT FROM CURRENT_DATE OR p.is_active IS DISTINCT FROM true);
+    GET DIAGNOSTICS v_touched = ROW_COUNT;
+
+    RETURN QUERY SELECT v_new, v_sold, v_reactivated, v_touched;
+END;
+$$ LANGUAGE plpgsql;
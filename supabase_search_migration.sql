@@ -0,0 +1,117 @@
+-- =====================================================
+-- Supabase Migration: 物件の全文検索（/api/properties/search）
+-- SQLite の properties_fts（database.SEARCH_FTS_SQL）と同じ内容を
+-- property_search に持ち、pg_trgm の GIN インデックスで部分一致検索する（再実行可）
+--   property_search              タイトル・会社名・所在地・詳細（property_data の値）
+--   search_properties(...)       Database.search_properties が呼ぶ検索 RPC
+-- stats_first_truthy（supabase_stats_migration.sql）を使うので、そちらを先に適用する
+-- 売約済み（is_active = false）の物件も検索対象
+-- =====================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS property_search (
+    property_id BIGINT PRIMARY KEY REFERENCES properties(id) ON DELETE CASCADE,
+    title TEXT,
+    company_name TEXT,
+    location TEXT,
+    details TEXT,
+    document TEXT NOT NULL  -- 上の 4 つを連結（トライグラム索引の対象）
+);
+
+CREATE INDEX IF NOT EXISTS idx_property_search_document
+    ON property_search USING gin (document gin_trgm_ops);
+
+-- 1 物件分の検索文書を作り直す
+CREATE OR REPLACE FUNCTION property_search_upsert(p properties)
+RETURNS VOID AS $$
+    INSERT INTO property_search (property_id, title, company_name, location, details, document)
+    SELECT p.id, p.title, p.company_name, d.location, d.details,
+           concat_ws(' ', p.title, p.company_name, d.location, d.details)
+    FROM (
+        SELECT stats_first_truthy(p.property_data, ARRAY['所在地', '住所', 'location', 'area']) AS location,
+               NULLIF(concat_ws(' ', p.category_name_ja, p.genre_name_ja, (
+                   SELECT string_agg(v #>> '{}', ' ')
+                   FROM jsonb_path_query(COALESCE(p.property_data, '{}'::jsonb), 'strict $.**') AS v
+                   WHERE jsonb_typeof(v) IN ('string', 'number')
+               )), '') AS details
+    ) d
+    ON CONFLICT (property_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        company_name = EXCLUDED.company_name,
+        location = EXCLUDED.location,
+        details = EXCLUDED.details,
+        document = EXCLUDED.document;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+-- 検索対象の列が変わったときだけ作り直す（reconcile_links の last_seen_date 更新では動かない）
+CREATE OR REPLACE FUNCTION property_search_refresh()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.title IS NOT DISTINCT FROM OLD.title
+       AND NEW.company_name IS NOT DISTINCT FROM OLD.company_name
+       AND NEW.property_data IS NOT DISTINCT FROM OLD.property_data
+       AND NEW.category_name_ja IS NOT DISTINCT FROM OLD.category_name_ja
+       AND NEW.genre_name_ja IS NOT DISTINCT FROM OLD.genre_name_ja THEN
+        RETURN NEW;
+    END IF;
+    PERFORM property_search_upsert(NEW);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS properties_search_refresh ON properties;
+CREATE TRIGGER properties_search_refresh
+    AFTER INSERT OR UPDATE ON properties
+    FOR EACH ROW EXECUTE FUNCTION property_search_refresh();
+
+-- 既存の物件を索引に入れる
+SELECT property_search_upsert(p) FROM properties p
+WHERE NOT EXISTS (SELECT 1 FROM property_search s WHERE s.property_id = p.id);
+
+-- p_patterns: 語ごとの ILIKE パターン（表記ゆれの候補）の配列 [["%3LDK%", "%３ＬＤＫ%"], ["%北谷%"]]
+--             すべての語を含む物件が一致する
+-- p_filters:  {"is_active": true, "category": "jukyo"} などの等値条件（列名は Python 側で検証済み）
+-- score:      語ごとに タイトル 10 / 所在地 5 / 会社名 2 / 詳細 1 の合計（大きいほど上位）
+CREATE OR REPLACE FUNCTION search_properties(p_patterns JSONB, p_filters JSONB, p_limit INTEGER, p_offset INTEGER)
+RETURNS TABLE (score REAL, title TEXT, company_name TEXT, location TEXT, details TEXT, "row" JSONB) AS $$
+DECLARE
+    term JSONB;
+    patterns TEXT[];
+    filter RECORD;
+    conditions TEXT := 'TRUE';
+    score_sql TEXT := '0';
+BEGIN
+    FOR term IN SELECT * FROM jsonb_array_elements(p_patterns) LOOP
+        patterns := ARRAY(SELECT jsonb_array_elements_text(term));
+        conditions := conditions || format(' AND s.document ILIKE ANY (%L::TEXT[])', patterns);
+        score_sql := score_sql || format(
+            ' + 10 * ((s.title ILIKE ANY (%1$L::TEXT[])) IS TRUE)::INT'
+            ' + 5 * ((s.location ILIKE ANY (%1$L::TEXT[])) IS TRUE)::INT'
+            ' + 2 * ((s.company_name ILIKE ANY (%1$L::TEXT[])) IS TRUE)::INT'
+            ' + ((s.details ILIKE ANY (%1$L::TEXT[])) IS TRUE)::INT', patterns);
+    END LOOP;
+    FOR filter IN SELECT * FROM jsonb_each_text(COALESCE(p_filters, '{}'::jsonb)) LOOP
+        conditions := conditions || format(' AND p.%I = %L', filter.key, filter.value);
+    END LOOP;
+    RETURN QUERY EXECUTE format(
+        'SELECT (%s)::REAL, s.title, s.company_name, s.location, s.details, to_jsonb(p)
+         FROM property_search s JOIN properties p ON p.id = s.property_id
+         WHERE %s
+         ORDER BY 1 DESC, p.id DESC
+         LIMIT %s OFFSET %s',
+        score_sql, conditions, p_limit, p_offset);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- =====================================================
+-- Row Level Security (RLS) 設定
+-- =====================================================
+
+ALTER TABLE property_search ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access on property_search" ON property_search;
+CREATE POLICY "Allow public read access on property_search"
+    ON property_search FOR SELECT
+    USING (true);
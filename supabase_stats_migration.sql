@@ -0,0 +1,113 @@
+-- =====================================================
+-- Supabase Migration: 統計 API 用の集計 RPC
+-- ダッシュボードの統計を 1 呼び出しずつサーバー側で集計する（再実行可）
+--   stats_category_counts(p_today)     カテゴリ別件数・本日の新着
+--   stats_time_windows(p_today)        新着 / 売約の本日・7日・30日
+--   stats_price_groups()               価格文字列ごとの件数（解析は property_normalize）
+--   stats_area_distribution(p_limit)   市町村別件数の上位
+-- 未適用の場合、Database の各統計メソッドはクライアント側の集計にフォールバック
+-- =====================================================
+
+-- Python の真偽判定（"" / 0 / false / null は偽）に合わせて JSON 値を文字列化
+CREATE OR REPLACE FUNCTION stats_truthy_text(v JSONB)
+RETURNS TEXT AS $$
+    SELECT CASE jsonb_typeof(v)
+        WHEN 'string' THEN NULLIF(v #>> '{}', '')
+        WHEN 'number' THEN CASE WHEN (v #>> '{}')::NUMERIC <> 0 THEN v #>> '{}' END
+        WHEN 'boolean' THEN CASE WHEN v = 'true'::jsonb THEN 'True' END
+        WHEN 'array' THEN CASE WHEN jsonb_array_length(v) > 0 THEN v::TEXT END
+        WHEN 'object' THEN CASE WHEN v <> '{}'::jsonb THEN v::TEXT END
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- data.get(k1) or data.get(k2) or ... と同じ「最初の真のキー」
+CREATE OR REPLACE FUNCTION stats_first_truthy(d JSONB, keys TEXT[])
+RETURNS TEXT AS $$
+    SELECT stats_truthy_text(d -> k.key)
+    FROM unnest(keys) WITH ORDINALITY AS k(key, ord)
+    WHERE jsonb_typeof(d) = 'object' AND stats_truthy_text(d -> k.key) IS NOT NULL
+    ORDER BY k.ord
+    LIMIT 1;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Database._city_from_location と同じ規則:
+-- "沖縄県" を除いて前後の空白を落とし、re.search('([^市]+市|[^町]+町|[^村]+村)') の
+-- 最初の一致（左から、同じ位置では 市 → 町 → 村 の順）、なければ先頭の語
+CREATE OR REPLACE FUNCTION stats_city(location TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    s TEXT := regexp_replace(replace(location, '沖縄県', ''), '^\s+|\s+$', '', 'g');
+    i INTEGER;
+    pos INTEGER;
+    suffix TEXT;
+BEGIN
+    IF s IS NULL OR s = '' THEN
+        RETURN NULL;
+    END IF;
+    FOR i IN 1 .. length(s) LOOP
+        FOREACH suffix IN ARRAY ARRAY['市', '町', '村'] LOOP
+            IF substr(s, i, 1) <> suffix THEN
+                pos := position(suffix IN substr(s, i));
+                IF pos > 0 THEN
+                    RETURN substr(s, i, pos);
+                END IF;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN NULLIF((regexp_split_to_array(s, '\s+'))[1], '');
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION stats_category_counts(p_today DATE)
+RETURNS TABLE (category TEXT, genre_name_ja TEXT, category_type TEXT, count BIGINT, new_today BIGINT) AS $$
+    SELECT p.category,
+           MIN(p.genre_name_ja),
+           MIN(p.category_type),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE p.first_seen_date = p_today)
+    FROM properties p
+    WHERE p.is_active = true
+    GROUP BY p.category;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION stats_time_windows(p_today DATE)
+RETURNS TABLE (new_today BIGINT, new_week BIGINT, new_month BIGINT,
+               sold_today BIGINT, sold_week BIGINT, sold_month BIGINT) AS $$
+    SELECT
+        COUNT(*) FILTER (WHERE is_active AND first_seen_date = p_today),
+        COUNT(*) FILTER (WHERE is_active AND first_seen_date >= p_today - 7),
+        COUNT(*) FILTER (WHERE is_active AND first_seen_date >= p_today - 30),
+        COUNT(*) FILTER (WHERE NOT is_active AND last_seen_date = p_today),
+        COUNT(*) FILTER (WHERE NOT is_active AND last_seen_date >= p_today - 7),
+        COUNT(*) FILTER (WHERE NOT is_active AND last_seen_date >= p_today - 30)
+    FROM properties;
+$$ LANGUAGE sql STABLE;
+
+-- 価格の解析規則は property_normalize に一本化しているため、
+-- サーバーは生の価格文字列ごとの件数だけを返す（異なり値は行数よりずっと少ない）
+CREATE OR REPLACE FUNCTION stats_price_groups()
+RETURNS TABLE (raw TEXT, n BIGINT) AS $$
+    SELECT g.raw, COUNT(*)
+    FROM (
+        SELECT stats_first_truthy(property_data, ARRAY['価格', '家賃', 'price']) AS raw
+        FROM properties
+        WHERE is_active = true
+    ) g
+    WHERE g.raw IS NOT NULL
+    GROUP BY g.raw;
+$$ LANGUAGE sql STABLE;
+
+-- 同数の市町村は最初に出現した行（id 順）が先
+CREATE OR REPLACE FUNCTION stats_area_distribution(p_limit INTEGER DEFAULT 10)
+RETURNS TABLE (city TEXT, count BIGINT) AS $$
+    SELECT c.city, COUNT(*)
+    FROM (
+        SELECT p.id, stats_city(stats_first_truthy(p.property_data, ARRAY['所在地', '住所', 'location', 'area'])) AS city
+        FROM properties p
+        WHERE p.is_active = true
+    ) c
+    WHERE c.city IS NOT NULL
+    GROUP BY c.city
+    ORDER BY COUNT(*) DESC, MIN(c.id)
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
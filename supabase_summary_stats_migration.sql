@@ -0,0 +1,44 @@
+-- =====================================================
+-- Supabase Migration: 集計テーブル（stats_members / stats_counts）
+-- 統計 API が数十行の事前集計を読むためのテーブル（再実行可）
+-- スクレイプ終了時に Database.refresh_summary_stats が新着・売約・再掲載・
+-- 再スクレイプした行の分だけ差分で更新する。修復は python rebuild_summary_stats.py
+-- 未適用・未構築の場合、統計 API は従来の集計にフォールバック
+-- =====================================================
+
+-- 物件ごとの寄与（どのキーに 1 件数えられているか）
+CREATE TABLE IF NOT EXISTS stats_members (
+    url TEXT PRIMARY KEY,
+    category TEXT,
+    category_type TEXT,
+    category_label TEXT,  -- "category|genre_name_ja|category_type"（アクティブ行）
+    city TEXT,
+    price_band TEXT,
+    price_man TEXT,
+    new_on TEXT,       -- "YYYY-MM-DD|category"（アクティブ行の first_seen_date）
+    sold_on TEXT       -- "YYYY-MM-DD|category"（非アクティブ行の last_seen_date）
+);
+
+-- 以前に作成した表への追加（追加後は python rebuild_summary_stats.py で再構築する）
+ALTER TABLE stats_members ADD COLUMN IF NOT EXISTS category_label TEXT;
+
+-- (次元, キー) ごとの件数
+CREATE TABLE IF NOT EXISTS stats_counts (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count BIGINT NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
+
+-- 差分 [{dimension, key, delta}, ...] を加算し、0 件になったキーを削除
+CREATE OR REPLACE FUNCTION apply_stats_deltas(p_deltas JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO stats_counts (dimension, key, count)
+    SELECT d->>'dimension', d->>'key', (d->>'delta')::BIGINT
+    FROM jsonb_array_elements(p_deltas) AS d
+    ON CONFLICT (dimension, key) DO UPDATE SET count = stats_counts.count + excluded.count;
+
+    DELETE FROM stats_counts WHERE count = 0;
+END;
+$$ LANGUAGE plpgsql;
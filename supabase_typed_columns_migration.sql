@@ -0,0 +1,37 @@
+-- =====================================================
+-- Supabase Migration: 型付きカラム（価格・賃料・面積・間取り・築年）
+-- transform_to_db_format / Database.upsert_property が書き込み時に設定する
+-- 既存行は python backfill_typed_columns.py で埋める（再実行可）
+-- 未適用の場合、upsert は型付きカラムなしで書き込む
+-- =====================================================
+
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS price_yen DOUBLE PRECISION;
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS rent_yen DOUBLE PRECISION;
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS land_m2 DOUBLE PRECISION;
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS floor_m2 DOUBLE PRECISION;
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS layout TEXT;
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS built_year INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_properties_price_yen ON properties(category, price_yen);
+CREATE INDEX IF NOT EXISTS idx_properties_rent_yen ON properties(category, rent_yen);
+CREATE INDEX IF NOT EXISTS idx_properties_land_m2 ON properties(category, land_m2);
+CREATE INDEX IF NOT EXISTS idx_properties_floor_m2 ON properties(category, floor_m2);
+CREATE INDEX IF NOT EXISTS idx_properties_layout ON properties(category, layout);
+CREATE INDEX IF NOT EXISTS idx_properties_built_year ON properties(category, built_year);
+
+-- 型付きカラムは price / property_data からの派生値なので、
+-- バックフィルで書き換えても updated_at（増分エクスポートの基準）は動かさない
+CREATE OR REPLACE FUNCTION update_properties_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'last_seen_date' - 'updated_at'
+            - 'price_yen' - 'rent_yen' - 'land_m2' - 'floor_m2' - 'layout' - 'built_year')
+       IS DISTINCT FROM (to_jsonb(OLD) - 'last_seen_date' - 'updated_at'
+            - 'price_yen' - 'rent_yen' - 'land_m2' - 'floor_m2' - 'layout' - 'built_year') THEN
+        NEW.updated_at = NOW();
+    ELSE
+        NEW.updated_at = OLD.updated_at;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
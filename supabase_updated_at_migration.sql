@@ -0,0 +1,26 @@
+-- =====================================================
+-- Supabase Migration: updated_at を内容変更時のみ更新
+-- reconcile_links による last_seen_date の一括更新や値が変わらない UPDATE では
+-- updated_at を動かさない（Parquet 増分エクスポートのウォーターマークに使用）（再実行可）
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION update_properties_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'last_seen_date' - 'updated_at')
+       IS DISTINCT FROM (to_jsonb(OLD) - 'last_seen_date' - 'updated_at') THEN
+        NEW.updated_at = NOW();
+    ELSE
+        NEW.updated_at = OLD.updated_at;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_properties_updated_at ON properties;
+CREATE TRIGGER update_properties_updated_at
+    BEFORE UPDATE ON properties
+    FOR EACH ROW
+    EXECUTE FUNCTION update_properties_updated_at_column();
+
+CREATE INDEX IF NOT EXISTS idx_properties_updated_at ON properties(updated_at);
@@ -0,0 +1,64 @@
+"""
+テスト用の共通ヘルパー（一時ファイルの SQLite データベース）
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict
+from unittest import mock
+
+import database
+
+
+class TemporarySQLiteDatabase:
+    """with 文で一時ディレクトリに SQLite の Database を作り、終了時に削除する"""
+
+    def __enter__(self) -> database.Database:
+        self.workdir = tempfile.mkdtemp(prefix="test_db_")
+        path = os.path.join(self.workdir, "properties.db")
+        with mock.patch.object(database, "DATABASE_TYPE", "sqlite"), \
+                mock.patch.object(database, "SQLITE_DB_PATH", path):
+            self.db = database.Database()
+        return self.db.initialize()
+
+    def __exit__(self, *exc):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        return False
+
+
+def sample_property(i: int, category: str = "jukyo", **overrides: Any) -> Dict[str, Any]:
+    """upsert_property に渡せる物件 1 件（i で URL を変える）"""
+    rental = category in ("jukyo", "jigyo", "yard", "parking")
+    prop = {
+        "url": f"https://example.com/{category}/{i}",
+        "category": category,
+        "category_type": "賃貸" if rental else "売買",
+        "category_name_ja": "賃貸" if rental else "売買",
+        "genre_name_ja": {"jukyo": "住居", "parking": "時間貸駐車場", "tochi": "土地",
+                          "mansion": "マンション"}.get(category, "その他"),
+        "title": f"物件 {i}",
+        "price": "6.5万円" if rental else "2,500万円",
+        "images": [],
+        "company_name": "うちなーらいふ不動産",
+        "property_data": {
+            ("家賃" if rental else "価格"): "6.5万円" if rental else "2,500万円",
+            "所在地": "沖縄県那覇市おもろまち",
+            "間取り": "2LDK",
+        },
+    }
+    prop.update(overrides)
+    return prop
+
+
+@contextmanager
+def api_client(db: database.Database):
+    """server.app のテストクライアント（db を差し替え、応答キャッシュは使わない）"""
+    import server
+
+    with mock.patch.object(server, "db", db), \
+            mock.patch.object(server.response_cache, "enabled", False), \
+            mock.patch.object(server.response_cache, "current_version", db.get_data_version), \
+            mock.patch.dict(server._facet_state, {"stamp": None, "index": None, "loaded_at": 0.0}):
+        yield server.app.test_client()
@@ -0,0 +1,201 @@
+"""
+ファセット索引（facet_index.FacetIndex と /api/facets・/api/properties/filter）のテスト
+
+to_bytes / from_bytes の往復、ファセット内 OR・ファセット間 AND の件数を
+全件を数えた結果と照合、各ファセットの件数がそのファセット以外の条件で
+数えられること、page() のカーソルで新しい順に重複なくたどれること
+"""
+
+import itertools
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from facet_index import FACETS, FacetIndex
+from tests.helpers import TemporarySQLiteDatabase, api_client, sample_property
+
+CITIES = ["那覇市", "浦添市", "沖縄市", "北谷町"]
+LAYOUTS = ["1K", "2LDK", "3LDK", None]
+
+
+def _members(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, n * 5), n)     # sparse, unsorted ids
+    return [(row_id, {
+        "category": rng.choice(["jukyo", "tochi", "parking"]),
+        "category_type": rng.choice(["賃貸", "売買"]),
+        "city": rng.choice(CITIES),
+        "layout": rng.choice(LAYOUTS),
+        "pet": rng.choice(["true", "false", None]),
+    }) for row_id in ids]
+
+
+def _brute_force(members, filters, skip=None):
+    return [row_id for row_id, member in members
+            if all(member.get(facet) in values for facet, values in filters.items() if facet != skip and values)]
+
+
+class TestFacetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.members = _members(203)
+        self.index = FacetIndex.build(self.members, built_at="2026-10-19T03:00:00")
+
+    def test_round_trip(self):
+        loaded = FacetIndex.from_bytes(self.index.to_bytes())
+        self.assertEqual(loaded.built_at, "2026-10-19T03:00:00")
+        np.testing.assert_array_equal(loaded.ids, self.index.ids)
+        self.assertEqual(loaded.bitmaps.keys(), self.index.bitmaps.keys())
+        for facet in FACETS:
+            self.assertEqual(list(loaded.bitmaps[facet]), list(self.index.bitmaps[facet]))
+            for value, bitmap in self.index.bitmaps[facet].items():
+                np.testing.assert_array_equal(loaded.bitmaps[facet][value], bitmap)
+        self.assertEqual(loaded.counts({"city": ["那覇市"]}), self.index.counts({"city": ["那覇市"]}))
+        with self.assertRaises(ValueError):
+            FacetIndex.from_bytes(b"\x09" + self.index.to_bytes()[1:])
+
+    def test_empty_index(self):
+        empty = FacetIndex.from_bytes(FacetIndex.build([]).to_bytes())
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.counts({"city": ["那覇市"]}), (0, {**{f: {} for f in FACETS}, "city": {"那覇市": 0}}))
+        self.assertEqual(empty.page({}), ([], None, 0))
+
+    def test_counts_are_disjunctive(self):
+        filter_sets = [
+            {},
+            {"city": ["那覇市"]},
+            {"city": ["那覇市", "浦添市"], "pet": ["true"]},
+            {"category": ["jukyo"], "layout": ["2LDK", "3LDK"], "category_type": ["賃貸"]},
+            {"city": ["存在しない市"]},
+        ]
+        for filters in filter_sets:
+            with self.subTest(filters=filters):
+                total, facets = self.index.counts(filters)
+                self.assertEqual(total, len(_brute_force(self.members, filters)))
+                for facet in FACETS:
+                    matched = _brute_force(self.members, filters, skip=facet)
+                    values = {m[facet] for row_id, m in self.members if row_id in matched and m.get(facet)}
+                    expected = {v: sum(1 for row_id, m in self.members if row_id in matched and m.get(facet) == v)
+                                for v in values}
+                    expected.update({v: 0 for v in filters.get(facet, []) if v not in expected})
+                    self.assertEqual(facets[facet], expected)
+                    self.assertEqual(list(facets[facet]), sorted(expected, key=lambda v: (-expected[v], v)))
+
+    def test_page_cursors(self):
+        filters = {"city": ["那覇市", "沖縄市"]}
+        expected = sorted(_brute_force(self.members, filters), reverse=True)
+        seen, after = [], None
+        while True:
+            ids, after, total = self.index.page(filters, after, limit=7)
+            self.assertEqual(total, len(expected))
+            seen.extend(ids)
+            if after is None:
+                break
+            self.assertEqual(after, str(ids[-1]))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_queries(self):
+        for call in (lambda: self.index.counts({"colour": ["red"]}),
+                     lambda: self.index.page({}, "abc"),
+                     lambda: self.index.page({}, None, 0)):
+            with self.assertRaises(ValueError):
+                call()
+
+
+class TestFacetIndexDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        for i, (category, city) in enumerate(itertools.product(("jukyo", "tochi"), ("那覇市", "浦添市", "沖縄市"))):
+            data = {"家賃" if category == "jukyo" else "価格": "6.5万円" if category == "jukyo" else "2,500万円",
+                    "所在地": f"沖縄県{city}1丁目", "間取り": "３ＬＤＫ", "ペット": "相談可" if i % 2 else "不可"}
+            self.db.upsert_property(sample_property(i, category, property_data=data))
+        self.db.mark_properties_inactive([sample_property(0, "jukyo")["url"]])
+
+    def tearDown(self):
+        self._db.__exit__(None, None, None)
+
+    def test_stored_index_matches_rows(self):
+        self.assertEqual(self.db.rebuild_facet_index(), 5)
+        index = self.db.load_facet_index()
+        total, facets = index.counts({"city": ["那覇市", "浦添市"]})
+        self.assertEqual(total, 3)
+        self.assertEqual(facets["layout"], {"3LDK": 3})
+        self.assertEqual(facets["city"], {"浦添市": 2, "沖縄市": 2, "那覇市": 1})
+
+    def test_api(self):
+        self.db.rebuild_facet_index()
+        with api_client(self.db) as client:
+            body = client.get("/api/facets?category=jukyo&pet=true").get_json()
+            self.assertEqual(body["total"], 1)
+            self.assertEqual(body["facets"]["pet"], {"true": 1, "false": 1})
+
+            first = client.get("/api/properties/filter?limit=2&fields=url").get_json()
+            second = client.get(f"/api/properties/filter?limit=2&fields=url&after={first['next_cursor']}").get_json()
+            third = client.get(f"/api/properties/filter?limit=2&fields=url&after={second['next_cursor']}").get_json()
+            urls = [r["url"] for page in (first, second, third) for r in page["data"]]
+            self.assertEqual((first["total"], len(set(urls)), third["next_cursor"]), (5, 5, None))
+
+            for path in ("/api/facets?pet=maybe", "/api/properties/filter?parking=1",
+                         "/api/properties/filter?limit=0", "/api/properties/filter?limit=101",
+                         "/api/properties/filter?after=x", "/api/properties/filter?fields=nope"):
+                with self.subTest(path=path):
+                    self.assertEqual(client.get(path).status_code, 400)
+
+
+class TestServerFacetIndex(unittest.TestCase):
+    """server._facet_index: when the API reloads the stored index"""
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        for i in range(3):
+            self.db.upsert_property(sample_property(i))
+        self.client = api_client(self.db)
+        self.client.__enter__()
+        import server
+        self.server = server
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        self._db.__exit__(None, None, None)
+
+    def test_reloads_on_rebuild_without_data_version(self):
+        self.db.rebuild_facet_index()
+        with mock.patch.object(self.server.response_cache, "current_version", return_value=None):
+            self.assertEqual(len(self.server._facet_index()), 3)
+            self.db.upsert_property(sample_property(3))
+            self.assertEqual(len(self.server._facet_index()), 3)
+            self.db.rebuild_facet_index()
+            self.assertEqual(len(self.server._facet_index()), 4)
+
+    def test_index_built_from_rows_expires_without_data_version(self):
+        with mock.patch.object(self.server.response_cache, "current_version", return_value=None):
+            self.assertEqual(len(self.server._facet_index()), 3)
+            self.db.upsert_property(sample_property(3))
+            self.assertEqual(len(self.server._facet_index()), 3)
+            self.server._facet_state["loaded_at"] -= self.server.FACET_INDEX_MAX_AGE
+            self.assertEqual(len(self.server._facet_index()), 4)
+
+    def test_stored_empty_index_is_not_rebuilt(self):
+        self.db.mark_properties_inactive([sample_property(i)["url"] for i in range(3)])
+        self.db.rebuild_facet_index()
+        with mock.patch.object(self.db, "build_facet_index") as build:
+            self.assertEqual(len(self.server._facet_index()), 0)
+            self.db.bump_data_version()
+            self.assertEqual(len(self.server._facet_index()), 0)
+        build.assert_not_called()
+
+    def test_previous_index_is_served_during_a_reload(self):
+        previous = self.server._facet_index()
+        self.db.bump_data_version()
+        with self.server._facet_reload_lock:
+            self.assertIs(self.server._facet_index(), previous)
+        self.assertIsNot(self.server._facet_index(), previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
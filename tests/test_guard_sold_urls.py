@@ -0,0 +1,58 @@
+"""
+成約候補のガード（integrated_scraper.guard_sold_urls）のテスト
+
+収集件数が総件数より大きく不足したとき、総件数が取れなかったとき、
+リンクを 1 件も集められなかったときに、成約候補をそのまま返さないこと
+"""
+
+import importlib.util
+import unittest
+from unittest import mock
+
+if importlib.util.find_spec("playwright") is not None:
+    import integrated_scraper
+else:
+    integrated_scraper = None
+
+SOLD = [f"https://example.com/jukyo/{i}" for i in range(3)]
+
+
+@unittest.skipIf(integrated_scraper is None, "playwright is not installed")
+class TestGuardSoldUrls(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = mock.patch.dict(integrated_scraper._collection_stats, clear=True)
+        self.stats.start()
+        self.verify = mock.patch.object(integrated_scraper, "verify_sold_urls",
+                                        return_value=(SOLD[:1], SOLD[1:]))
+        self.verified = self.verify.start()
+
+    def tearDown(self):
+        self.verify.stop()
+        self.stats.stop()
+
+    def guard(self, current_urls, total_items=None):
+        if total_items is not None:
+            integrated_scraper._collection_stats["jukyo"] = {"total_items": total_items}
+        return integrated_scraper.guard_sold_urls("jukyo", current_urls, list(SOLD))
+
+    def test_complete_collection_keeps_candidates(self):
+        self.assertEqual(self.guard([f"u{i}" for i in range(100)], total_items=100), SOLD)
+        self.verified.assert_not_called()
+
+    def test_shortfall_verifies_candidates(self):
+        self.assertEqual(self.guard([f"u{i}" for i in range(50)], total_items=100), SOLD[:1])
+        self.verified.assert_called_once_with(SOLD)
+
+    def test_missing_total_verifies_candidates(self):
+        self.assertEqual(self.guard([f"u{i}" for i in range(50)]), SOLD[:1])
+        self.verified.assert_called_once_with(SOLD)
+
+    def test_empty_collection_marks_nothing(self):
+        self.assertEqual(self.guard([], total_items=100), [])
+        self.assertEqual(self.guard([]), [])
+        self.verified.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+売約物件の画像アーカイブ（image_archiver.archive_sold_properties）のテスト
+
+ローカルの HTTP サーバーから合成写真を配り、LocalStorage に保存する。
+画像が保存されること、見た目が同じ画像（dHash の Hamming 距離が
+ARCHIVE_HASH_DISTANCE 以内）は同じ物件に限って既存のオブジェクトを参照すること、
+ArchiveIndex に記録されて次の実行では DL しないこと
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+import image_archiver
+
+
+class _CountingHandler(SimpleHTTPRequestHandler):
+    requests_served = 0
+
+    def do_GET(self):
+        type(self).requests_served += 1
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _photo(seed: int) -> Image.Image:
+    """荒い配色を滑らかに拡大した写真（写真ごとに dHash が異なる）"""
+    rng = random.Random(seed)
+    return Image.frombytes("RGB", (8, 6), rng.randbytes(8 * 6 * 3)).resize((800, 600), Image.BICUBIC)
+
+
+class TestImageArchiver(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="test_archive_")
+        photo_dir = os.path.join(self.workdir, "photos")
+        os.makedirs(photo_dir)
+        _photo(0).save(os.path.join(photo_dir, "a.jpg"), quality=90)
+        _photo(1).save(os.path.join(photo_dir, "b.jpg"), quality=90)
+        # Same photo with a logo stamped on, re-encoded smaller (another agent's upload)
+        copy = _photo(0)
+        ImageDraw.Draw(copy).rectangle((600, 40, 760, 120), fill=(255, 255, 255))
+        copy.resize((640, 480), Image.LANCZOS).save(os.path.join(photo_dir, "a_copy.jpg"), quality=50)
+
+        _CountingHandler.requests_served = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_CountingHandler, directory=photo_dir))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        # The pipeline only archives URLs containing "cdn.e-uchina.net"
+        self.urls = {name: f"{base}/{name}.jpg?cdn.e-uchina.net" for name in ("a", "b", "a_copy")}
+
+        self.storage = image_archiver.LocalStorage(root=os.path.join(self.workdir, "storage"),
+                                                   public_base_url="https://archive.example.com")
+        image_archiver.set_storage(self.storage)
+        self.index_path = os.path.join(self.workdir, "index.db")
+        # Compress in a thread instead of a spawned process pool
+        self.cpu_workers = mock.patch.object(image_archiver, "ARCHIVE_CPU_WORKERS", 0)
+        self.cpu_workers.start()
+
+    def tearDown(self):
+        self.cpu_workers.stop()
+        image_archiver.set_storage(None)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def archive(self, *properties):
+        index = image_archiver.ArchiveIndex(self.index_path)
+        try:
+            return image_archiver.archive_sold_properties(list(properties), index=index)
+        finally:
+            index.close()
+
+    def stored_objects(self):
+        bucket = os.path.join(self.storage.root, self.storage.bucket)
+        return sorted(os.path.relpath(os.path.join(d, f), bucket)
+                      for d, _, files in os.walk(bucket) for f in files)
+
+    def image_hash(self, name):
+        with open(os.path.join(self.workdir, "photos", f"{name}.jpg"), "rb") as f:
+            data, dhash = image_archiver._compress_and_hash(f.read())
+        return image_archiver._image_key(data, dhash)
+
+    def test_archives_images_to_storage(self):
+        archived, timings = self.archive(
+            {"url": "https://www.e-uchina.net/bukken/house/h-1/detail.html", "category": "house",
+             "images": [self.urls["a"], self.urls["b"], "https://www.youtube.com/watch?v=x"]},
+        )
+        urls = archived["https://www.e-uchina.net/bukken/house/h-1/detail.html"]
+        self.assertEqual(len(urls), 2)
+        self.assertEqual((timings["images"], timings["reused"]), (2, 0))
+        objects = self.stored_objects()
+        self.assertEqual(len(objects), 2)
+        self.assertEqual(sorted(u.split(f"/{self.storage.bucket}/", 1)[1] for u in urls), objects)
+        for path in objects:
+            self.assertTrue(path.startswith("house/") and path.endswith(".webp"), path)
+            with Image.open(os.path.join(self.storage.root, self.storage.bucket, path)) as img:
+                self.assertEqual(img.format, "WEBP")
+                self.assertLessEqual(max(img.size), image_archiver.WEBP_MAX_SIZE)
+
+    def test_near_duplicate_reuses_stored_object_of_the_same_listing(self):
+        original, copy, other = self.image_hash("a"), self.image_hash("a_copy"), self.image_hash("b")
+        self.assertNotEqual(original, copy)
+        self.assertEqual((int(original, 16) ^ int(copy, 16)).bit_count(), 3)
+        self.assertGreater((int(original, 16) ^ int(other, 16)).bit_count(), 4)
+
+        with mock.patch.object(image_archiver, "ARCHIVE_HASH_DISTANCE", 4):
+            first, _ = self.archive({"url": "p1", "category": "house", "images": [self.urls["a"]]})
+            # The same listing re-uploaded with a logo
+            same_listing, timings = self.archive({"url": "p1", "category": "house", "images": [self.urls["a_copy"]]})
+            self.assertEqual(same_listing["p1"], first["p1"])
+            self.assertEqual(timings["reused"], 1)
+            self.assertEqual(len(self.stored_objects()), 1)
+
+            # Another listing never shares a near-duplicate
+            self.index_path = os.path.join(self.workdir, "index2.db")
+            self.archive({"url": "p1", "category": "house", "images": [self.urls["a"]]})
+            other_listing, timings = self.archive({"url": "p2", "category": "house", "images": [self.urls["a_copy"]]})
+            self.assertNotEqual(other_listing["p2"], first["p1"])
+            self.assertEqual(timings["reused"], 0)
+            self.assertEqual(len(self.stored_objects()), 2)
+
+    def test_near_duplicates_are_opt_in(self):
+        self.assertEqual(image_archiver.ARCHIVE_HASH_DISTANCE, 0)
+        first, _ = self.archive({"url": "p1", "category": "house", "images": [self.urls["a"]]})
+        second, timings = self.archive({"url": "p1", "category": "house", "images": [self.urls["a_copy"]]})
+        self.assertNotEqual(second["p1"], first["p1"])
+        self.assertEqual(timings["reused"], 0)
+        # An identical image is shared across listings
+        again, timings = self.archive({"url": "p2", "category": "house", "images": [self.urls["a"] + "&again"]})
+        self.assertEqual(again["p2"], first["p1"])
+        self.assertEqual(timings["reused"], 1)
+
+    def test_index_is_written_and_skips_downloads(self):
+        props = [{"url": "p1", "category": "house", "images": [self.urls["a"], self.urls["b"]]},
+                 {"url": "p2", "category": "tochi", "images": [self.urls["a_copy"]]}]
+        self.archive(props[0])
+        self.archive(props[1])
+
+        conn = sqlite3.connect(self.index_path)
+        rows = {row[0]: row[1:] for row in conn.execute(
+            "SELECT source_url, storage_path, property_url FROM archived_images")}
+        conn.close()
+        self.assertEqual(set(rows), set(self.urls.values()))
+        self.assertEqual(rows[self.urls["a"]], (image_archiver._archive_path("house", self.image_hash("a")), "p1"))
+        self.assertEqual(rows[self.urls["a_copy"]][1], "p2")
+
+        served = _CountingHandler.requests_served
+        archived, timings = self.archive(*props)
+        self.assertEqual(_CountingHandler.requests_served, served)
+        self.assertEqual((timings["images"], timings["reused"]), (3, 3))
+        self.assertEqual(len(set(archived["p1"] + archived["p2"])), 3)
+
+    def test_index_without_property_column_is_upgraded(self):
+        conn = sqlite3.connect(self.index_path)
+        conn.execute("""CREATE TABLE archived_images (source_url TEXT PRIMARY KEY, image_hash TEXT NOT NULL,
+                        storage_path TEXT NOT NULL, public_url TEXT NOT NULL, archived_at TIMESTAMP)""")
+        conn.execute("INSERT INTO archived_images VALUES ('old', 'ff00ff00ff00ff00', 'x', 'https://x', NULL)")
+        conn.commit()
+        conn.close()
+        index = image_archiver.ArchiveIndex(self.index_path)
+        try:
+            self.assertEqual(index.lookup_hash("ff00ff00ff00ff00", "p1"), ("x", "https://x"))
+            self.assertIsNone(index.lookup_hash("ff00ff00ff00ff01", "p1"))
+        finally:
+            index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+リンク収集の進捗ストア（link_progress.LinkProgress）と collect_links の再開のテスト
+
+取得済みの最後のページの次から再開すること、欠落ページ、当日に完了した
+カテゴリはブラウザを使わずに返すこと、--force-refresh（resume=False）で
+当日分を破棄すること、別の日・保持期間外の進捗を使わないこと
+"""
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import link_progress
+from link_progress import LinkProgress
+
+if importlib.util.find_spec("playwright") is not None:
+    import integrated_scraper
+else:
+    integrated_scraper = None
+
+
+def _links(page_num, n=3):
+    return [f"https://example.com/jukyo/{page_num}-{i}" for i in range(n)]
+
+
+class TestLinkProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="test_link_progress_")
+        self.path = os.path.join(self.workdir, "link_progress.db")
+        self.progress = LinkProgress(self.path, run_date="2026-10-19")
+
+    def tearDown(self):
+        self.progress.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_resume_after_last_recorded_page(self):
+        self.assertEqual(self.progress.next_page("jukyo"), 1)
+        for page_num in (1, 2, 4):
+            self.progress.record_page("jukyo", page_num, _links(page_num))
+        self.assertEqual(self.progress.next_page("jukyo"), 5)
+        self.assertEqual(self.progress.next_page("tochi"), 1)
+        self.assertEqual(sorted(self.progress.pages("jukyo")), [1, 2, 4])
+
+    def test_missing_pages(self):
+        for page_num in (1, 2, 4):
+            self.progress.record_page("jukyo", page_num, _links(page_num))
+        self.progress.record_page("jukyo", 5, [])
+        self.assertEqual(self.progress.missing_pages("jukyo", 6), [3, 5, 6])
+        self.assertEqual(self.progress.missing_pages("jukyo", None), [])
+        # A re-fetched page overwrites the earlier result
+        self.progress.record_page("jukyo", 3, _links(3, 2))
+        self.assertEqual(self.progress.missing_pages("jukyo", 4), [])
+        self.assertEqual(self.progress.pages("jukyo")[3], _links(3, 2))
+
+    def test_totals_and_completion(self):
+        self.assertEqual(self.progress.totals("jukyo"), {})
+        self.progress.set_totals("jukyo", 250, 5)
+        self.assertEqual(self.progress.totals("jukyo"), {"total_items": 250, "max_pages": 5, "completed": False})
+        self.progress.mark_complete("jukyo")
+        self.assertTrue(self.progress.totals("jukyo")["completed"])
+
+    def test_reset_discards_only_that_category(self):
+        self.progress.record_page("jukyo", 1, _links(1))
+        self.progress.record_page("tochi", 1, _links(1))
+        self.progress.mark_complete("jukyo")
+        self.progress.reset("jukyo")
+        self.assertEqual((self.progress.pages("jukyo"), self.progress.totals("jukyo")), ({}, {}))
+        self.assertEqual(self.progress.next_page("jukyo"), 1)
+        self.assertEqual(list(self.progress.pages("tochi")), [1])
+
+    def test_other_days(self):
+        self.progress.record_page("jukyo", 1, _links(1))
+        self.progress.mark_complete("jukyo")
+        self.progress.close()
+        self.progress = LinkProgress(self.path, run_date="2026-10-20")
+        self.assertEqual((self.progress.pages("jukyo"), self.progress.totals("jukyo")), ({}, {}))
+        self.progress.close()
+        # Opening a store more than LINK_PROGRESS_RETENTION_DAYS later drops the old rows
+        LinkProgress(self.path, run_date="2026-11-30").close()
+        self.progress = LinkProgress(self.path, run_date="2026-10-19")
+        self.assertEqual(self.progress.pages("jukyo"), {})
+
+
+@unittest.skipIf(integrated_scraper is None, "playwright is not installed")
+class TestCollectLinksResume(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="test_link_progress_")
+        self.path_patch = mock.patch.object(link_progress, "LINK_PROGRESS_PATH",
+                                            os.path.join(self.workdir, "link_progress.db"))
+        self.path_patch.start()
+        self.stats = mock.patch.dict(integrated_scraper._collection_stats, clear=True)
+        self.stats.start()
+        progress = LinkProgress()
+        progress.set_totals("jukyo", 6, 2)
+        progress.record_page("jukyo", 1, _links(1))
+        progress.close()
+
+    def tearDown(self):
+        self.stats.stop()
+        self.path_patch.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_completed_today_needs_no_browser(self):
+        progress = LinkProgress()
+        progress.record_page("jukyo", 2, _links(2))
+        progress.mark_complete("jukyo")
+        progress.close()
+        links = integrated_scraper.collect_links("jukyo", "https://example.com/jukyo", browser=None)
+        self.assertEqual(sorted(links), sorted(_links(1) + _links(2)))
+        self.assertEqual(integrated_scraper._collection_stats["jukyo"]["missing_pages"], [])
+
+    def test_resumes_after_the_checkpoint(self):
+        visited = []
+        page = mock.Mock()
+        page.goto.side_effect = lambda url, **kwargs: visited.append(url)
+        page.query_selector_all.return_value = []
+        context = mock.Mock()
+        context.new_page.return_value = page
+        with mock.patch.object(integrated_scraper, "create_browser_context", return_value=context), \
+                mock.patch.object(integrated_scraper, "_extract_page_links", return_value=_links(2)), \
+                mock.patch.object(integrated_scraper, "rate_limit_wait"), \
+                mock.patch.object(integrated_scraper.time, "sleep"):
+            links = integrated_scraper.collect_links("jukyo", "https://example.com/jukyo", browser=None)
+        self.assertEqual([url.rsplit("page=", 1)[1] for url in visited], ["2"])
+        self.assertEqual(sorted(links), sorted(_links(1) + _links(2)))
+        progress = LinkProgress()
+        self.assertTrue(progress.totals("jukyo")["completed"])
+        progress.close()
+
+    def test_force_refresh_discards_todays_progress(self):
+        with mock.patch.object(integrated_scraper, "create_browser_context", side_effect=RuntimeError("no browser")):
+            with self.assertRaises(RuntimeError):
+                integrated_scraper.collect_links("jukyo", "https://example.com/jukyo", browser=None, resume=False)
+        progress = LinkProgress()
+        self.assertEqual((progress.pages("jukyo"), progress.totals("jukyo")), ({}, {}))
+        progress.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+一覧のページ送り（Database.get_properties_page と /api/properties/*）のテスト
+
+キーセットカーソルで全ページをたどると重複・欠落なく全件になること、
+並び順と絞り込み、列の指定、不正なパラメータが ValueError / 400 になること
+"""
+
+import sqlite3
+import unittest
+from datetime import date
+
+from tests.helpers import TemporarySQLiteDatabase, api_client, sample_property
+
+
+class TestPropertiesPage(unittest.TestCase):
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        for i in range(10):
+            self.db.upsert_property(sample_property(i, "jukyo" if i % 2 else "tochi"))
+        # Inactive rows sharing last_seen_dates, so -last_seen_date has ties
+        conn = sqlite3.connect(self.db.db_path)
+        conn.execute("""
+            UPDATE properties SET is_active = 0,
+                   last_seen_date = CASE WHEN rowid % 3 = 0 THEN '2026-01-02' ELSE '2026-01-01' END
+            WHERE rowid > 3
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self._db.__exit__(None, None, None)
+
+    def walk(self, **kwargs):
+        pages, after = [], None
+        while True:
+            rows, after = self.db.get_properties_page(after=after, **kwargs)
+            pages.append(rows)
+            if after is None:
+                return pages
+
+    def test_pages_cover_every_row_once(self):
+        everything, last = self.db.get_properties_page(fields=["url"])
+        self.assertIsNone(last)
+        self.assertEqual(len(everything), 10)
+        for order in ("id", "-id", "-last_seen_date"):
+            with self.subTest(order=order):
+                pages = self.walk(order=order, fields=["url", "last_seen_date"], limit=3)
+                self.assertEqual([len(p) for p in pages], [3, 3, 3, 1])
+                urls = [row["url"] for page in pages for row in page]
+                self.assertEqual(sorted(urls), sorted(row["url"] for row in everything))
+
+    def test_orders(self):
+        ids = [row["url"] for page in self.walk(order="id", fields=["url"], limit=4) for row in page]
+        desc = [row["url"] for page in self.walk(order="-id", fields=["url"], limit=4) for row in page]
+        self.assertEqual(desc, ids[::-1])
+        rows = [row for page in self.walk(order="-last_seen_date", fields=["url", "last_seen_date"], limit=2)
+                for row in page]
+        dates = [row["last_seen_date"] for row in rows]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_last_page_has_no_cursor(self):
+        rows, after = self.db.get_properties_page(limit=10)
+        self.assertEqual((len(rows), after), (10, None))
+
+    def test_filters_and_fields(self):
+        rows, _ = self.db.get_properties_page(where={"is_active": False, "last_seen_date__gte": "2026-01-02"},
+                                              fields=["url", "is_active"])
+        self.assertTrue(rows)
+        self.assertTrue(all(set(row) == {"url", "is_active"} and row["is_active"] is False for row in rows))
+        rows, _ = self.db.get_properties_page(where={"category": "jukyo"}, fields=["category"])
+        self.assertEqual({row["category"] for row in rows}, {"jukyo"})
+
+    def test_invalid_arguments(self):
+        for kwargs in ({"fields": ["url; DROP TABLE properties"]}, {"where": {"nope": 1}},
+                       {"order": "title"}, {"after": "1|2"}, {"after": "abc"}, {"limit": 0}):
+            with self.subTest(**{k: str(v) for k, v in kwargs.items()}):
+                with self.assertRaises(ValueError):
+                    self.db.get_properties_page(**kwargs)
+
+    def test_api_pages_and_bad_requests(self):
+        today = date.today().isoformat()
+        with api_client(self.db) as client:
+            first = client.get("/api/properties/all?limit=2&fields=url").get_json()
+            self.assertEqual(first["count"], 2)
+            second = client.get(f"/api/properties/all?limit=2&fields=url&after={first['next_cursor']}").get_json()
+            self.assertTrue(set(r["url"] for r in first["data"]).isdisjoint(r["url"] for r in second["data"]))
+            self.assertEqual(client.get(f"/api/properties/new?date={today}").get_json()["count"], 3)
+
+            for path in ("/api/properties/all?limit=0", "/api/properties/all?limit=-1",
+                         "/api/properties/all?fields=url,nope", "/api/properties/all?after=x",
+                         "/api/properties/sold?after=2026-01-01", "/api/properties/all?stream=csv",
+                         "/api/properties/new?date=2026-13-01", "/api/properties/new?after=1|2"):
+                with self.subTest(path=path):
+                    response = client.get(path)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertFalse(response.get_json()["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
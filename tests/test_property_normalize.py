@@ -0,0 +1,137 @@
+"""
+property_normalize のテスト（価格・面積・間取り・築年の解析）
+
+価格と面積の例は sales-dashboard/src/lib/price.ts の例と同じで、
+ダッシュボードと Python のレポートが同じ数値になることを確認する。
+一括解析（*_batch）は 1 件ずつの解析と要素ごとに一致すること
+"""
+
+import math
+import random
+import unittest
+
+import numpy as np
+
+from property_normalize import (
+    TSUBO_M2,
+    parse_price_yen, parse_price_yen_batch,
+    parse_area_m2, parse_area_m2_batch,
+    parse_price_range_yen, parse_layout, parse_built_year,
+)
+
+PRICE_CASES = [
+    ("4,980万円", 49_800_000),
+    ("1億2,000万円", 120_000_000),
+    ("1億円", 100_000_000),
+    ("2.5億円", 250_000_000),
+    ("5.8万円", 58_000),
+    ("54,000円", 54_000),
+    ("３，９８０万円", 39_800_000),
+    ("3,980万円～4,500万円", 39_800_000),
+    ("3980万円〜4500万円", 39_800_000),
+    ("6万円-7万円", 60_000),
+    ("150000", 150_000),       # bare >= 10万 → 円
+    ("1980", 19_800_000),      # bare < 10万 → 万円
+    ("お問い合わせ", None),
+    ("価格応相談", None),
+    ("未定", None),
+    ("非公開", None),
+    ("", None),
+    (None, None),
+    ("-", None),
+]
+
+AREA_CASES = [
+    ("158.26㎡", 158.26),
+    ("158.26m²", 158.26),
+    ("158.26m2", 158.26),
+    ("70.5平米", 70.5),
+    ("47.87坪", 47.87 * TSUBO_M2),
+    ("１２０．５㎡", 120.5),
+    ("1,234.5㎡", 1234.5),
+    ("100", 100.0),
+    ("", None),
+    (None, None),
+    ("不明", None),
+]
+
+RANGE_CASES = [
+    ("3,980万円～4,500万円", (39_800_000, 45_000_000)),
+    ("4,500万円〜3,980万円", (39_800_000, 45_000_000)),
+    ("2,480万円", (24_800_000, 24_800_000)),
+    ("1億〜1億5,000万円", (100_000_000, 150_000_000)),
+    ("お問い合わせ", (None, None)),
+]
+
+LAYOUT_CASES = [
+    ("3LDK", "3LDK"), ("３ＬＤＫ", "3LDK"), ("2SLDK+納戸", "2SLDK"),
+    ("1K", "1K"), ("1R", "1R"), ("ワンルーム", "1R"), ("4LDK・5DK", "4LDK"),
+    ("その他", None), (None, None),
+]
+
+BUILT_YEAR_CASES = [
+    ("2015年3月", 2015), ("2015/03", 2015), ("１９９８年", 1998),
+    ("平成27年", 2015), ("令和3年5月", 2021), ("令和元年5月", 2019), ("昭和50年1月", 1975),
+    ("不明", None), ("", None), (None, None),
+]
+
+
+class TestPropertyNormalize(unittest.TestCase):
+
+    def assert_value(self, actual, expected):
+        if expected is None:
+            self.assertTrue(actual is None or math.isnan(actual), actual)
+        else:
+            self.assertIsNotNone(actual)
+            self.assertTrue(math.isclose(actual, expected, rel_tol=1e-12), (actual, expected))
+
+    def test_parse_price_yen(self):
+        for text, expected in PRICE_CASES:
+            with self.subTest(text=text):
+                self.assert_value(parse_price_yen(text), expected)
+
+    def test_parse_area_m2(self):
+        for text, expected in AREA_CASES:
+            with self.subTest(text=text):
+                self.assert_value(parse_area_m2(text), expected)
+
+    def test_parse_price_yen_batch(self):
+        values = parse_price_yen_batch([text for text, _ in PRICE_CASES])
+        self.assertEqual(len(values), len(PRICE_CASES))
+        for (text, expected), value in zip(PRICE_CASES, values):
+            with self.subTest(text=text):
+                self.assert_value(float(value), expected)
+
+    def test_parse_area_m2_batch(self):
+        values = parse_area_m2_batch([text for text, _ in AREA_CASES])
+        for (text, expected), value in zip(AREA_CASES, values):
+            with self.subTest(text=text):
+                self.assert_value(float(value), expected)
+
+    def test_batch_matches_scalar(self):
+        rng = random.Random(0)
+        values = [f"{rng.randint(300, 9800):,}万円" for _ in range(200)]
+        values += [f"{rng.randint(25, 200) / 10}万円" for _ in range(200)]
+        values += [text for text, _ in PRICE_CASES] + [f"{i}億{i * 1000:,}万円" for i in range(1, 6)]
+        expected = np.array([np.nan if v is None else v for v in map(parse_price_yen, values)])
+        self.assertTrue(np.array_equal(parse_price_yen_batch(values), expected, equal_nan=True))
+        self.assertEqual(len(parse_price_yen_batch([])), 0)
+
+    def test_parse_price_range_yen(self):
+        for text, expected in RANGE_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_price_range_yen(text), expected)
+
+    def test_parse_layout(self):
+        for text, expected in LAYOUT_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_layout(text), expected)
+
+    def test_parse_built_year(self):
+        for text, expected in BUILT_YEAR_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_built_year(text), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
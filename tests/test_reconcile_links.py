@@ -0,0 +1,82 @@
+"""
+リンク照合（Database.reconcile_links）のテスト
+
+当日の URL 集合と properties を突き合わせて、新着・成約候補・再掲載を返し、
+掲載中の行の last_seen_date を今日にすること
+"""
+
+import sqlite3
+import unittest
+from datetime import date
+
+from tests.helpers import TemporarySQLiteDatabase, sample_property
+
+
+class TestReconcileLinks(unittest.TestCase):
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        self.props = [sample_property(i) for i in range(4)]
+        for prop in self.props:
+            self.db.upsert_property(prop)
+        self.db.upsert_property(sample_property(9, "tochi"))
+        self.set_rows("UPDATE properties SET last_seen_date = '2000-01-01'")
+
+    def tearDown(self):
+        self._db.__exit__(None, None, None)
+
+    def set_rows(self, sql):
+        conn = sqlite3.connect(self.db.db_path)
+        conn.execute(sql)
+        conn.commit()
+        conn.close()
+
+    def row(self, url):
+        conn = sqlite3.connect(self.db.db_path)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT is_active, last_seen_date FROM properties WHERE url = ?", (url,)).fetchone()
+        conn.close()
+        return dict(row)
+
+    def test_new_sold_and_touched(self):
+        listed = [p["url"] for p in self.props[:3]] + ["https://example.com/jukyo/new"]
+        result = self.db.reconcile_links("jukyo", listed + listed[:1])
+        self.assertEqual(result["new"], ["https://example.com/jukyo/new"])
+        # Other categories are never sold by this category's run
+        self.assertEqual(result["sold"], [self.props[3]["url"]])
+        self.assertEqual(result["reactivated"], [])
+        self.assertEqual(result["touched"], 3)
+        self.assertEqual(self.row(listed[0])["last_seen_date"], date.today().isoformat())
+        # Sold candidates are only reported; the caller deactivates them
+        sold = self.row(self.props[3]["url"])
+        self.assertTrue(sold["is_active"])
+        self.assertEqual(sold["last_seen_date"], "2000-01-01")
+
+    def test_relisted_row_is_reactivated(self):
+        url = self.props[0]["url"]
+        self.assertEqual(self.db.mark_properties_inactive([url]), 1)
+        result = self.db.reconcile_links("jukyo", [p["url"] for p in self.props])
+        self.assertEqual(result["reactivated"], [url])
+        self.assertEqual(result["sold"], [])
+        self.assertTrue(self.row(url)["is_active"])
+
+    def test_second_run_touches_nothing(self):
+        urls = [p["url"] for p in self.props]
+        self.assertEqual(self.db.reconcile_links("jukyo", urls)["touched"], 4)
+        self.assertEqual(self.db.reconcile_links("jukyo", urls)["touched"], 0)
+
+    def test_empty_collection_reports_every_active_row(self):
+        result = self.db.reconcile_links("jukyo", [])
+        self.assertEqual(sorted(result["sold"]), sorted(p["url"] for p in self.props))
+        self.assertEqual((result["new"], result["touched"]), ([], 0))
+
+    def test_more_urls_than_host_parameters(self):
+        urls = [f"https://example.com/jukyo/bulk-{i}" for i in range(5000)]
+        result = self.db.reconcile_links("jukyo", urls)
+        self.assertEqual(len(result["new"]), 5000)
+        self.assertEqual(len(result["sold"]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
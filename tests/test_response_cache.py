@@ -0,0 +1,107 @@
+"""
+API 応答キャッシュ（response_cache.ResponseCache）のテスト
+
+ETag と 304、データバージョンが進んだときの作り直し、エラー応答を
+キャッシュしないこと、過去日付の差分もバージョン付きで扱うこと、
+再ウォームの要求を要求数に数えないこと、止まった先行要求を待ち続けないこと
+"""
+
+import threading
+import time
+import unittest
+from datetime import date
+
+from flask import Flask, jsonify, request
+
+from response_cache import MUTABLE_CACHE_CONTROL, ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.version = 1
+        self.calls = 0
+        self.cache = ResponseCache(lambda: self.version, max_bytes=1024 * 1024, version_ttl=0)
+        app = Flask(__name__)
+
+        @app.route('/items')
+        @self.cache.cached()
+        def items():
+            self.calls += 1
+            if request.args.get('fail'):
+                return jsonify({'success': False}), 500
+            return jsonify({'version': self.version, 'date': request.args.get('date')})
+
+        self.app = app
+        self.client = app.test_client()
+
+    def test_repeat_request_is_a_hit(self):
+        first = self.client.get('/items')
+        second = self.client.get('/items')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.get_data(), first.get_data())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.headers['Cache-Control'], MUTABLE_CACHE_CONTROL)
+        self.assertEqual(second.headers['X-Data-Version'], '1')
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get('/items').headers['ETag']
+        response = self.client.get('/items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(self.client.get('/items', headers={'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_version_bump_recomputes(self):
+        etag = self.client.get('/items').headers['ETag']
+        self.version = 2
+        response = self.client.get('/items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['version'], 2)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.calls, 2)
+
+    def test_query_strings_are_separate_keys(self):
+        self.client.get('/items?date=2020-01-01')
+        self.client.get('/items?date=2020-01-02')
+        self.assertEqual(self.calls, 2)
+
+    def test_past_date_is_versioned(self):
+        path = '/items?date=2000-01-01'
+        first = self.client.get(path)
+        self.assertNotIn('immutable', first.headers['Cache-Control'])
+        self.version = 2
+        self.assertEqual(self.client.get(path).get_json()['version'], 2)
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get('/items?fail=1').status_code, 500)
+        self.assertEqual(self.client.get('/items?fail=1').status_code, 500)
+        self.assertEqual(self.calls, 2)
+
+    def test_unreadable_version_bypasses_cache(self):
+        self.version = None
+        self.client.get('/items')
+        self.client.get('/items')
+        self.assertEqual(self.calls, 2)
+
+    def test_warm_requests_are_not_counted(self):
+        self.client.get('/items?date=2020-01-01')
+        for _ in range(3):
+            self.version += 1
+            self.assertEqual(self.cache.warm(self.app, [('/items', ()), ('/items', (('date', '2020-01-02'),))]), 2)
+        self.client.get('/items')
+        self.client.get('/items')
+        self.assertEqual(self.cache.hot_keys(5), [('/items', ()), ('/items', (('date', '2020-01-01'),))])
+
+    def test_followers_stop_waiting_for_a_hung_leader(self):
+        self.cache.coalesce_timeout = 0.05
+        hung = threading.Event()
+        self.cache._inflight[(('/items', ()), (1, date.today().isoformat()))] = hung
+        started = time.monotonic()
+        response = self.client.get('/items')
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(response.get_json()['version'], 1)
+        self.assertEqual((self.calls, self.cache.coalesced), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
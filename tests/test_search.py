@@ -0,0 +1,122 @@
+"""
+全文検索（Database.search_properties と /api/properties/search）のテスト
+
+FTS5 のトライグラム索引で、すべての語を含む物件が一致すること、
+1〜2 文字の語、全角・半角の表記ゆれ、順位、snippet、索引の更新、
+ページ送り、不正なパラメータ
+"""
+
+import unittest
+
+from tests.helpers import TemporarySQLiteDatabase, api_client, sample_property
+
+LISTINGS = [
+    ("北谷町美浜 3LDK 角部屋", "沖縄県中頭郡北谷町美浜", "3LDK", "ペット可"),
+    ("美浜の新築アパート", "沖縄県中頭郡北谷町美浜", "２ＬＤＫ", "ペット不可"),
+    ("那覇市おもろまち 3LDK", "沖縄県那覇市おもろまち", "3LDK", "ﾍﾟｯﾄ可"),
+    ("浦添市のマンション <b>即入居</b>", "沖縄県浦添市牧港", "1K", "相談"),
+    ("北谷の土地", "沖縄県中頭郡北谷町桑江", None, None),
+]
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        self.urls = []
+        for i, (title, location, layout, pet) in enumerate(LISTINGS):
+            data = {"家賃": "6.5万円", "所在地": location}
+            if layout:
+                data["間取り"] = layout
+            if pet:
+                data["ペット"] = pet
+            prop = sample_property(i, title=title, property_data=data)
+            self.db.upsert_property(prop)
+            self.urls.append(prop["url"])
+
+    def tearDown(self):
+        self._db.__exit__(None, None, None)
+
+    def search(self, query, **kwargs):
+        rows, _ = self.db.search_properties(query, fields=["url", "title"], limit=100, **kwargs)
+        return [self.urls.index(row["url"]) for row in rows]
+
+    def test_every_term_must_match(self):
+        self.assertEqual(sorted(self.search("おもろまち")), [2])
+        self.assertEqual(sorted(self.search("美浜 3LDK")), [0])
+        self.assertEqual(self.search("美浜 1K"), [])
+
+    def test_title_ranks_above_details(self):
+        # 美浜 is in the title and 所在地 of 0 and 1, only in the details of 9
+        self.assertEqual(self.search("マンション"), [3])
+        self.db.upsert_property(sample_property(9, title="賃貸物件", property_data={"備考": "美浜まで徒歩5分"}))
+        rows, _ = self.db.search_properties("美浜", fields=["url"])
+        self.assertEqual(rows[-1]["url"], sample_property(9)["url"])
+        self.assertGreater(rows[0]["score"], rows[-1]["score"])
+
+    def test_short_terms(self):
+        self.assertEqual(sorted(self.search("北谷")), [0, 1, 4])
+        self.assertEqual(sorted(self.search("北谷 土地")), [4])
+        self.assertEqual(sorted(self.search("北谷 角部屋")), [0])
+        # Title hits rank above 所在地-only hits
+        self.assertEqual(sorted(self.search("北谷")[:2]), [0, 4])
+
+    def test_width_variants(self):
+        self.assertEqual(sorted(self.search("３ＬＤＫ")), [0, 2])
+        self.assertEqual(sorted(self.search("2LDK")), [1])
+        self.assertEqual(sorted(self.search("ペット可")), [0, 2])
+        self.assertEqual(sorted(self.search("ﾍﾟｯﾄ可")), [0, 2])
+
+    def test_snippet_is_escaped_and_marked(self):
+        rows, _ = self.db.search_properties("即入居", fields=["url"])
+        self.assertEqual(len(rows), 1)
+        self.assertIn("<mark>即入居</mark>", rows[0]["snippet"])
+        self.assertIn("&lt;b&gt;", rows[0]["snippet"])
+        self.assertNotIn("<b>", rows[0]["snippet"])
+
+    def test_index_follows_writes(self):
+        self.db.upsert_property(sample_property(0, title="宜野湾市の戸建て", property_data={"所在地": "沖縄県宜野湾市"}))
+        self.assertEqual(self.search("宜野湾市"), [0])
+        self.assertNotIn(0, self.search("角部屋"))
+        self.db.delete_properties([self.urls[2]])
+        self.assertEqual(self.search("おもろまち"), [])
+
+    def test_active_filter(self):
+        self.db.mark_properties_inactive([self.urls[0]])
+        self.assertEqual(sorted(self.search("3LDK")), [0, 2])
+        self.assertEqual(self.search("3LDK", where={"is_active": True}), [2])
+        self.assertEqual(self.search("3LDK", where={"is_active": False}), [0])
+
+    def test_pages(self):
+        seen, after = [], None
+        while True:
+            rows, after = self.db.search_properties("沖縄県", fields=["url"], after=after, limit=2)
+            seen.extend(row["url"] for row in rows)
+            if after is None:
+                break
+        self.assertEqual(sorted(seen), sorted(self.urls))
+
+    def test_invalid_arguments(self):
+        for kwargs in ({"query": "  　"}, {"query": "美浜", "limit": 0}, {"query": "美浜", "limit": 101},
+                       {"query": "美浜", "after": "-1"}, {"query": "美浜", "fields": ["nope"]},
+                       {"query": "美浜", "where": {"nope": 1}}):
+            with self.subTest(**{k: str(v) for k, v in kwargs.items()}):
+                with self.assertRaises(ValueError):
+                    self.db.search_properties(**kwargs)
+
+    def test_api(self):
+        with api_client(self.db) as client:
+            body = client.get("/api/properties/search?q=北谷 3LDK&fields=url,title").get_json()
+            self.assertEqual([self.urls.index(row["url"]) for row in body["data"]], [0])
+            self.assertEqual(body["query"], "北谷 3LDK")
+            self.assertEqual(client.get("/api/properties/search?q=3LDK&active=false").get_json()["count"], 0)
+            for path in ("/api/properties/search", "/api/properties/search?q=美浜&active=yes",
+                         "/api/properties/search?q=美浜&limit=0", "/api/properties/search?q=美浜&limit=500",
+                         "/api/properties/search?q=美浜&after=x", "/api/properties/search?q=美浜&fields=nope"):
+                with self.subTest(path=path):
+                    self.assertEqual(client.get(path).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+成約候補の HTTP 確認（sold_check.listing_is_gone）のテスト
+
+404/410 と詳細ページ以外へのリダイレクトだけを掲載終了とし、
+https 化・クエリの追加・末尾スラッシュなど同じ物件に着くリダイレクト、
+判定できない応答は掲載中（False / None）とすること
+"""
+
+import unittest
+from unittest import mock
+
+import requests
+
+from sold_check import is_same_listing, listing_id, listing_is_gone
+
+URL = "http://www.e-uchina.net/bukken/jukyo/r-5997-2250917-0392/detail.html"
+
+
+def _session(status_code=200, final_url=URL, head_status=None):
+    """HEAD（と GET）に固定の応答を返すセッション"""
+    session = mock.Mock()
+    session.head.return_value = mock.Mock(status_code=head_status or status_code, url=final_url)
+    session.get.return_value = mock.Mock(status_code=status_code, url=final_url)
+    return session
+
+
+class TestListingIsGone(unittest.TestCase):
+
+    def check(self, **kwargs):
+        return listing_is_gone(_session(**kwargs), URL, timeout=5)
+
+    def test_removed_listings(self):
+        self.assertTrue(self.check(status_code=404))
+        self.assertTrue(self.check(status_code=410))
+        for final in ("https://www.e-uchina.net/jukyo", "https://www.e-uchina.net/bukken/jukyo/",
+                      "https://www.e-uchina.net/", "https://www.e-uchina.net/jukyo?page=1"):
+            with self.subTest(final=final):
+                self.assertTrue(self.check(final_url=final))
+
+    def test_redirects_to_the_same_listing_are_kept(self):
+        for final in (URL,
+                      "https://www.e-uchina.net/bukken/jukyo/r-5997-2250917-0392/detail.html",
+                      "https://www.e-uchina.net/bukken/jukyo/r-5997-2250917-0392/detail.html?from=list",
+                      "https://e-uchina.net/bukken/jukyo/r-5997-2250917-0392/",
+                      "https://www.e-uchina.net/bukken/mansion/r-5997-2250917-0392/detail.html"):
+            with self.subTest(final=final):
+                self.assertIs(self.check(final_url=final), False)
+
+    def test_another_listing_is_gone(self):
+        self.assertTrue(self.check(final_url="https://www.e-uchina.net/bukken/jukyo/r-1/detail.html"))
+
+    def test_undetermined_responses(self):
+        self.assertIsNone(self.check(status_code=500))
+        self.assertIsNone(self.check(status_code=403))
+        session = _session()
+        session.head.side_effect = requests.ConnectionError()
+        self.assertIsNone(listing_is_gone(session, URL, timeout=5))
+
+    def test_head_rejected_falls_back_to_get(self):
+        session = _session(status_code=404, head_status=405)
+        self.assertTrue(listing_is_gone(session, URL, timeout=5))
+        session.get.assert_called_once_with(URL, allow_redirects=True, timeout=5, stream=True)
+        session.get.return_value.close.assert_called_once()
+
+    def test_urls_outside_the_detail_pattern(self):
+        self.assertIsNone(listing_id("https://example.com/jukyo/1"))
+        self.assertTrue(is_same_listing("http://example.com/jukyo/1", "https://example.com/jukyo/1/?x=1"))
+        self.assertFalse(is_same_listing("http://example.com/jukyo/1", "https://example.com/jukyo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+SQLite の統計（SQL で集計する get_price_statistics / get_area_distribution）のテスト
+
+property_data を 1 件ずつ json.loads していた従来の実装（benchmark_stats.py の
+reference_*）と結果が一致すること。日本語キーのエスケープ形と生の形、壊れた JSON、
+価格のない DB、件数が偶数・奇数のときの中央値と四分位点
+"""
+
+import json
+import sqlite3
+import unittest
+
+from benchmark_stats import reference_area_distribution, reference_price_statistics
+from database import EMPTY_PRICE_STATS
+from tests.helpers import TemporarySQLiteDatabase
+
+
+class TestStatsSQL(unittest.TestCase):
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        self.next_id = 0
+
+    def tearDown(self):
+        self._db.__exit__(None, None, None)
+
+    def insert(self, *property_data, is_active=True):
+        """property_data は dict（ensure_ascii の既定で保存）か、そのまま保存する文字列"""
+        conn = sqlite3.connect(self.db.db_path)
+        for data in property_data:
+            self.next_id += 1
+            raw = json.dumps(data) if isinstance(data, dict) else data
+            conn.execute("""
+                INSERT INTO properties (url, category, category_type, category_name_ja, genre_name_ja,
+                                        is_active, property_data)
+                VALUES (?, 'jukyo', '賃貸', '住居', '賃貸', ?, ?)
+            """, (f"https://example.com/{self.next_id}", is_active, raw))
+        conn.commit()
+        conn.close()
+
+    def assert_parity(self):
+        prices = self.db.get_price_statistics()
+        self.assertEqual(prices, reference_price_statistics(self.db))
+        areas = self.db.get_area_distribution()
+        expected = reference_area_distribution(self.db)
+        self.assertEqual(areas, expected)
+        self.assertEqual(list(areas), list(expected))
+        return prices
+
+    def test_empty_database(self):
+        self.assertEqual(self.assert_parity(), EMPTY_PRICE_STATS)
+        self.assertEqual(self.db.get_area_distribution(), {})
+
+    def test_no_priced_rows(self):
+        self.insert({"価格": "お問い合わせ"}, {"価格": ""}, {"備考": "x"}, "{}", None)
+        self.insert({"家賃": "8万円"}, is_active=False)
+        self.assertEqual(self.assert_parity(), EMPTY_PRICE_STATS)
+
+    def test_escaped_and_raw_keys(self):
+        escaped = {"価格": "2,500万円", "所在地": "沖縄県那覇市おもろまち"}
+        raw = json.dumps({"家賃": "6.5万円", "住所": "浦添市 3丁目"}, ensure_ascii=False)
+        self.insert(escaped, raw)
+        self.assertIn("\\u4fa1", json.dumps(escaped))
+        prices = self.assert_parity()
+        self.assertEqual(prices["count"], 2)
+        self.assertEqual(self.db.get_area_distribution(), {"那覇市": 1, "浦添市": 1})
+
+    def test_malformed_property_data(self):
+        self.insert("{not json", "[1, 2]", '"価格"', "{}", None, {"価格": "3,000万円"})
+        self.insert({"価格": 0, "price": "54,000円"}, {"価格": 1200}, {"所在地": "   "}, {"area": 2})
+        self.assertEqual(self.assert_parity()["count"], 3)
+
+    def test_odd_count_median(self):
+        self.insert(*({"家賃": f"{v}万円"} for v in (9, 5, 7, 12, 6)))
+        prices = self.assert_parity()
+        self.assertEqual((prices["count"], prices["median"]), (5, 7.0))
+        self.assertEqual((prices["percentile25"], prices["percentile75"]), (6.0, 9.0))
+
+    def test_even_count_median(self):
+        self.insert(*({"家賃": f"{v}万円"} for v in (9, 5, 7, 12, 6, 6)))
+        prices = self.assert_parity()
+        self.assertEqual((prices["count"], prices["median"]), (6, 6.5))
+        self.assertEqual((prices["percentile25"], prices["percentile75"]), (6.0, 8.5))
+
+    def test_duplicate_values_span_percentiles(self):
+        self.insert(*({"価格": f"{v:,}万円"} for v in [1980] * 7 + [2500, 3980, 4500]))
+        self.assert_parity()
+
+
+if __name__ == "__main__":
+    unittest.main()
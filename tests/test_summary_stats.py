@@ -0,0 +1,72 @@
+"""
+集計テーブル（stats_members / stats_counts）のテスト
+
+スクレイパー以外の書き込み（CSV 取り込み・サンプルデータの追加と削除）の後も
+集計テーブルの統計が従来の集計（get_category_statistics など）と一致すること
+"""
+
+import unittest
+
+from tests.helpers import TemporarySQLiteDatabase, sample_property
+
+
+class TestSummaryStats(unittest.TestCase):
+
+    def setUp(self):
+        self._db = TemporarySQLiteDatabase()
+        self.db = self._db.__enter__()
+        self.db.upsert_property(sample_property(0))
+        self.db.rebuild_summary_stats()
+
+    def tearDown(self):
+        self._db.__exit__(None, None, None)
+
+    def assert_summary_matches_live(self):
+        summary = self.db.get_summary_statistics()
+        self.assertIsNotNone(summary)
+        live = self.db.get_category_statistics()
+        self.assertEqual(summary["by_category"], live)
+        self.assertEqual(summary["total_active"], sum(c["count"] for c in live.values()))
+        self.assertEqual(summary["by_area"], self.db.get_area_distribution())
+
+    def test_refresh_after_import(self):
+        urls = []
+        for i in range(1, 5):
+            prop = sample_property(i)
+            self.assertTrue(self.db.upsert_property(prop))
+            urls.append(prop["url"])
+        self.db.refresh_summary_stats(urls)
+        self.assertEqual(self.db.get_summary_statistics()["by_category"]["jukyo"]["count"], 5)
+        self.assert_summary_matches_live()
+
+    def test_refresh_after_delete(self):
+        props = [sample_property(i, category) for i, category in ((1, "jukyo"), (2, "tochi"))]
+        for prop in props:
+            self.db.upsert_property(prop)
+        self.db.refresh_summary_stats([p["url"] for p in props])
+
+        urls = [p["url"] for p in props]
+        self.assertEqual(self.db.delete_properties(urls), 2)
+        self.db.refresh_summary_stats(urls)
+        self.assertNotIn("tochi", self.db.get_summary_statistics()["by_category"])
+        self.assert_summary_matches_live()
+
+    def test_category_names_come_from_rows(self):
+        prop = sample_property(1, genre_name_ja="賃貸", category_type="売買")
+        self.db.delete_properties([sample_property(0)["url"]])
+        self.db.upsert_property(prop)
+        self.db.rebuild_summary_stats()
+        jukyo = self.db.get_summary_statistics()["by_category"]["jukyo"]
+        self.assertEqual((jukyo["genre_name_ja"], jukyo["category_type"]), ("賃貸", "売買"))
+        self.assert_summary_matches_live()
+
+    def test_refresh_is_idempotent(self):
+        prop = sample_property(1)
+        self.db.upsert_property(prop)
+        self.assertEqual(self.db.refresh_summary_stats([prop["url"]]), 1)
+        self.assertEqual(self.db.refresh_summary_stats([prop["url"]]), 0)
+        self.assert_summary_matches_live()
+
+
+if __name__ == "__main__":
+    unittest.main()
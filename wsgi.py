@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production serving of the API (server.py).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+`python server.py` remains the development server (single process,
+optional debug reloader).
+"""
+
+from server import app, response_cache
+
+__all__ = ["app", "response_cache"]
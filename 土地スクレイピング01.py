@@ -10,31 +10,17 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+from property_normalize import parse_price_range_yen
+
 def extract_price_range(price_text):
     """
-    価格テキストから価格の範囲を抽出する関数。
+    価格テキストから価格の範囲（万円）を抽出する関数。
+    解析は property_normalize.parse_price_range_yen（円）に一本化している。
     """
-    billion_pattern = r'(\d+(?:,\d+)?)億'
-    million_pattern = r'(\d+(?:,\d+)?)万円'
-    prices = price_text.split('〜')
-    min_price = max_price = None
-
-    for price in prices:
-        billion = million = 0
-        billion_match = re.search(billion_pattern, price)
-        million_match = re.search(million_pattern, price)
-        if billion_match:
-            billion = int(billion_match.group(1).replace(",", "")) * 10000
-        if million_match:
-            million = int(million_match.group(1).replace(",", ""))
-        total_price = billion + million
-
-        if min_price is None or total_price < min_price:
-            min_price = total_price
-        if max_price is None or total_price > max_price:
-            max_price = total_price
-
-    return min_price, max_price
+    min_yen, max_yen = parse_price_range_yen(price_text)
+    if min_yen is None:
+        return None, None
+    return round(min_yen / 10000), round(max_yen / 10000)
 
 def extract_numeric_value_with_unit(text):
     """